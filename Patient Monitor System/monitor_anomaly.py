@@ -0,0 +1,134 @@
+"""
+Patient Health Monitoring System - Anomaly Detection
+Flags readings that deviate from the patient's own baseline (z-score and robust
+median/MAD score) or from the whole population (percentile outliers).
+
+Everything runs as array operations over the frame sorted by PatientID (as in
+PatientIndex.df): per-patient sums use np.add.reduceat over the contiguous patient
+runs, and per-patient medians come from one lexsort by (patient, value), so no
+Python code runs per patient.
+"""
+import numpy as np
+import pandas as pd
+
+import monitor_engine as engine
+
+Z_LIMIT = 3.0
+# Iglewicz & Hoaglin's cut-off for the modified z-score 0.6745 * (x - median) / MAD
+ROBUST_LIMIT = 3.5
+POPULATION_PERCENTILES = (0.5, 99.5)
+# Population percentiles are only meaningful over a reasonably large sample
+MIN_POPULATION = 200
+# Patients with fewer readings of a vital have no baseline for it
+MIN_HISTORY = 5
+ANOMALY_COLUMNS = ['PatientID', 'Name', 'Date', 'Metric', 'Value', 'Median', 'ZScore', 'RobustZ', 'Methods']
+
+
+def _groups(df):
+    """Row group id and start offset of every patient run"""
+    codes = pd.factorize(df['PatientID'])[0]
+    change = np.r_[False, codes[1:] != codes[:-1]] if len(codes) else np.array([], dtype=bool)
+    group = np.cumsum(change)
+    starts = np.flatnonzero(np.r_[True, change[1:]]) if len(codes) else np.array([], dtype='int64')
+    return group, starts
+
+
+def _group_median(values, group, n_groups):
+    """Median of the non-NaN values of every group (NaN for groups without any)
+
+    Rows must already be grouped, so one sort of a group-offset key orders the
+    values within every group at once; NaN sorts last in its group.
+    """
+    valid = ~np.isnan(values)
+    counts = np.bincount(group[valid], minlength=n_groups)
+    if not valid.any():
+        return np.full(n_groups, np.nan)
+    vmin = values[valid].min()
+    width = values[valid].max() - vmin + 1
+    ranked = np.sort(group * width + np.where(valid, values - vmin, width - 0.5)) - group * width + vmin
+    starts = np.r_[0, np.cumsum(np.bincount(group, minlength=n_groups))[:-1]]
+    lo = starts + np.maximum(counts - 1, 0) // 2
+    hi = starts + counts // 2
+    last = len(values) - 1
+    median = (ranked[np.minimum(lo, last)] + ranked[np.minimum(hi, last)]) / 2
+    return np.where(counts > 0, median, np.nan)
+
+
+def baseline_scores(df, metric, groups=None):
+    """(z, robust_z, median) arrays of one vital, each reading against its own patient's history"""
+    group, starts = groups if groups is not None else _groups(df)
+    n_groups = len(starts)
+    y = df[metric].to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~np.isnan(y)
+    count = np.add.reduceat(valid.astype('float64'), starts)
+    total = np.add.reduceat(np.where(valid, y, 0.0), starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        dev = np.where(valid, y - mean[group], 0.0)
+        std = np.sqrt(np.add.reduceat(dev * dev, starts) / (count - 1))
+        median = _group_median(y, group, n_groups)
+        absdev = np.abs(y - median[group])
+        mad = _group_median(absdev, group, n_groups)
+        # Integer vitals often give MAD 0; fall back to the scaled mean absolute deviation
+        mean_ad = np.add.reduceat(np.where(valid, absdev, 0.0), starts) / count
+        scale = np.where(mad > 0, mad / 0.6745, 1.253314 * mean_ad)
+        enough = (count >= MIN_HISTORY)[group]
+        z = np.where(enough & (std[group] > 0), (y - mean[group]) / std[group], np.nan)
+        robust = np.where(enough & (scale[group] > 0), (y - median[group]) / scale[group], np.nan)
+    return z, robust, median[group]
+
+
+def find_anomalies(df, metrics=engine.NUM_COLS):
+    """One row per anomalous reading and vital, for all patients at once
+
+    Methods lists what flagged it: 'mad' (|robust z| > ROBUST_LIMIT), 'z'
+    (|z| > Z_LIMIT) and 'population' (outside the population's
+    POPULATION_PERCENTILES). df must be sorted by PatientID.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    groups = _groups(df)
+    parts = []
+    for metric in metrics:
+        y = df[metric].to_numpy(dtype='float64', na_value=np.nan)
+        if np.isnan(y).all():
+            continue
+        z, robust, median = baseline_scores(df, metric, groups)
+        flags = {'mad': np.abs(robust) > ROBUST_LIMIT, 'z': np.abs(z) > Z_LIMIT}
+        if (~np.isnan(y)).sum() >= MIN_POPULATION:
+            low, high = np.nanpercentile(y, POPULATION_PERCENTILES)
+            flags['population'] = (y < low) | (y > high)
+        rows = np.flatnonzero(np.logical_or.reduce(list(flags.values())))
+        if not len(rows):
+            continue
+        methods = np.full(len(rows), '', dtype=object)
+        for name, hit in flags.items():
+            methods = np.where(hit[rows], methods + np.where(methods == '', '', ',') + name, methods)
+        parts.append(pd.DataFrame({
+            '_row': rows, 'Metric': metric, 'Value': y[rows], 'Median': median[rows],
+            'ZScore': z[rows], 'RobustZ': robust[rows], 'Methods': methods}))
+    if not parts:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    flagged = pd.concat(parts, ignore_index=True).sort_values('_row', kind='stable')
+    out = df[['PatientID', 'Name', 'Date']].iloc[flagged['_row'].to_numpy()].reset_index(drop=True)
+    for col in ANOMALY_COLUMNS[3:]:
+        out[col] = flagged[col].to_numpy()
+    return out
+
+
+def anomaly_lines(anomalies, limit=15):
+    """Report section: anomaly counts per vital and the most recent flagged readings"""
+    lines = ['-'*50, 'Baseline & Population Anomalies']
+    if anomalies.empty:
+        return lines + ['None']
+    counts = anomalies['Metric'].value_counts()
+    lines.append(f"Anomalous readings: {len(anomalies)} (" +
+                 ', '.join(f"{m} {counts[m]}" for m in engine.NUM_COLS if m in counts) + ')')
+    recent = anomalies.sort_values('Date', ascending=False, kind='stable')
+    for row in recent.head(limit).itertuples(index=False):
+        score = row.RobustZ if not np.isnan(row.RobustZ) else row.ZScore
+        lines.append(f"  {row.PatientID} {pd.Timestamp(row.Date).date()} {row.Metric} {engine.format_value(row.Value)} "
+                     f"(median {engine.format_value(round(row.Median, 1))}, score {engine.format_value(round(score, 1))}) [{row.Methods}]")
+    if len(anomalies) > limit:
+        lines.append(f"  ... {len(anomalies) - limit} more")
+    return lines
@@ -0,0 +1,450 @@
+"""
+Patient Health Monitoring System - HTTP API
+Serves the numbers the app shows (patient list, per-patient summaries, alert
+lists, analysis reports and time-series slices) as read-only JSON, for other
+systems on the local network. Runs on asyncio with no dependencies beyond the
+analytics stack.
+
+The vitals stay in memory as a PatientIndex. Responses are cached by request
+and the cache is dropped whenever the data changes (--follow appends new rows
+of a growing CSV), so repeated requests are a dict lookup on the event loop.
+Cache misses are computed on one worker thread, which also applies the
+appends, so the loop keeps serving while a slow response is built.
+
+Endpoints (start/end are inclusive YYYY-MM-DD dates):
+    GET /health
+    GET /summary                      ?start=&end=
+    GET /alerts                       ?start=&end=&severity=
+    GET /patients
+    GET /patients/<id>                ?start=&end=
+    GET /patients/<id>/alerts         ?start=&end=
+    GET /patients/<id>/readings       ?start=&end=&points=
+    GET /patients/<id>/analysis       ?start=&end=
+
+Usage:
+    python monitor_api.py patient_health_data.csv
+    python monitor_api.py live_export.csv --host 0.0.0.0 --port 8750 --follow
+    python monitor_api.py patient_health_data.csv --bench 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import monitor_anomaly as anomaly
+import monitor_cache as cache
+import monitor_downsample as downsample
+import monitor_engine as engine
+import monitor_ingest as ingest
+import monitor_profile as profile
+import monitor_trends as trends
+import monitor_validate as validate
+
+DEFAULT_PORT = 8750
+FOLLOW_INTERVAL_S = 1.0
+# Cached responses kept (least recently used dropped first)
+CACHE_ENTRIES = 4096
+# Most readings /readings returns unless ?points= sets another cap (0 for every reading)
+DEFAULT_POINTS = 2000
+MAX_REQUEST_BYTES = 16 * 1024
+KEEP_ALIVE_S = 30
+BENCH_SECONDS = 10
+
+_STATUS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _records(df):
+    """JSON-ready list of row dicts: ISO dates, NaN as null
+
+    Float32 vitals are widened and rounded first, so 97.9 is not sent as 97.9000015.
+    """
+    floats = df.select_dtypes(include='floating').columns
+    if len(floats):
+        df = df.astype({col: 'float64' for col in floats}).round({col: 4 for col in floats})
+    return json.loads(df.to_json(orient='records', date_format='iso', date_unit='s'))
+
+
+def _number(value):
+    """JSON number rounded like _records(), so a Float32 99.8 is not sent as 99.80000305"""
+    return None if pd.isna(value) else round(float(value), 4)
+
+
+def _date_range(query):
+    """(start, stop) from ?start=&end= (both inclusive dates); stop is exclusive"""
+    try:
+        start = pd.Timestamp(query['start']).normalize() if query.get('start') else None
+        stop = pd.Timestamp(query['end']).normalize() + pd.Timedelta(days=1) if query.get('end') else None
+    except ValueError:
+        start = stop = pd.NaT
+    if (start is not None and pd.isna(start)) or (stop is not None and pd.isna(stop)):
+        raise ApiError(400, 'start and end must be dates as YYYY-MM-DD')
+    if start is not None and stop is not None and start >= stop:
+        raise ApiError(400, 'start must not be after end')
+    return start, stop
+
+
+class VitalsService:
+    """The loaded vitals and the JSON payload of every endpoint
+
+    Not thread-safe: the server calls it from a single worker thread only.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = os.path.abspath(file_path)
+        # One stat for the cache key and the end of the load; --follow resumes from that end
+        st = os.stat(file_path)
+        key = cache.cache_key(file_path, st)
+        self.loaded_size = ingest.complete_size(file_path, st.st_size)
+        df = cache.load_cached(file_path, key)
+        if df is None:
+            df, _ = ingest.stream_csv(file_path, stop=self.loaded_size)
+            cache.save_cache(file_path, df, key)
+        checked = validate.validate(df)
+        self.quarantined = len(checked.rejected)
+        self.index = engine.PatientIndex(checked.clean)
+        self.alerts = engine.find_alerts(self.index.df)
+        self.version = 1
+        self.loaded = time.time()
+        self._overview = None
+        self._trend_cache = None
+        self._anomalies = None
+
+    def append(self, rows):
+        """Fold newly arrived rows in; returns True if the data changed"""
+        if rows is None or rows.empty:
+            return False
+        checked = validate.validate(rows, known=self.index.has_readings(rows))
+        self.quarantined += len(checked.rejected)
+        rows = checked.clean
+        if rows.empty:
+            return False
+        self.index.append(rows)
+        self.alerts = pd.concat([self.alerts, engine.find_alerts(rows)], ignore_index=True)
+        if self._trend_cache is not None:
+            self._trend_cache.append(self.index, rows)
+        self._overview = None
+        self._anomalies = None
+        self.version += 1
+        return True
+
+    def overview(self):
+        if self._overview is None:
+            self._overview = engine.ward_overview(self.index.df)
+        return self._overview
+
+    def _patient(self, patient_id):
+        if patient_id not in self.index:
+            raise ApiError(404, f'unknown patient {patient_id}')
+        return patient_id
+
+    def _alerts(self, alerts, start, stop):
+        if start is not None:
+            alerts = alerts[alerts['Date'] >= start]
+        if stop is not None:
+            alerts = alerts[alerts['Date'] < stop]
+        return alerts
+
+    def health(self, query):
+        return {'status': 'ok', 'file': self.file_path, 'version': self.version, 'records': len(self.index.df),
+                'patients': len(self.index.offsets), 'quarantined': self.quarantined, 'loaded': pd.Timestamp(self.loaded, unit='s').isoformat(timespec='seconds')}
+
+    def summary(self, query):
+        start, stop = _date_range(query)
+        df = self.index.window(start, stop)
+        lines = engine.summary_lines(df) if len(df) else ['No readings in the selected date range.']
+        return {'records': len(df), 'lines': lines}
+
+    def patients(self, query):
+        overview = self.overview()
+        out = overview[['Name', 'Records', 'FirstDate', 'LastDate', 'Alerts']].reset_index()
+        return {'patients': _records(out)}
+
+    def ward_alerts(self, query):
+        start, stop = _date_range(query)
+        alerts = self._alerts(self.alerts, start, stop)
+        severity = query.get('severity', '').strip().lower()
+        if severity:
+            known = sorted({rule.severity for rule in engine.ALERT_RULES})
+            if severity not in known:
+                raise ApiError(400, f"severity must be one of: {', '.join(known)}")
+            alerts = alerts[alerts['Severity'] == severity]
+        return {'count': len(alerts), 'patients': int(alerts['PatientID'].nunique()), 'alerts': _records(alerts)}
+
+    def patient(self, query, patient_id):
+        pid = self._patient(patient_id)
+        start, stop = _date_range(query)
+        rows = self.index.rows(pid, start, stop)
+        stats = {col: {'mean': _number(rows[col].mean()), 'min': _number(rows[col].min()),
+                       'max': _number(rows[col].max())} for col in engine.NUM_COLS}
+        return {'id': pid, 'name': str(self.index.rows(pid)['Name'].iloc[0]), 'records': len(rows),
+                'first': rows['Date'].min().isoformat() if len(rows) else None,
+                'last': rows['Date'].max().isoformat() if len(rows) else None,
+                'stats': stats, 'lines': self.index.summary_lines(pid, start, stop),
+                'messages': engine.patient_alerts(rows)}
+
+    def patient_alerts(self, query, patient_id):
+        pid = self._patient(patient_id)
+        start, stop = _date_range(query)
+        alerts = self._alerts(self.alerts[self.alerts['PatientID'] == pid], start, stop)
+        return {'id': pid, 'count': len(alerts), 'messages': engine.alert_messages(alerts),
+                'alerts': _records(alerts.drop(columns=['PatientID', 'Name']))}
+
+    def readings(self, query, patient_id):
+        pid = self._patient(patient_id)
+        start, stop = _date_range(query)
+        try:
+            points = int(query.get('points', DEFAULT_POINTS))
+        except ValueError:
+            raise ApiError(400, 'points must be an integer')
+        rows = self.index.rows(pid, start, stop)
+        total = len(rows)
+        if points > 0 and total > points:
+            # Min/max per bin keeps every spike; alert readings are kept when there are few of them
+            keep = np.zeros(total, dtype=bool)
+            for col in engine.NUM_COLS:
+                keep |= engine.violation_mask(rows[col].to_numpy(dtype='float64', na_value=np.nan), col)
+            # The six series pick different rows, so halve the bins until their union fits
+            bins = max(points // 2, 1)
+            sampled = downsample.downsample_frame(rows, engine.NUM_COLS, bins, keep=keep)
+            while len(sampled) > points and bins > 1:
+                bins //= 2
+                sampled = downsample.downsample_frame(rows, engine.NUM_COLS, bins, keep=keep)
+            if len(sampled) > points:
+                # Fewer points than one bin's extremes: evenly spaced readings instead
+                sampled = rows.iloc[np.linspace(0, total - 1, points).astype('int64')]
+            rows = sampled
+        return {'id': pid, 'records': total, 'returned': len(rows),
+                'readings': _records(rows[['Date'] + engine.NUM_COLS])}
+
+    def analysis(self, query, patient_id):
+        """The analyze_data() report: summary, alerts, rolling trends and anomalies"""
+        pid = self._patient(patient_id)
+        start, stop = _date_range(query)
+        rows = self.index.rows(pid, start, stop)
+        if rows.empty:
+            raise ApiError(404, 'no readings in the selected date range')
+        if self._trend_cache is None:
+            self._trend_cache = trends.TrendCache(self.index)
+        if self._anomalies is None:
+            self._anomalies = anomaly.find_anomalies(self.index.df)
+        flagged = self._alerts(self._anomalies[self._anomalies['PatientID'] == pid], start, stop)
+        extra = trends.trend_lines(self._trend_cache.rows(self.index, pid, start, stop)) + \
+            anomaly.anomaly_lines(flagged)
+        return {'id': pid, 'lines': engine.report_lines(rows, extra=extra)}
+
+
+ROUTES = [
+    (re.compile(r'/health'), 'health'),
+    (re.compile(r'/summary'), 'summary'),
+    (re.compile(r'/alerts'), 'ward_alerts'),
+    (re.compile(r'/patients'), 'patients'),
+    (re.compile(r'/patients/([^/]+)'), 'patient'),
+    (re.compile(r'/patients/([^/]+)/alerts'), 'patient_alerts'),
+    (re.compile(r'/patients/([^/]+)/readings'), 'readings'),
+    (re.compile(r'/patients/([^/]+)/analysis'), 'analysis'),
+]
+
+
+def route(path):
+    """(VitalsService method name, path arguments) for a request path"""
+    path = path.rstrip('/') or '/'
+    for pattern, name in ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            return name, [unquote(arg) for arg in match.groups()]
+    raise ApiError(404, f'no such endpoint {path}')
+
+
+class ApiServer:
+    """asyncio HTTP/1.1 server (GET only, keep-alive) over a VitalsService with a response cache"""
+
+    def __init__(self, service, follow=False):
+        self.service = service
+        self.follow = follow
+        self.tailer = ingest.CsvTailer(service.file_path, offset=service.loaded_size) if follow else None
+        # One thread owns the service: computing responses and applying appends never overlap
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='monitor-api')
+        self.cache = OrderedDict()
+        self.hits = self.misses = 0
+
+    async def respond(self, target):
+        """(status, body bytes) for a request target, from the cache when possible"""
+        split = urlsplit(target)
+        query = dict(parse_qsl(split.query))
+        key = (split.path.rstrip('/'), tuple(sorted(query.items())))
+        body = self.cache.get(key)
+        if body is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return 200, body
+        self.misses += 1
+        version = self.service.version
+        try:
+            name, args = route(split.path)
+            with profile.span('api_request', endpoint=name):
+                payload = await asyncio.get_running_loop().run_in_executor(
+                    self.worker, lambda: getattr(self.service, name)(query, *args))
+        except ApiError as e:
+            return e.status, json.dumps({'error': str(e)}).encode()
+        except Exception as e:
+            return 500, json.dumps({'error': f'{type(e).__name__}: {e}'}).encode()
+        body = json.dumps(payload, separators=(',', ':'), default=str).encode()
+        # A response computed while rows were being appended may already be stale
+        if version == self.service.version:
+            self.cache[key] = body
+            if len(self.cache) > CACHE_ENTRIES:
+                self.cache.popitem(last=False)
+        return 200, body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_S)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    return
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    await self.send(writer, 400, b'{"error":"malformed request line"}', close=True)
+                    return
+                headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+                close = headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+                if method not in ('GET', 'HEAD'):
+                    status, body = 405, b'{"error":"only GET is supported"}'
+                else:
+                    status, body = await self.respond(target)
+                etag = f'"{self.service.version}"' if status == 200 else None
+                if etag is not None and headers.get('if-none-match') == etag:
+                    status, body = 304, b''
+                await self.send(writer, status, b'' if method == 'HEAD' else body, close, etag)
+                if close:
+                    return
+        finally:
+            writer.close()
+
+    async def send(self, writer, status, body, close=False, etag=None):
+        head = [f'HTTP/1.1 {status} {_STATUS[status]}', 'Content-Type: application/json',
+                f'Content-Length: {len(body)}', 'Cache-Control: no-cache',
+                f"Connection: {'close' if close else 'keep-alive'}"]
+        if etag is not None:
+            head.append(f'ETag: {etag}')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+    async def follow_file(self):
+        """Poll the CSV for appended rows; any change drops every cached response"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(FOLLOW_INTERVAL_S)
+            rows = await loop.run_in_executor(self.worker, self.tailer.poll)
+            if rows is None:
+                print(f"{self.service.file_path} was truncated or replaced - restart to reload it")
+                return
+            if await loop.run_in_executor(self.worker, self.service.append, rows):
+                self.cache.clear()
+
+    async def serve(self, host, port, ready=None):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_REQUEST_BYTES)
+        tasks = [asyncio.create_task(self.follow_file())] if self.follow else []
+        if ready is not None:
+            ready.set_result(server.sockets[0].getsockname()[1])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.worker.shutdown(wait=False)
+
+
+async def _get(reader, writer, path):
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = int(re.search(rb'Content-Length: (\d+)', head).group(1))
+    await reader.readexactly(length)
+
+
+async def bench(port, paths, rate, seconds=BENCH_SECONDS, connections=8):
+    """Latencies (seconds) of GETs over paths sent at rate requests/s across keep-alive connections"""
+    latencies = []
+
+    async def client(i):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        interval = connections / rate
+        start = time.perf_counter() + i * interval / connections
+        n = 0
+        while True:
+            due = start + n * interval
+            if due - start > seconds:
+                break
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            sent = time.perf_counter()
+            await _get(reader, writer, paths[(n * connections + i) % len(paths)])
+            latencies.append(time.perf_counter() - sent)
+            n += 1
+        writer.close()
+
+    await asyncio.gather(*(client(i) for i in range(connections)))
+    return np.array(latencies)
+
+
+async def _run_bench(server, rate):
+    ready = asyncio.get_running_loop().create_future()
+    serving = asyncio.create_task(server.serve('127.0.0.1', 0, ready))
+    port = await ready
+    ids = [pid for pid in server.service.index.patient_ids()[:50]]
+    paths = ['/patients', '/summary'] + [f'/patients/{pid}{suffix}' for pid in ids
+                                         for suffix in ('', '/alerts', '/readings')]
+    # First pass fills the cache, as steady traffic would
+    await bench(port, paths, rate=max(rate, len(paths)), seconds=len(paths) / max(rate, len(paths)))
+    latencies = await bench(port, paths, rate)
+    serving.cancel()
+    ms = np.percentile(latencies, [50, 99, 100]) * 1000
+    print(f"{len(latencies)} requests at {rate}/s: p50 {ms[0]:.2f} ms | p99 {ms[1]:.2f} ms | max {ms[2]:.2f} ms | "
+          f"cache hits {server.hits}, misses {server.misses}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Read-only JSON API over a vitals CSV')
+    parser.add_argument('file', help='vitals CSV to serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--follow', action='store_true', help='serve rows appended to the file as they arrive')
+    parser.add_argument('--bench', type=int, metavar='RPS',
+                        help=f'serve on a free port, send RPS requests/s for {BENCH_SECONDS}s and print latencies')
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    server = ApiServer(VitalsService(args.file), follow=args.follow)
+    service = server.service
+    print(f"Loaded {len(service.index.df)} records for {len(service.index.offsets)} patients "
+          f"in {time.perf_counter() - start:.1f}s")
+    if args.bench:
+        asyncio.run(_run_bench(server, args.bench))
+        return
+    print(f"Serving on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Patient Health Monitoring System - Batch Mode
+Processes a vitals CSV for every patient in one pass, without Tkinter or plotting.
+
+Usage:
+    python monitor_batch.py patient_health_data.csv
+    python monitor_batch.py patient_health_data.csv --stats-out stats.csv --alerts-only
+    python monitor_batch.py huge_export.csv --chunksize 500000 --alerts-out alerts.csv
+    python monitor_batch.py patient_health_data.csv --anomalies-out anomalies.csv
+    python monitor_batch.py exports/ --alerts-out alerts.csv
+    python monitor_batch.py exports/ --start 2025-10-01 --end 2025-10-07
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+import monitor_anomaly as anomaly
+import monitor_dataset as dataset
+import monitor_engine as engine
+import monitor_ingest as ingest
+import monitor_validate as validate
+
+
+def _in_range(df, first, last):
+    """Rows of df dated within [first, last] (either may be None)"""
+    if first is None and last is None:
+        return df
+    dates = df['Date']
+    keep = (dates >= first if first is not None else True) & (dates <= last if last is not None else True)
+    return df[keep]
+
+
+def run(file_path, stats_out=None, alerts_only=False, chunksize=None, alerts_out=None, anomalies_out=None,
+        first=None, last=None, out=sys.stdout):
+    """Load, summarize and screen every patient; returns the number of patients with alerts
+
+    With chunksize set the file is streamed and only running aggregates are kept,
+    so memory stays bounded for exports larger than RAM. Anomaly detection needs
+    every patient's full history and is not available when streaming. file_path
+    may also be a directory of CSVs, read as one partitioned dataset; with first
+    and/or last dates only the partitions overlapping them are read. Rows failing
+    validation are left out, as in the apps (streamed, duplicates are only
+    caught within a chunk).
+    """
+    start = time.perf_counter()
+    folder = dataset.PartitionedDataset(file_path).scan() if os.path.isdir(file_path) else None
+    counts, rejected = 0, 0
+    if chunksize:
+        running = ingest.RunningStats()
+        readings = []
+        paths = [file_path] if folder is None else \
+            [os.path.join(folder.folder, n) for n in folder.partitions(start=first, end=last)]
+        for path in paths:
+            for chunk in ingest.iter_clean_chunks(path, chunksize=chunksize):
+                checked = validate.validate(_in_range(chunk, first, last))
+                counts, rejected = counts + checked.counts, rejected + len(checked.rejected)
+                chunk = checked.clean
+                running.update(chunk)
+                if alerts_out:
+                    readings.append(engine.find_alerts(chunk))
+        stats = running.stats()
+        records = running.records
+        summary = [f"Patients: {len(stats)}", f"Records: {records}"]
+        if alerts_out:
+            readings = pd.concat(readings, ignore_index=True) if readings else engine.find_alerts(None)
+    else:
+        df = _in_range(engine.load_csv(file_path), first, last) if folder is None else \
+            folder.load(start=first, end=last)
+        checked = validate.validate(df)
+        counts, rejected, df = checked.counts, len(checked.rejected), checked.clean
+        stats = engine.patient_stats(df)
+        records = len(df)
+        summary = engine.summary_lines(df)
+        if alerts_out:
+            readings = engine.find_alerts(df)
+        if anomalies_out:
+            anomalies = anomaly.find_anomalies(engine.PatientIndex(df).df)
+    alerts = engine.stats_alerts(stats)
+    elapsed = time.perf_counter() - start
+
+    print('\n'.join(summary), file=out)
+    print('\n'.join(validate.summary_lines(counts, rejected)), file=out)
+    print('-'*75, file=out)
+    flagged = 0
+    for pid, row in stats.iterrows():
+        msgs = alerts[pid]
+        flagged += bool(msgs)
+        if alerts_only and not msgs:
+            continue
+        print(f"{pid} - {row['Name']} | Records: {row['Records']} | "
+              f"HR {row['HeartRate_mean']:.1f} | BP {row['BP_Systolic_mean']:.1f}/{row['BP_Diastolic_mean']:.1f} | "
+              f"Temp {row['Temp_mean']:.1f} | Glucose {row['Glucose_mean']:.1f} | O2 {row['O2Sat_mean']:.1f}", file=out)
+        print('    Alerts/Risks: ' + (', '.join(msgs) if msgs else 'None'), file=out)
+    print('-'*75, file=out)
+    print(f"{flagged}/{len(stats)} patients with alerts | processed {records} records in {elapsed:.3f}s", file=out)
+
+    if stats_out:
+        stats = stats.copy()
+        stats['Alerts'] = ['; '.join(alerts[pid]) for pid in stats.index]
+        stats.to_csv(stats_out)
+    if alerts_out:
+        readings.sort_values(['PatientID', 'Date'], kind='stable').to_csv(alerts_out, index=False)
+    if anomalies_out and not chunksize:
+        anomalies.to_csv(anomalies_out, index=False)
+        print(f"{len(anomalies)} anomalous readings written to {anomalies_out}", file=out)
+    return flagged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless per-patient vitals summary and alert screening')
+    parser.add_argument('csv', help='patient health CSV file, or a directory of them')
+    parser.add_argument('--stats-out', help='write the per-patient stats table to this CSV')
+    parser.add_argument('--alerts-only', action='store_true', help='only list patients with alerts')
+    parser.add_argument('--alerts-out', help='write every violating reading (rule, value, severity) to this CSV')
+    parser.add_argument('--anomalies-out',
+                        help='write readings that deviate from the patient baseline or population to this CSV')
+    parser.add_argument('--chunksize', type=int,
+                        help='stream the file in chunks of this many rows (bounded memory)')
+    parser.add_argument('--start', help='first date to include (YYYY-MM-DD)')
+    parser.add_argument('--end', help='last date to include (YYYY-MM-DD)')
+    args = parser.parse_args(argv)
+    if args.anomalies_out and args.chunksize:
+        parser.error('--anomalies-out needs the whole file in memory and cannot be combined with --chunksize')
+    first = pd.Timestamp(args.start).normalize() if args.start else None
+    last = pd.Timestamp(args.end).normalize() + pd.Timedelta(days=1, microseconds=-1) if args.end else None
+    run(args.csv, stats_out=args.stats_out, alerts_only=args.alerts_only, chunksize=args.chunksize,
+        alerts_out=args.alerts_out, anomalies_out=args.anomalies_out, first=first, last=last)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Patient Health Monitoring System - Benchmarks
+Times the app's hot paths on synthetic vitals (monitor_generate) at several
+sizes and reports throughput and peak memory per stage: CSV ingestion, the
+Feather cache, validation, indexing, patient switching, summary/alert screening, the ward
+overview, trends, anomalies and figure rendering.
+
+Each stage is run once for timing and, unless --no-memory is given, once more
+under tracemalloc for its peak allocation, so tracing does not skew the
+timings. Results can be saved with --json and compared against an earlier run
+with --compare; stages slower than --threshold are reported as regressions
+and make the exit status 1.
+
+Usage:
+    python monitor_benchmark.py
+    python monitor_benchmark.py --sizes 10k 1m --json bench.json
+    python monitor_benchmark.py --sizes 1m --compare bench.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import monitor_anomaly as anomaly
+import monitor_cache as cache
+import monitor_charts as charts
+import monitor_engine as engine
+import monitor_generate as generate
+import monitor_ingest as ingest
+import monitor_trends as trends
+import monitor_validate as validate
+
+DEFAULT_SIZES = ('10k', '1m', '10m')
+# Patients switched to / charts rendered per size; the per-operation mean is reported
+SWITCH_SAMPLES = 200
+RENDER_SAMPLES = 10
+REGRESSION_THRESHOLD = 0.25
+# Fast stages are repeated until they have run this long, and the mean is reported
+MIN_SECONDS = 0.5
+
+
+def parse_size(text):
+    """'10k' / '1m' / '2500' -> rows"""
+    text = text.strip().lower()
+    scale = {'k': 10**3, 'm': 10**6}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def dataset_path(rows, data_dir, seed=0):
+    """Synthetic CSV of about rows readings, generated once and reused from data_dir"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'vitals_{rows}_seed{seed}.csv')
+    if not os.path.exists(path):
+        patients, days, per_day = generate.shape_for_rows(rows)
+        print(f"Generating {path} ({patients} patients x {days} days x {per_day}/day)...", file=sys.stderr)
+        generate.write_csv(path, patients, days, per_day, seed=seed)
+    return path
+
+
+def measure(fn, memory=True):
+    """(result, mean seconds, peak MiB or None) of fn()"""
+    start = time.perf_counter()
+    result = fn()
+    runs = 1
+    while time.perf_counter() - start < MIN_SECONDS:
+        fn()
+        runs += 1
+    elapsed = (time.perf_counter() - start) / runs
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 1024**2
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _switch(index, ids):
+    for pid in ids:
+        engine.patient_summary_lines(index.rows(pid))
+
+
+def _render(chart, frames):
+    for df in frames:
+        chart.set_data(df)
+        chart.fig.canvas.draw()
+
+
+def run_size(size, data_dir, memory=True, seed=0):
+    """Benchmark every stage on one dataset size; returns a list of result dicts"""
+    path = dataset_path(size, data_dir, seed)
+    results = []
+
+    def stage(name, fn, items, unit='rows'):
+        result, seconds, peak = measure(fn, memory)
+        results.append({'size': size, 'stage': name, 'seconds': seconds, 'items': items, 'unit': unit,
+                        'throughput': items / seconds if seconds else float('inf'), 'peak_mb': peak})
+        return result
+
+    rows = size
+    df, _ = stage('ingest_csv', lambda: ingest.stream_csv(path), rows)
+    rows = len(df)
+    if cache.available():
+        stage('cache_save', lambda: cache.save_cache(path, df, cache.cache_key(path)), rows)
+        stage('cache_load', lambda: cache.load_cached(path), rows)
+    # The later stages see only the rows that pass, as in the apps
+    df = stage('validate', lambda: validate.validate(df), rows).clean
+    rows = len(df)
+    index = stage('index', lambda: engine.PatientIndex(df), rows)
+    ids = np.random.default_rng(seed).choice(index.patient_ids(), min(SWITCH_SAMPLES, len(index.offsets)),
+                                             replace=False)
+    stage('patient_switch', lambda: _switch(index, ids), len(ids), 'patients')
+    stage('summary', lambda: engine.summary_lines(df), rows)
+    stage('alerts', lambda: engine.find_alerts(index.df), rows)
+    stage('ward_overview', lambda: engine.ward_overview(index.df), rows)
+    stage('trends', lambda: trends.TrendCache(index), rows)
+    stage('anomalies', lambda: anomaly.find_anomalies(index.df), rows)
+    chart = charts.VitalsChart('overview', blit=False)
+    FigureCanvasAgg(chart.fig)
+    frames = [index.rows(pid) for pid in ids[:RENDER_SAMPLES]]
+    stage('render_patient', lambda: _render(chart, frames), len(frames), 'charts')
+    stage('render_ward', lambda: _render(chart, [index.df]), 1, 'charts')
+    return results
+
+
+def result_lines(results, baseline=None, threshold=REGRESSION_THRESHOLD):
+    """Results table; with a baseline, the change against it and regression markers"""
+    before = {(r['size'], r['stage']): r for r in baseline or []}
+    lines = [f"{'rows':>10} {'stage':<15} {'seconds':>9} {'throughput':>20} {'peak MiB':>9}"
+             + ('   vs baseline' if baseline else '')]
+    for r in results:
+        peak = f"{r['peak_mb']:9.1f}" if r['peak_mb'] is not None else f"{'-':>9}"
+        line = (f"{r['size']:>10} {r['stage']:<15} {r['seconds']:9.3f} "
+                f"{r['throughput']:>13,.{0 if r['throughput'] >= 100 else 1}f} {r['unit'] + '/s':<6} {peak}")
+        old = before.get((r['size'], r['stage']))
+        if old is not None:
+            change = r['seconds'] / old['seconds'] - 1 if old['seconds'] else 0.0
+            line += f"   {change:+7.1%}" + ('  REGRESSION' if change > threshold else '')
+        lines.append(line)
+    return lines
+
+
+def regressions(results, baseline, threshold=REGRESSION_THRESHOLD):
+    before = {(r['size'], r['stage']): r['seconds'] for r in baseline}
+    return [r for r in results
+            if before.get((r['size'], r['stage'])) and r['seconds'] / before[(r['size'], r['stage'])] - 1 > threshold]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark ingestion, analysis and rendering on synthetic vitals')
+    parser.add_argument('--sizes', nargs='+', default=list(DEFAULT_SIZES),
+                        help='dataset sizes in rows, e.g. 10k 1m 10m')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'patient_monitor_bench'),
+                        help='where the synthetic CSVs are generated and reused from')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak-memory runs')
+    parser.add_argument('--json', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='slowdown (fraction) reported as a regression')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)['results']
+    results = []
+    for size in args.sizes:
+        results += run_size(parse_size(size), args.data_dir, memory=not args.no_memory, seed=args.seed)
+    print('\n'.join(result_lines(results, baseline, args.threshold)))
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'results': results}, fh, indent=1)
+    if baseline is not None:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"{len(slower)} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
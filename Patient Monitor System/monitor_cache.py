@@ -0,0 +1,93 @@
+"""
+Patient Health Monitoring System - Columnar Load Cache
+Keeps the cleaned vitals frame in an uncompressed Feather sidecar next to the CSV
+(.<name>.csv.feather), keyed by the CSV's absolute path, mtime and size. Reopening
+an unchanged export memory-maps the cache instead of re-parsing the text.
+
+Requires pyarrow; without it every function here is a no-op and loads fall back
+to parsing the CSV.
+"""
+import os
+
+import monitor_profile as profile
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+KEY_FIELD = b'patient_monitor_cache_key'
+# Bump when the cached frame's schema changes so older sidecars are ignored
+CACHE_VERSION = 2
+
+
+def available():
+    return feather is not None
+
+
+def cache_path(file_path):
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, f'.{name}.feather')
+
+
+def cache_key(file_path, st=None):
+    """Key of the file version on disk now (or of the os.stat() result st); take it before reading the file"""
+    st = os.stat(file_path) if st is None else st
+    return f'{CACHE_VERSION}|{os.path.abspath(file_path)}|{st.st_mtime_ns}|{st.st_size}'.encode()
+
+
+def is_cached(file_path):
+    """True if a cache for this exact file version exists (reads only the sidecar's schema)"""
+    path = cache_path(file_path)
+    if not available() or not os.path.exists(path):
+        return False
+    try:
+        with pa.memory_map(path) as source:
+            schema = pa.ipc.open_file(source).schema
+        return (schema.metadata or {}).get(KEY_FIELD) == cache_key(file_path)
+    except (OSError, pa.ArrowException):
+        return False
+
+
+@profile.timed('cache_load')
+def load_cached(file_path, key=None):
+    """Cleaned frame for file_path if a cache for this exact file version exists, else None
+
+    key is the cache_key() the caller took before deciding to load (the current one by default).
+    """
+    path = cache_path(file_path)
+    if not available() or not os.path.exists(path):
+        return None
+    try:
+        table = feather.read_table(path, memory_map=True)
+        if (table.schema.metadata or {}).get(KEY_FIELD) != (key or cache_key(file_path)):
+            return None
+        return table.to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+
+
+@profile.timed('cache_save')
+def save_cache(file_path, df, key):
+    """Write the cleaned frame read from file_path; returns False if caching is unavailable or fails
+
+    key is the cache_key() taken before the file was read, so rows appended while
+    it was being read make the cache stale instead of being missing from it.
+    """
+    if not available():
+        return False
+    path = cache_path(file_path)
+    tmp = path + '.tmp'
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[KEY_FIELD] = key
+        table = table.replace_schema_metadata(metadata)
+        feather.write_feather(table, tmp, compression='uncompressed')
+        os.replace(tmp, path)
+        return True
+    except (OSError, pa.ArrowException):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
@@ -0,0 +1,498 @@
+"""
+Patient Health Monitoring System - Chart Builders
+Persistent vitals figures built with the object-oriented matplotlib API (Figure,
+not pyplot), so they are freed like any other object instead of living in
+pyplot's global figure registry.
+
+A VitalsChart creates its axes and line artists once. Switching patient only
+swaps the artists' data with set_data(); while the axes limits stay the same
+the canvas is updated by blitting the changed artists over a cached background
+instead of redrawing the whole figure.
+
+CohortChart draws the per-day population percentile bands once and overlays
+patients' readings on them as animated lines.
+
+ImageCache keeps the finished bitmaps of recently shown charts, so going back
+to a patient/chart that was already drawn copies pixels instead of drawing.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.dates import AutoDateLocator, ConciseDateFormatter, date2num
+from matplotlib.figure import Figure
+
+import monitor_downsample as downsample
+import monitor_engine as engine
+
+# Markers are only drawn while a panel shows at most this many points: about one per 4 px of
+# an overview panel, beyond which they merge into a solid band. Used by every chart of both apps.
+MARKER_LIMIT = 120
+# Memory cap of the rendered-chart cache (an 11x5in chart at 95 dpi is about 2 MiB)
+IMAGE_CACHE_MB = 64
+
+# Initial y-range per vital; widened (never narrowed) when a patient's readings fall outside
+DISPLAY_RANGES = {
+    'HeartRate': (40, 140),
+    'BP_Systolic': (50, 180),
+    'BP_Diastolic': (50, 180),
+    'Temp': (95, 104),
+    'Glucose': (50, 250),
+    'O2Sat': (0, 105),
+}
+
+_LINE = {'linewidth': 2.5}
+CHART_SPECS = {
+    'overview': {
+        'figsize': (12,8), 'grid': (2,2), 'title_size': 12, 'suptitle': True,
+        'panels': [
+            {'title': 'Heart Rate Trend', 'lines': [('HeartRate', {'marker': 'o', 'color': '#168aad'})]},
+            {'title': 'Blood Pressure Trend', 'legend': True,
+             'lines': [('BP_Systolic', {'marker': 'o', 'c': '#22577a', 'label': 'Systolic'}),
+                       ('BP_Diastolic', {'marker': 's', 'c': '#91c788', 'label': 'Diastolic'})]},
+            {'title': 'Temperature & O2 Saturation',
+             'lines': [('Temp', {'color': '#ffa502', 'linewidth': 2, 'marker': 'v'})]},
+            {'title': 'Glucose Level Trend', 'lines': [('Glucose', {'marker': 'p', 'color': '#ff6f3c'})]},
+        ],
+    },
+    'heart_rate': {
+        'figsize': (11,5), 'grid': (1,1), 'title_size': 14,
+        'panels': [{'title': '❤️ Heart Rate Trend', 'ylabel': 'Heart Rate (bpm)',
+                    'lines': [('HeartRate', {'marker': 'o', 'color': '#168aad', **_LINE})]}],
+    },
+    'bp': {
+        'figsize': (11,5), 'grid': (1,1), 'title_size': 14,
+        'panels': [{'title': '💉 Blood Pressure Trend', 'ylabel': 'BP (mmHg)', 'legend': True,
+                    'lines': [('BP_Systolic', {'marker': 'o', 'c': '#22577a', 'label': 'Systolic', **_LINE}),
+                              ('BP_Diastolic', {'marker': 's', 'c': '#91c788', 'label': 'Diastolic', **_LINE})]}],
+    },
+    'temp_o2': {
+        'figsize': (11,5), 'grid': (1,1), 'title_size': 14,
+        'panels': [{'title': '🌡️ Temperature & Oxygen Saturation', 'ylabel': 'Temperature (F)',
+                    'ycolor': '#ffa502',
+                    'lines': [('Temp', {'color': '#ffa502', 'marker': 'v', 'label': 'Temperature (F)', **_LINE})],
+                    'bars': ('O2Sat', 'Oxygen Saturation (%)', {'color': '#38a3a5', 'alpha': 0.3, 'linewidth': 6})}],
+    },
+    'glucose': {
+        'figsize': (11,5), 'grid': (1,1), 'title_size': 14,
+        'panels': [{'title': '🍬 Glucose Level Trend', 'ylabel': 'Glucose (mg/dL)',
+                    'lines': [('Glucose', {'marker': 'p', 'color': '#ff6f3c', **_LINE})]}],
+    },
+}
+# The basic app's Visualize: the overview with O2Sat bars behind the temperature line
+_OVERVIEW_PANELS = CHART_SPECS['overview']['panels']
+CHART_SPECS['basic_overview'] = {
+    **CHART_SPECS['overview'],
+    'panels': _OVERVIEW_PANELS[:2] + [
+        {**_OVERVIEW_PANELS[2], 'bars': ('O2Sat', None, {'color': '#38a3a5', 'alpha': 0.25, 'linewidth': 6})},
+    ] + _OVERVIEW_PANELS[3:],
+}
+
+
+class BlitChart:
+    """A figure whose data artists are animated: redraws blit them over a cached background
+
+    Subclasses draw on self.fig and list their data artists in animated_artists().
+    """
+
+    def __init__(self, figsize, blit=True):
+        self.blit = blit
+        self.fig = Figure(figsize=figsize, dpi=95)
+        self._background = None
+        self._cid = None
+
+    def animated_artists(self):
+        return []
+
+    def attach(self):
+        """Call once the figure has a GUI canvas: recapture the blit background on every full draw"""
+        if self.blit and self._cid is None:
+            self._cid = self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.animated_artists():
+            self.fig.draw_artist(artist)
+
+    def snapshot(self):
+        """Copy of the canvas pixels as last drawn (height x width x RGBA)"""
+        return np.asarray(self.fig.canvas.buffer_rgba()).copy()
+
+    def show_image(self, image, full=False):
+        """Put a snapshot() on the canvas without drawing; False if it does not fit the canvas size
+
+        Call after set_data() with the same readings, so later redraws show the
+        same thing; full (set_data's return value) drops the blit background.
+        """
+        canvas = self.fig.canvas
+        buffer = np.asarray(canvas.get_renderer().buffer_rgba())
+        if buffer.shape != image.shape:
+            return False
+        buffer[...] = image
+        if full:
+            self._background = None
+        canvas.blit(self.fig.bbox)
+        return True
+
+    def refresh(self, full=False):
+        """Redraw the canvas: blit only the data artists unless a full draw is needed"""
+        canvas = self.fig.canvas
+        if not self.blit or full or self._background is None:
+            canvas.draw()
+            return
+        canvas.restore_region(self._background)
+        for artist in self.animated_artists():
+            self.fig.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+
+
+class VitalsChart(BlitChart):
+    """One persistent figure of a chart kind whose artists are updated in place
+
+    With blit=False the artists are ordinary (not animated), which is what
+    headless rendering with savefig() needs.
+    """
+
+    def __init__(self, kind, blit=True):
+        spec = CHART_SPECS[kind]
+        super().__init__(spec['figsize'], blit)
+        self.kind = kind
+        self.lines = []
+        self.bars = []
+        self.panels = []
+        axes = self.fig.subplots(*spec['grid'], squeeze=False).ravel()
+        if len(axes) > 1:
+            self.fig.subplots_adjust(hspace=0.3, wspace=0.25, top=0.94)
+        for ax, panel in zip(axes, spec['panels']):
+            title_color = {'color': '#168aad'} if len(axes) == 1 else {}
+            ax.set_title(panel['title'], fontsize=spec['title_size'], fontweight='bold', **title_color)
+            if 'ylabel' in panel:
+                ax.set_xlabel('Date', fontweight='bold')
+                ax.set_ylabel(panel['ylabel'], fontweight='bold', color=panel.get('ycolor', 'black'))
+            if 'ycolor' in panel:
+                ax.tick_params(axis='y', labelcolor=panel['ycolor'])
+            locator = AutoDateLocator()
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+            ax.tick_params(axis='x', labelrotation=25)
+            ax.grid(True, alpha=0.3, linestyle='--')
+            metrics = []
+            lines = []
+            for metric, style in panel['lines']:
+                line, = ax.plot([], [], animated=blit, **style)
+                self.lines.append((metric, line))
+                lines.append((metric, line, style.get('marker', 'None')))
+                metrics.append(metric)
+            if panel.get('legend'):
+                ax.legend(fontsize=11 if len(axes) == 1 else None)
+            bars = None
+            if 'bars' in panel:
+                metric, ylabel, style = panel['bars']
+                twin = ax.twinx()
+                bars = (metric, twin.vlines([], [], [], animated=blit, **style))
+                if ylabel:
+                    twin.set_ylabel(ylabel, color=style['color'], fontweight='bold')
+                twin.tick_params(axis='y', labelcolor=style['color'])
+                twin.set_ylim(*DISPLAY_RANGES[metric])
+                self.bars.append(bars)
+            self.panels.append((ax, metrics, lines, bars))
+        self.title = None
+        if spec.get('suptitle'):
+            self.title = self.fig.suptitle('', fontsize=15, weight='bold', color='#168aad', animated=blit)
+
+    def animated_artists(self):
+        artists = [line for _, line in self.lines] + [bars for _, bars in self.bars]
+        return artists + ([self.title] if self.title is not None else [])
+
+    def limits(self):
+        """Axes limits of every panel; part of what a snapshot() depends on"""
+        return tuple((ax.get_xlim(), ax.get_ylim()) for ax, _, _, _ in self.panels)
+
+    def copy_limits(self, other):
+        """Start from other's axes limits, so the next set_data() widens them the same way"""
+        for (ax, _, _, _), (src, _, _, _) in zip(self.panels, other.panels):
+            ax.set_xlim(src.get_xlim())
+            ax.set_ylim(src.get_ylim())
+            ax.set_autoscaley_on(src.get_autoscaley_on())
+
+    def set_data(self, df, span=None, title=None):
+        """Point the existing artists at df's readings; returns True if the axes limits changed
+
+        Each panel is reduced to a min/max envelope of its width in pixels,
+        always keeping readings that break an alert rule.
+        """
+        df = engine.float_vitals(df)
+        x = date2num(df['Date'].to_numpy())
+        if len(x) > 1 and (x[1:] < x[:-1]).any():
+            # Several patients (PatientIndex order): the envelope needs one time-ordered series
+            order = np.argsort(x, kind='stable')
+            df, x = df.iloc[order], x[order]
+        for ax, metrics, lines, bars in self.panels:
+            shown = metrics + ([bars[0]] if bars else [])
+            series = [df[m].to_numpy() for m in shown]
+            keep = np.zeros(len(x), dtype=bool)
+            for metric, y in zip(shown, series):
+                keep |= engine.violation_mask(y, metric)
+            idx = downsample.downsample_indices(x, series, max(int(ax.bbox.width), 50), keep=keep)
+            px = x[idx]
+            for metric, line, marker in lines:
+                line.set_data(px, df[metric].to_numpy()[idx])
+                line.set_marker(marker if len(idx) <= MARKER_LIMIT else 'None')
+            if bars:
+                y = df[bars[0]].to_numpy()[idx]
+                known = ~np.isnan(y)
+                tops = np.column_stack([px[known], y[known]])
+                bottoms = np.column_stack([px[known], np.zeros(known.sum())])
+                bars[1].set_segments(np.stack([bottoms, tops], axis=1))
+        if self.title is not None:
+            self.title.set_text(title or f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}")
+        return self._update_limits(df, x, span)
+
+    def _update_limits(self, df, x, span):
+        changed = False
+        if span is not None:
+            lo, hi = date2num(np.asarray(span, dtype='datetime64[us]'))
+        elif len(x):
+            lo, hi = x.min(), x.max()
+        else:
+            lo, hi = 0.0, 1.0
+        if lo == hi:
+            lo, hi = lo - 0.5, hi + 0.5
+        pad = (hi - lo) * 0.02
+        for ax, metrics, _, _ in self.panels:
+            xlim = (lo - pad, hi + pad)
+            if tuple(ax.get_xlim()) != xlim:
+                ax.set_xlim(*xlim)
+                changed = True
+            ylim = (min(DISPLAY_RANGES[m][0] for m in metrics), max(DISPLAY_RANGES[m][1] for m in metrics))
+            if ax.get_autoscaley_on():
+                ax.set_autoscaley_on(False)
+            else:
+                ylim = (min(ylim[0], ax.get_ylim()[0]), max(ylim[1], ax.get_ylim()[1]))
+            values = df[metrics].to_numpy().ravel()
+            values = values[~np.isnan(values)]
+            if len(values):
+                margin = (ylim[1] - ylim[0]) * 0.05
+                if values.min() < ylim[0]:
+                    ylim = (values.min() - margin, ylim[1])
+                if values.max() > ylim[1]:
+                    ylim = (ylim[0], values.max() + margin)
+            if tuple(ax.get_ylim()) != ylim:
+                ax.set_ylim(*ylim)
+                changed = True
+        return changed
+
+
+COHORT_PANELS = [
+    ('HeartRate', 'Heart Rate'), ('BP_Systolic', 'Systolic BP'), ('BP_Diastolic', 'Diastolic BP'),
+    ('Temp', 'Temperature'), ('Glucose', 'Glucose'), ('O2Sat', 'O2 Saturation'),
+]
+BAND_COLOR = '#168aad'
+# One colour per overlaid patient; the overlay holds at most this many
+OVERLAY_COLORS = ['#e63946', '#ff9f1c', '#6a4c93', '#2a9d8f', '#8ac926', '#e76f51', '#1d3557', '#ff006e']
+MAX_OVERLAY = len(OVERLAY_COLORS)
+
+
+class CohortChart(BlitChart):
+    """Per-day population percentile bands of each vital with patients' readings drawn over them
+
+    The bands are ordinary artists, so changing them needs a full draw; the
+    patient lines and their legend are animated, so adding or removing a
+    patient only blits unless its readings fall outside the axes.
+    """
+
+    kind = 'cohort'
+
+    def __init__(self, blit=True):
+        super().__init__((12,9), blit)
+        self.bands = None
+        self.band_artists = []
+        # What the overlaid lines were drawn from (set by the app: data version, date range)
+        self.lines_key = None
+        self.patients = {}
+        self.legend = None
+        axes = self.fig.subplots(3, 2, squeeze=False).ravel()
+        self.fig.subplots_adjust(hspace=0.45, wspace=0.2, top=0.9, bottom=0.07)
+        self.panels = []
+        for ax, (metric, title) in zip(axes, COHORT_PANELS):
+            ax.set_title(title, fontsize=11, fontweight='bold')
+            ax.set_ylabel(engine.UNITS[metric])
+            locator = AutoDateLocator()
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+            ax.grid(True, alpha=0.3, linestyle='--')
+            ax.set_ylim(*DISPLAY_RANGES[metric])
+            self.panels.append((ax, metric))
+        self.title = self.fig.suptitle('', fontsize=14, weight='bold', color='#168aad', y=0.99)
+
+    def animated_artists(self):
+        artists = [line for lines in self.patients.values() for line in lines]
+        return artists + ([self.legend] if self.legend is not None else [])
+
+    def set_bands(self, bands, patients):
+        """Draw a monitor_cohort.daily_bands() frame (needs a full draw); the y-axes restart from the bands"""
+        for artist in self.band_artists:
+            artist.remove()
+        self.band_artists = []
+        self.bands = bands
+        # Each day's percentiles are drawn at its midday
+        x = date2num((bands.index + pd.Timedelta(hours=12)).to_numpy())
+        for ax, metric in self.panels:
+            p5, p25, p50, p75, p95 = (bands[(metric, p)].to_numpy() for p in (5, 25, 50, 75, 95))
+            self.band_artists += [
+                ax.fill_between(x, p5, p95, color=BAND_COLOR, alpha=0.12, linewidth=0, label='p5-p95'),
+                ax.fill_between(x, p25, p75, color=BAND_COLOR, alpha=0.28, linewidth=0, label='p25-p75'),
+                ax.plot(x, p50, color=BAND_COLOR, linewidth=1.5, linestyle='--', label='Median')[0],
+            ]
+            lo, hi = DISPLAY_RANGES[metric]
+            if len(x) and not np.isnan(p5).all():
+                lo, hi = min(lo, np.nanmin(p5)), max(hi, np.nanmax(p95))
+            ax.set_ylim(lo, hi)
+        self.title.set_text(f"Cohort: {patients} patients, {len(bands)} days (bands p5-p95, p25-p75, median)")
+
+    def set_span(self, span):
+        """Show the dates of span (start, stop); returns True if the x-axes changed"""
+        lo, hi = date2num(np.asarray(span, dtype='datetime64[us]'))
+        if lo == hi:
+            lo, hi = lo - 0.5, hi + 0.5
+        pad = (hi - lo) * 0.02
+        xlim = (lo - pad, hi + pad)
+        changed = False
+        for ax, _ in self.panels:
+            if tuple(ax.get_xlim()) != xlim:
+                ax.set_xlim(*xlim)
+                changed = True
+        return changed
+
+    def add_patient(self, patient_id, df, label=None):
+        """Overlay one patient's readings; returns True if a y-axis had to widen (full draw needed)"""
+        self.remove_patient(patient_id)
+        used = {line.get_color() for lines in self.patients.values() for line in lines[:1]}
+        color = next((c for c in OVERLAY_COLORS if c not in used), OVERLAY_COLORS[len(self.patients) % MAX_OVERLAY])
+        df = engine.float_vitals(df)
+        x = date2num(df['Date'].to_numpy())
+        lines = []
+        widened = False
+        for ax, metric in self.panels:
+            y = df[metric].to_numpy()
+            idx = downsample.downsample_indices(x, [y], max(int(ax.bbox.width), 50),
+                                                keep=engine.violation_mask(y, metric))
+            line, = ax.plot(x[idx], y[idx], color=color, linewidth=1.6, animated=self.blit,
+                            marker='o' if len(idx) <= MARKER_LIMIT else 'None', markersize=3,
+                            label=label or patient_id)
+            lines.append(line)
+            known = y[~np.isnan(y)]
+            if len(known):
+                lo, hi = ax.get_ylim()
+                margin = (hi - lo) * 0.05
+                if known.min() < lo or known.max() > hi:
+                    ax.set_ylim(min(lo, known.min() - margin), max(hi, known.max() + margin))
+                    widened = True
+        self.patients[patient_id] = lines
+        self._update_legend()
+        return widened
+
+    def remove_patient(self, patient_id):
+        lines = self.patients.pop(patient_id, None)
+        if lines is not None:
+            for line in lines:
+                line.remove()
+            self._update_legend()
+
+    def clear_patients(self):
+        for patient_id in list(self.patients):
+            self.remove_patient(patient_id)
+
+    def _update_legend(self):
+        if self.legend is not None:
+            self.legend.remove()
+            self.legend = None
+        if self.patients:
+            handles = [lines[0] for lines in self.patients.values()]
+            self.legend = self.fig.legend(handles=handles, loc='upper center', bbox_to_anchor=(0.5, 0.96),
+                                          ncol=min(len(handles), 4), fontsize=9, frameon=False)
+            self.legend.set_animated(self.blit)
+
+
+def offscreen_chart(kind, like=None):
+    """Non-blitting chart on an Agg canvas, sized like the chart `like` so its snapshots fit it"""
+    chart = VitalsChart(kind, blit=False)
+    FigureCanvasAgg(chart.fig)
+    if like is not None:
+        chart.fig.set_dpi(like.fig.dpi)
+        chart.fig.set_size_inches(like.fig.get_size_inches())
+    return chart
+
+
+class ImageCache:
+    """LRU of chart snapshots bounded by their total size in bytes
+
+    Keys are whatever identifies a rendering (patient, chart kind, date range,
+    data version, pixel size); the least recently used images are dropped
+    once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes=IMAGE_CACHE_MB * 1024**2):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.prerendered = self.prerender_hits = 0
+        self._images = OrderedDict()
+        self._ahead = set()
+
+    def __len__(self):
+        return len(self._images)
+
+    def __contains__(self, key):
+        return key in self._images
+
+    def get(self, key):
+        image = self._images.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self._images.move_to_end(key)
+        self.hits += 1
+        if key in self._ahead:
+            self._ahead.discard(key)
+            self.prerender_hits += 1
+        return image
+
+    def put(self, key, image, prerendered=False):
+        if image.nbytes > self.max_bytes:
+            return
+        old = self._images.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self._images[key] = image
+        self.nbytes += image.nbytes
+        if prerendered:
+            self.prerendered += 1
+            self._ahead.add(key)
+        while self.nbytes > self.max_bytes:
+            dropped, image = self._images.popitem(last=False)
+            self._ahead.discard(dropped)
+            self.nbytes -= image.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self._images.clear()
+        self._ahead.clear()
+        self.nbytes = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats_line(self):
+        return (f"Chart cache: {len(self)} images, {self.nbytes / 1024**2:.1f}/{self.max_bytes / 1024**2:.0f} MiB | "
+                f"hits {self.hits}, misses {self.misses} ({self.hit_rate():.0%}) | "
+                f"pre-rendered {self.prerendered} ({self.prerender_hits} used) | evicted {self.evictions}")
+
+
+def build_chart(kind, df, span=None):
+    """Stand-alone (non-blitting) figure of one chart kind, e.g. for headless export"""
+    chart = VitalsChart(kind, blit=False)
+    chart.set_data(df, span=span)
+    return chart.fig
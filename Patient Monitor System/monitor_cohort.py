@@ -0,0 +1,38 @@
+"""
+Patient Health Monitoring System - Cohort Percentile Bands
+Per-day population percentiles (p5/p25/median/p75/p95) of every vital across
+all patients, the background a patient's readings are compared against in the
+cohort chart.
+
+The bands are one vectorized groupby-quantile over the whole frame. They only
+change with the data, so the app computes them once per data version and
+overlaying another patient on the cohort chart only adds that patient's line.
+"""
+import numpy as np
+import pandas as pd
+
+import monitor_engine as engine
+import monitor_profile as profile
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@profile.timed('cohort_bands')
+def daily_bands(df, metrics=None, percentiles=PERCENTILES):
+    """Frame indexed by Day with (metric, percentile) columns; missing readings are skipped
+
+    Days on which a vital was never recorded are NaN for it.
+    """
+    metrics = list(metrics or engine.NUM_COLS)
+    columns = pd.MultiIndex.from_product([metrics, list(percentiles)], names=['metric', 'percentile'])
+    if df.empty:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='Day'), dtype='float64')
+    values = pd.DataFrame({m: df[m].to_numpy(dtype='float64', na_value=np.nan) for m in metrics})
+    days = pd.DatetimeIndex(df['Date'].to_numpy()).floor('D')
+    levels = [p / 100 for p in percentiles]
+    bands = values.groupby(days).quantile(levels).unstack()
+    bands = bands.rename(columns=dict(zip(levels, percentiles)), level=1)
+    bands = bands[columns]
+    bands.columns = columns
+    bands.index.name = 'Day'
+    return bands
@@ -0,0 +1,225 @@
+"""
+Patient Health Monitoring System - Partitioned Datasets
+Opens a directory of vitals CSVs (e.g. one export per day per unit) as one
+dataset. A manifest records each file's date range and patient IDs, so a query
+for some patients or dates only reads the partitions that can contain them, and
+the selected partitions are parsed in parallel worker processes.
+
+The manifest is kept in a JSON sidecar in the directory and refreshed only for
+files whose mtime or size changed. Parsed partitions also go through the
+per-file Feather cache (monitor_cache) when pyarrow is installed.
+"""
+import glob
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import monitor_cache as cache
+import monitor_engine as engine
+import monitor_ingest as ingest
+
+MANIFEST_NAME = '.patient_monitor_manifest.json'
+# Bump when the manifest layout changes so older sidecars are rebuilt
+MANIFEST_VERSION = 2
+# Below this much CSV text to parse, starting worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 32 * 1024**2
+
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def read_partition(path):
+    """Cleaned, compacted frame of one partition file, through the Feather cache"""
+    key = cache.cache_key(path)
+    df = cache.load_cached(path, key)
+    if df is None:
+        df, _ = ingest.stream_csv(path)
+        cache.save_cache(path, df, key)
+    return df
+
+
+def _scan_partition(path):
+    """Manifest entry of one file: row count, date range and patient IDs with their names"""
+    df = pd.read_csv(path, usecols=['PatientID', 'Name', 'Date'], dtype=str)
+    dates = pd.to_datetime(df['Date'], format=engine.DATE_FORMAT, errors='coerce')
+    df = df[dates.notna() & df['PatientID'].notna()]
+    dates = dates[df.index]
+    names = df.drop_duplicates('PatientID').sort_values('PatientID')
+    mtime_ns, size = _file_stamp(path)
+    return {'mtime_ns': mtime_ns, 'size': size, 'rows': len(df),
+            'start': dates.min().isoformat() if len(df) else None,
+            'end': dates.max().isoformat() if len(df) else None,
+            'patients': names['PatientID'].tolist(),
+            'names': names['Name'].fillna('').tolist()}
+
+
+def _load_partition(path, patient_ids, start, end):
+    """Worker process: one partition reduced to the requested patients and dates"""
+    df = read_partition(path)
+    keep = np.ones(len(df), dtype=bool)
+    if patient_ids is not None:
+        keep &= df['PatientID'].isin(patient_ids).to_numpy()
+    if start is not None:
+        keep &= (df['Date'] >= start).to_numpy()
+    if end is not None:
+        keep &= (df['Date'] <= end).to_numpy()
+    return df if keep.all() else df[keep].reset_index(drop=True)
+
+
+def _pool(n_jobs, workers):
+    workers = min(n_jobs, workers or os.cpu_count() or 1)
+    # spawn: forking a process that runs Tk and worker threads can deadlock
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def run_parallel(fn, jobs, workers=None, progress=None, text=None, parallel=True, done=0, total=None):
+    """{key: fn(*args)} for jobs {key: args}, in worker processes when parallel and worthwhile"""
+    results = {}
+    total = len(jobs) if total is None else total
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if not parallel or workers <= 1:
+        for i, (key, args) in enumerate(jobs.items(), done + 1):
+            results[key] = fn(*args)
+            if progress is not None:
+                progress(i, total, text)
+        return results
+    with _pool(len(jobs), workers) as pool:
+        futures = {pool.submit(fn, *args): key for key, args in jobs.items()}
+        try:
+            for i, future in enumerate(as_completed(futures), done + 1):
+                results[futures[future]] = future.result()
+                if progress is not None:
+                    progress(i, total, text)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return results
+
+
+class PartitionedDataset:
+    """A directory of vitals CSVs queried as one frame
+
+    progress(done, total, text) callbacks may raise (e.g. TaskCancelled) to stop
+    a scan or load; pending partitions are then cancelled.
+    """
+
+    def __init__(self, folder, workers=None):
+        self.folder = os.path.abspath(folder)
+        self.workers = workers
+        self.manifest = {}
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.folder, MANIFEST_NAME)
+
+    def files(self):
+        paths = glob.glob(os.path.join(self.folder, '**', '*.csv'), recursive=True)
+        return sorted(os.path.relpath(p, self.folder) for p in paths)
+
+    def scan(self, progress=None):
+        """Load the manifest sidecar and re-scan only new or changed files; returns self"""
+        known = {}
+        try:
+            with open(self.manifest_path) as fh:
+                saved = json.load(fh)
+            if saved.get('version') == MANIFEST_VERSION:
+                known = saved['files']
+        except (OSError, ValueError, KeyError):
+            pass
+        manifest, stale = {}, {}
+        for name in self.files():
+            path = os.path.join(self.folder, name)
+            entry = known.get(name)
+            if entry is not None and (entry['mtime_ns'], entry['size']) == _file_stamp(path):
+                manifest[name] = entry
+            else:
+                stale[name] = (path,)
+        size = sum(_file_stamp(args[0])[1] for args in stale.values())
+        manifest.update(run_parallel(_scan_partition, stale, self.workers, progress, 'Scanning partitions',
+                                      parallel=size >= PARALLEL_MIN_BYTES))
+        self.manifest = dict(sorted(manifest.items()))
+        if stale or len(known) != len(manifest):
+            self._save_manifest()
+        return self
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + '.tmp'
+        try:
+            with open(tmp, 'w') as fh:
+                json.dump({'version': MANIFEST_VERSION, 'files': self.manifest}, fh)
+            os.replace(tmp, self.manifest_path)
+        except OSError:
+            pass
+
+    def partitions(self, patient_ids=None, start=None, end=None):
+        """Files that may hold readings of patient_ids within [start, end]"""
+        wanted = None if patient_ids is None else set(patient_ids)
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        names = []
+        for name, entry in self.manifest.items():
+            if not entry['rows']:
+                continue
+            if start is not None and pd.Timestamp(entry['end']) < start:
+                continue
+            if end is not None and pd.Timestamp(entry['start']) > end:
+                continue
+            if wanted is not None and wanted.isdisjoint(entry['patients']):
+                continue
+            names.append(name)
+        return names
+
+    def date_span(self):
+        entries = [e for e in self.manifest.values() if e['rows']]
+        if not entries:
+            return None
+        return (min(pd.Timestamp(e['start']) for e in entries), max(pd.Timestamp(e['end']) for e in entries))
+
+    def patient_ids(self):
+        return sorted({pid for entry in self.manifest.values() for pid in entry['patients']})
+
+    def patient_labels(self):
+        """'PatientID - Name' dropdown labels from the manifest, without reading any partition"""
+        names = {}
+        for entry in self.manifest.values():
+            for pid, name in zip(entry['patients'], entry['names']):
+                names.setdefault(pid, name)
+        return [f"{pid} - {names[pid]}" for pid in sorted(names)]
+
+    def records(self):
+        return sum(entry['rows'] for entry in self.manifest.values())
+
+    def load(self, patient_ids=None, start=None, end=None, progress=None):
+        """Readings of patient_ids (None = all) between start and end, from only the partitions needed"""
+        names = self.partitions(patient_ids, start, end)
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        ids = None if patient_ids is None else list(patient_ids)
+        jobs = {name: (os.path.join(self.folder, name), ids, start, end) for name in names}
+        # Cached partitions are memory-mapped in-process; only CSV parsing is worth farming out
+        cached = {name: args for name, args in jobs.items() if cache.is_cached(args[0])}
+        parse = {name: args for name, args in jobs.items() if name not in cached}
+        frames = run_parallel(_load_partition, cached, self.workers, progress, 'Loading partitions',
+                               parallel=False, total=len(jobs))
+        size = sum(self.manifest[name]['size'] for name in parse)
+        frames.update(run_parallel(_load_partition, parse, self.workers, progress, 'Loading partitions',
+                                    parallel=size >= PARALLEL_MIN_BYTES, done=len(cached), total=len(jobs)))
+        if not frames:
+            return engine.compact_dtypes(ingest.empty_frame())
+        return engine.concat_frames([frames[name] for name in names])
+
+    def summary_lines(self):
+        span = self.date_span()
+        lines = [f"Dataset: {os.path.basename(self.folder)}",
+                 f"Partitions: {len(self.manifest)} files",
+                 f"Patients: {len(self.patient_ids())}",
+                 f"Records: {self.records()}"]
+        if span is not None:
+            lines.append(f"Date range: {span[0].date()} to {span[1].date()}")
+        return lines
@@ -0,0 +1,534 @@
+"""
+Patient Health Monitoring System - Analytics Engine
+Headless load -> clean -> per-patient stats -> alerts pipeline.
+Shared by the Tkinter apps and the batch tools; imports no GUI or plotting code.
+"""
+import copy
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import monitor_profile as profile
+
+NUM_COLS = ['HeartRate', 'BP_Systolic', 'BP_Diastolic', 'Temp', 'Glucose', 'O2Sat']
+INT_COLS = ['HeartRate', 'BP_Systolic', 'BP_Diastolic', 'Glucose']
+INT16_MIN, INT16_MAX = -32768, 32767
+# Every reader parses dates with this, so the CLIs, apps and API keep the same rows
+DATE_FORMAT = 'ISO8601'
+UNITS = {'HeartRate': 'bpm', 'BP_Systolic': 'mmHg', 'BP_Diastolic': 'mmHg',
+         'Temp': 'F', 'Glucose': 'mg/dL', 'O2Sat': '%'}
+
+AlertRule = namedtuple('AlertRule', 'metric low high severity message')
+# A reading violates a rule when it is below low or above high (None = unbounded)
+ALERT_RULES = [
+    AlertRule('HeartRate', 55, 100, 'warning', 'Abnormal heart rate detected.'),
+    AlertRule('BP_Systolic', 105, 135, 'warning', 'Abnormal blood pressure detected.'),
+    AlertRule('BP_Diastolic', None, 90, 'warning', 'Abnormal blood pressure detected.'),
+    AlertRule('Temp', 96.5, 100.5, 'warning', 'Abnormal temperature readings.'),
+    AlertRule('Glucose', 65, 160, 'warning', 'Possible glucose issues detected.'),
+    AlertRule('O2Sat', 94, None, 'critical', 'Low O2 saturation detected.'),
+]
+ALERT_COLUMNS = ['PatientID', 'Name', 'Date', 'Metric', 'Value', 'Low', 'High', 'Severity', 'Message']
+
+
+def load_csv(file_path):
+    """Read a vitals CSV and return the cleaned, compacted frame"""
+    return compact_dtypes(clean_data(pd.read_csv(file_path)))
+
+
+def clean_data(df, date_format=DATE_FORMAT):
+    """Coerce dates/vitals and drop rows without a PatientID or Date"""
+    with profile.span('to_datetime', rows=len(df)):
+        df['Date'] = pd.to_datetime(df['Date'], format=date_format, errors='coerce')
+    with profile.span('to_numeric', rows=len(df)):
+        for col in NUM_COLS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+    df.dropna(subset=['PatientID', 'Date'], inplace=True)
+    return df
+
+
+@profile.timed('compact_dtypes')
+def compact_dtypes(df, categoricals=True):
+    """Memory-lean schema: categorical PatientID/Name, nullable Int16/Float32 vitals
+
+    Whole-number vitals that fit become Int16; anything else (Temp, O2Sat,
+    fractional readings) becomes Float32.
+    """
+    if categoricals:
+        for col in ('PatientID', 'Name'):
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+    for col in NUM_COLS:
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy(dtype='float64', na_value=np.nan)
+        known = values[~np.isnan(values)]
+        if col in INT_COLS and np.array_equal(known, np.round(known)) \
+                and (not len(known) or (known.min() >= INT16_MIN and known.max() <= INT16_MAX)):
+            df[col] = pd.array(values, dtype='Float64').astype('Int16')
+        else:
+            df[col] = pd.array(values, dtype='Float32')
+    return df
+
+
+def concat_rows(df, rows):
+    """Append rows to df, widening categorical columns so they stay categorical"""
+    df = df.copy(deep=False)
+    rows = rows.copy()
+    for col in ('PatientID', 'Name'):
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            cats = df[col].cat.categories.union(pd.Index(rows[col].dropna().unique()))
+            df[col] = df[col].cat.set_categories(cats)
+            rows[col] = pd.Categorical(rows[col], categories=cats)
+    return pd.concat([df, rows], ignore_index=True)
+
+
+def concat_frames(frames):
+    """Concatenate compacted frames into one, unioning the PatientID/Name categories"""
+    frames = [f for f in frames if not f.empty] or frames[:1]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    frames = [f.copy(deep=False) for f in frames]
+    for col in ('PatientID', 'Name'):
+        cats = pd.Index([])
+        for f in frames:
+            values = f[col].cat.categories if isinstance(f[col].dtype, pd.CategoricalDtype) else f[col].dropna().unique()
+            cats = cats.union(pd.Index(values))
+        for f in frames:
+            f[col] = pd.Categorical(f[col], categories=cats)
+    return compact_dtypes(pd.concat(frames, ignore_index=True))
+
+
+def float_vitals(df):
+    """Copy of df with vitals as float64/NaN, the form plotting libraries expect"""
+    df = df.copy()
+    for col in NUM_COLS:
+        if col in df.columns:
+            df[col] = df[col].to_numpy(dtype='float64', na_value=np.nan)
+    return df
+
+
+def memory_report(df):
+    """Bytes per row of df versus the same data as float64/int64 vitals and object strings"""
+    rows = max(len(df), 1)
+    after = df.memory_usage(deep=True, index=False).sum()
+    before = 8 * len(df) * (len(NUM_COLS) + 1)
+    for col in ('PatientID', 'Name'):
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            sizes = np.array([sys.getsizeof(str(c)) for c in series.cat.categories] + [0], dtype='int64')
+            before += int(sizes[series.cat.codes.to_numpy()].sum())
+        else:
+            before += int(series.astype(object).map(sys.getsizeof).sum())
+        before += 8 * len(df)
+    return {'rows': len(df), 'before': before / rows, 'after': after / rows}
+
+
+def memory_line(df):
+    mem = memory_report(df)
+    return f"Memory: {mem['after']:.1f} B/row (was {mem['before']:.1f} B/row uncompacted)"
+
+
+def patient_labels(df):
+    """Unique 'PatientID - Name' labels for the patient dropdown, built from the distinct pairs only"""
+    pairs = df[['PatientID', 'Name']].drop_duplicates()
+    return (pairs['PatientID'].astype(str) + ' - ' + pairs['Name'].astype(str)).tolist()
+
+
+def patient_frame(df, patient_id):
+    """Rows of a single patient"""
+    return df[df['PatientID'] == patient_id].copy()
+
+
+def _search_runs(dates, lo, hi, when, side='left'):
+    """First position in each sorted run dates[lo[i]:hi[i]] dated >= when (> when for side='right')
+
+    One binary search per run, all run in lockstep; when is one date or one per run.
+    """
+    lo, hi = lo.copy(), hi.copy()
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        probe = dates[np.minimum(mid, len(dates) - 1)]
+        before = active & ((probe <= when) if side == 'right' else (probe < when))
+        lo = np.where(before, mid + 1, lo)
+        hi = np.where(active & ~before, mid, hi)
+
+
+class PatientIndex:
+    """Vitals sorted by PatientID/Date with each patient's [start, stop) row range
+
+    Built once per load, so selecting a patient is a slice of its own rows
+    instead of a mask scan and copy of the whole frame, and per-patient
+    summaries are computed once and then served from cache. Each patient's
+    dates are sorted, so restricting to a date window is a binary search.
+    """
+
+    def __init__(self, df):
+        self._summaries = {}
+        self._build(df)
+
+    @profile.timed('index_build')
+    def _build(self, df):
+        ordered = df.reset_index(drop=True).sort_values(['PatientID', 'Date'], kind='stable')
+        self._set_frame(ordered.reset_index(drop=True), ordered.index.to_numpy())
+
+    def _set_frame(self, df, order):
+        # Row position in the unsorted input of every sorted row; lets caches aligned
+        # with the previous df be carried over after append()
+        self.order = order
+        self.df = df
+        self.dates = df['Date'].to_numpy()
+        ids = df['PatientID']
+        keys = ids.cat.codes.to_numpy() if isinstance(ids.dtype, pd.CategoricalDtype) else ids.to_numpy()
+        if len(keys):
+            bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+            starts = np.concatenate(([0], bounds))
+            stops = np.concatenate((bounds, [len(keys)]))
+        else:
+            starts = stops = np.array([], dtype='int64')
+        self.starts, self.stops = starts, stops
+        self.offsets = {pid: (int(a), int(b)) for pid, a, b in zip(ids.iloc[starts].to_numpy(), starts, stops)}
+
+    @profile.timed('index_append')
+    def append(self, rows):
+        """Merge newly arrived rows in memory; only the touched patients' cached summaries are dropped
+
+        Only the batch is sorted: each new row's place is a binary search of its
+        patient's run, and the indexed rows keep their order around the inserts.
+        """
+        if rows.empty:
+            return
+        rows = rows.reset_index(drop=True)
+        if self.df.empty:
+            self._build(concat_rows(self.df, rows))
+        else:
+            batch = rows.sort_values(['PatientID', 'Date'], kind='stable')
+            lo, hi = self._runs(batch['PatientID'])
+            # Each new row goes after the patient's readings dated at or before it
+            ins = _search_runs(self.dates, lo, hi, batch['Date'].to_numpy(dtype=self.dates.dtype), side='right')
+            n, m = len(self.df), len(batch)
+            order = np.empty(n + m, dtype='int64')
+            order[np.arange(n) + np.searchsorted(ins, np.arange(n), side='right')] = np.arange(n)
+            order[ins + np.arange(m)] = n + batch.index.to_numpy()
+            self._set_frame(concat_rows(self.df, rows).take(order).reset_index(drop=True), order)
+        touched = set(rows['PatientID'].unique())
+        for key in [k for k in self._summaries if k[0] in touched]:
+            del self._summaries[key]
+
+    def _runs(self, ids):
+        """[lo, hi) row range of each ID's patient; a new patient's range is empty, where its ID sorts to"""
+        ids = ids.to_numpy(dtype=object)
+        known = np.array(list(self.offsets), dtype=object)
+        if not len(known):
+            return np.zeros(len(ids), dtype='int64'), np.zeros(len(ids), dtype='int64')
+        k = np.searchsorted(known, ids)
+        run = np.minimum(k, len(known) - 1)
+        found = (k < len(known)) & (known[run] == ids)
+        lo = np.where(k < len(known), self.starts[run], len(self.df))
+        return lo, np.where(found, self.stops[run], lo)
+
+    def has_readings(self, rows):
+        """Mask of the rows whose patient already has a reading at exactly that Date"""
+        if self.df.empty:
+            return np.zeros(len(rows), dtype=bool)
+        lo, hi = self._runs(rows['PatientID'])
+        when = rows['Date'].to_numpy(dtype=self.dates.dtype)
+        at = _search_runs(self.dates, lo, hi, when)
+        return (at < hi) & (self.dates[np.minimum(at, len(self.dates) - 1)] == when)
+
+    def snapshot(self):
+        """Frozen view of the index as it is now, for a worker thread
+
+        append() rebinds df, dates and offsets instead of changing them in place,
+        so the snapshot keeps a consistent set while the live index grows.
+        """
+        frozen = copy.copy(self)
+        frozen._summaries = {}
+        return frozen
+
+    def __contains__(self, patient_id):
+        return patient_id in self.offsets
+
+    def patient_ids(self):
+        return list(self.offsets)
+
+    def bounds(self, patient_id, start=None, stop=None):
+        """[lo, hi) row positions of the patient's readings with start <= Date < stop"""
+        lo, hi = self.offsets.get(patient_id, (0, 0))
+        dates = self.dates[lo:hi]
+        if stop is not None:
+            hi = lo + int(np.searchsorted(dates, np.datetime64(stop), side='left'))
+        if start is not None:
+            lo = lo + int(np.searchsorted(dates, np.datetime64(start), side='left'))
+        return lo, max(lo, hi)
+
+    def rows(self, patient_id, start=None, stop=None):
+        """The patient's rows in [start, stop), date ordered (a slice, not a copy)"""
+        lo, hi = self.bounds(patient_id, start, stop)
+        return self.df.iloc[lo:hi]
+
+    def positions(self, start=None, stop=None):
+        """Row positions of every patient's readings in [start, stop), one binary search per patient"""
+        if start is None and stop is None:
+            return np.arange(len(self.df))
+        lo = self._search(start) if start is not None else self.starts
+        hi = self._search(stop) if stop is not None else self.stops
+        counts = np.maximum(hi - lo, 0)
+        # Concatenated ranges lo[i]..hi[i] without a Python-level arange per patient
+        return np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+    def _search(self, when):
+        """First row of every patient dated >= when"""
+        return _search_runs(self.dates, self.starts, self.stops, np.datetime64(when))
+
+    def window(self, start=None, stop=None):
+        """All patients' rows in [start, stop), still ordered by PatientID/Date"""
+        if start is None and stop is None:
+            return self.df
+        return self.df.iloc[self.positions(start, stop)]
+
+    def summary_lines(self, patient_id, start=None, stop=None, basic=False):
+        """Cached patient_summary_lines() for one patient and date window"""
+        key = (patient_id, start, stop, basic)
+        if key not in self._summaries:
+            rows = self.rows(patient_id, start, stop)
+            self._summaries[key] = patient_summary_lines(rows, basic) if len(rows) else [
+                f"Patient: {patient_id}", "No readings in the selected date range."]
+        return self._summaries[key]
+
+
+def _rule_bounds(rules):
+    lows = np.array([-np.inf if r.low is None else r.low for r in rules], dtype='float64')
+    highs = np.array([np.inf if r.high is None else r.high for r in rules], dtype='float64')
+    return lows, highs
+
+
+@profile.timed('find_alerts')
+def find_alerts(df, rules=ALERT_RULES):
+    """Every reading outside a rule's [low, high] band, for all patients at once
+
+    The rule metrics are evaluated as one (rows x rules) array comparison, and the
+    result holds one row per violation, ordered by patient, date and rule.
+    """
+    if df is None or df.empty or not rules:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+    values = df[[r.metric for r in rules]].to_numpy(dtype='float64', na_value=np.nan)
+    lows, highs = _rule_bounds(rules)
+    rows, hits = np.nonzero((values < lows) | (values > highs))
+    rule_tbl = pd.DataFrame(rules, columns=AlertRule._fields)
+    out = pd.DataFrame({
+        'PatientID': df['PatientID'].to_numpy()[rows],
+        'Name': df['Name'].to_numpy()[rows],
+        'Date': df['Date'].to_numpy()[rows],
+        'Metric': rule_tbl['metric'].to_numpy()[hits],
+        'Value': values[rows, hits],
+        'Low': rule_tbl['low'].to_numpy()[hits],
+        'High': rule_tbl['high'].to_numpy()[hits],
+        'Severity': rule_tbl['severity'].to_numpy()[hits],
+        'Message': rule_tbl['message'].to_numpy()[hits],
+    })
+    out['_rule'] = hits
+    out = out.sort_values(['PatientID', 'Date', '_rule'], kind='stable').drop(columns='_rule')
+    return out.reset_index(drop=True)
+
+
+def violation_mask(values, metric, rules=ALERT_RULES):
+    """Boolean mask of the readings of one metric that break any of its rules"""
+    values = np.asarray(values, dtype='float64')
+    mask = np.zeros(len(values), dtype=bool)
+    for rule in rules:
+        if rule.metric == metric:
+            lows, highs = _rule_bounds([rule])
+            mask |= (values < lows[0]) | (values > highs[0])
+    return mask
+
+
+def alert_messages(alerts, rules=ALERT_RULES):
+    """Distinct alert messages in rule order"""
+    seen = set(alerts['Message'])
+    return list(dict.fromkeys(r.message for r in rules if r.message in seen))
+
+
+def patient_alerts(df, rules=ALERT_RULES):
+    """Alert messages for the readings in df (one patient or more)"""
+    return alert_messages(find_alerts(df, rules), rules)
+
+
+def _stats_aggs():
+    aggs = {'Name': ('Name', 'first'), 'Records': ('Date', 'size'),
+            'FirstDate': ('Date', 'min'), 'LastDate': ('Date', 'max')}
+    for col in NUM_COLS:
+        aggs[f'{col}_mean'] = (col, 'mean')
+        aggs[f'{col}_min'] = (col, 'min')
+        aggs[f'{col}_max'] = (col, 'max')
+    return aggs
+
+
+def patient_stats(df):
+    """Per-patient record count, date span and mean/min/max of every vital in one groupby pass"""
+    return df.groupby('PatientID', sort=True, observed=True).agg(**_stats_aggs())
+
+
+@profile.timed('ward_overview')
+def ward_overview(df, rules=ALERT_RULES):
+    """patient_stats() plus each patient's latest values ({col}_last) and active alert count
+
+    Latest values come from the same groupby pass; df must be in date order
+    within each patient (PatientIndex.df is). Alerts counts the rules the
+    latest values break, not every violation in the patient's history.
+    """
+    aggs = _stats_aggs()
+    for col in NUM_COLS:
+        aggs[f'{col}_last'] = (col, 'last')
+    overview = df.groupby('PatientID', sort=True, observed=True).agg(**aggs)
+    overview.insert(4, 'Alerts', active_alerts(overview, rules))
+    return overview
+
+
+def active_alerts(overview, rules=ALERT_RULES):
+    """Number of rules each patient's latest values ({col}_last columns) break"""
+    counts = np.zeros(len(overview), dtype='int64')
+    for rule in rules:
+        counts += violation_mask(overview[f'{rule.metric}_last'].to_numpy(dtype='float64', na_value=np.nan),
+                                 rule.metric, [rule])
+    return counts
+
+
+def stats_alerts(stats, rules=ALERT_RULES):
+    """Alert messages per patient, evaluated on the patient_stats() min/max columns"""
+    out = {pid: [] for pid in stats.index}
+    for rule in rules:
+        hit = np.zeros(len(stats), dtype=bool)
+        if rule.low is not None:
+            hit |= (stats[f'{rule.metric}_min'] < rule.low).to_numpy(dtype=bool, na_value=False)
+        if rule.high is not None:
+            hit |= (stats[f'{rule.metric}_max'] > rule.high).to_numpy(dtype=bool, na_value=False)
+        for pid in stats.index[hit]:
+            if rule.message not in out[pid]:
+                out[pid].append(rule.message)
+    return out
+
+
+def alert_lines(alerts, limit=None):
+    """One line per violating reading, most recent first"""
+    lines = []
+    recent = alerts.iloc[::-1]
+    for row in (recent if limit is None else recent.head(limit)).itertuples(index=False):
+        bound = f"< {row.Low:g}" if pd.notna(row.Low) and row.Value < row.Low else f"> {row.High:g}"
+        lines.append(f"  [{row.Severity.upper()}] {pd.Timestamp(row.Date).date()} {row.Metric} {row.Value:g} ({bound})")
+    if limit is not None and len(alerts) > limit:
+        lines.append(f"  ... {len(alerts) - limit} more")
+    return lines
+
+
+def ward_alert_lines(alerts, per_patient=5):
+    """Ward screening report: violating readings grouped by patient"""
+    if alerts.empty:
+        return ['No alerts for any patient.']
+    lines = []
+    for pid, group in alerts.groupby('PatientID', sort=True, observed=True):
+        lines.append(f"{pid} - {group['Name'].iloc[0]} | {len(group)} alert readings | "
+                     + ', '.join(alert_messages(group)))
+        lines.extend(alert_lines(group, limit=per_patient))
+    return lines
+
+
+def _mean(series):
+    value = series.mean()
+    return np.nan if pd.isna(value) else value
+
+
+def format_value(value):
+    """A reading as report text: 'N/A' when missing, else the shortest form of the number"""
+    return 'N/A' if pd.isna(value) else f'{value:g}'
+
+
+def summary_lines(df, basic=False):
+    """File-wide summary shown after upload; basic uses the basic app's condensed layout"""
+    lines = [f"Patients: {df['PatientID'].nunique()}"]
+    try:
+        lines.append(f"Date range: {df['Date'].min().date()} to {df['Date'].max().date()}")
+    except Exception:
+        lines.append("Date range: N/A")
+    lines.append(f"Records: {len(df)}")
+    if basic:
+        lines.append(f"Avg HR: {_mean(df['HeartRate']):.1f} | BP sys/diast: {_mean(df['BP_Systolic']):.1f}/{_mean(df['BP_Diastolic']):.1f}")
+        lines.append(f"Avg Temp: {_mean(df['Temp']):.1f} F | Avg Glucose: {_mean(df['Glucose']):.1f} mg/dL")
+        lines.append(f"Avg O2Sat: {_mean(df['O2Sat']):.1f} %")
+    else:
+        lines.append(f"Avg HR: {_mean(df['HeartRate']):.1f}")
+        lines.append(f"Avg BP: {_mean(df['BP_Systolic']):.1f}/{_mean(df['BP_Diastolic']):.1f}")
+        lines.append(f"Avg Temp: {_mean(df['Temp']):.1f} F")
+        lines.append(f"Avg Glucose: {_mean(df['Glucose']):.1f} mg/dL")
+        lines.append(f"Avg O2Sat: {_mean(df['O2Sat']):.1f}%")
+    lines.append(memory_line(df))
+    return lines
+
+
+def patient_summary_lines(df, basic=False):
+    """Summary of one patient's readings; basic uses the basic app's labels"""
+    lines = [f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}"]
+    try:
+        days = df['Date'].dt.date.nunique()
+    except Exception:
+        days = 'N/A'
+    lines.append(f"Records: {len(df)} | Days: {days}")
+    lines.append(f"Avg HR: {_mean(df['HeartRate']):.1f}")
+    lines.append(f"{'BP sys/diast' if basic else 'BP'}: {_mean(df['BP_Systolic']):.1f}/{_mean(df['BP_Diastolic']):.1f}")
+    lines.append(f"Avg Temp: {_mean(df['Temp']):.1f} F")
+    lines.append(f"Avg Glucose: {_mean(df['Glucose']):.1f} mg/dL")
+    lines.append(f"Avg O2Sat: {_mean(df['O2Sat']):.1f}%")
+    return lines
+
+
+def report_lines(df, extra=None, basic=False):
+    """Text of the PATIENT HEALTH ANALYSIS REPORT for one patient; extra lines go before the closing rule
+
+    basic uses the basic app's labels (O2Sat, Latest Data) and adds its glucose/O2 extremes line.
+    """
+    o2 = 'O2Sat' if basic else 'O2'
+    latest_label = 'Latest Data' if basic else 'Latest'
+    results = []
+    results.append('='*75)
+    results.append(f"{'PATIENT HEALTH ANALYSIS REPORT':^75}")
+    results.append('='*75+'\n')
+    results.append(f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}")
+    results.append(f"Records: {len(df)}")
+    try:
+        results.append(f"Date range: {df['Date'].min().date()} to {df['Date'].max().date()}")
+    except Exception:
+        results.append("Date range: N/A")
+    results.append('-'*50)
+
+    # Averages
+    means = [f"{_mean(df[c]):.1f} {UNITS[c]}" for c in NUM_COLS]
+    results.append(f"Averages: HR {means[0]}, BP {means[1]}/{means[2]}, Temp {means[3]}, Glucose {means[4]}, {o2} {means[5]}")
+
+    # Alerts
+    alerts = find_alerts(df)
+    messages = alert_messages(alerts)
+    results.append('-'*50)
+    results.append('Alerts/Risks: '+ (', '.join(messages) if messages else 'None'))
+    if not alerts.empty:
+        results.append(f"Triggering readings ({len(alerts)}):")
+        results.extend(alert_lines(alerts, limit=15))
+
+    # Latest reading
+    try:
+        latest = df.loc[df['Date'].idxmax()]
+        results.append(f"{latest_label}: {latest['Date'].date()} | HR {format_value(latest['HeartRate'])} | BP {format_value(latest['BP_Systolic'])}/{format_value(latest['BP_Diastolic'])} | Temp {format_value(latest['Temp'])} | Glucose {format_value(latest['Glucose'])} | {o2} {format_value(latest['O2Sat'])}")
+    except Exception:
+        results.append(f"{latest_label}: N/A")
+    if basic:
+        results.append(f"Max glucose: {format_value(df['Glucose'].max())} mg/dL | Min O2Sat: {format_value(df['O2Sat'].min())}%")
+    results.extend(extra or [])
+    results.append('='*75+'\n')
+    return results
@@ -0,0 +1,142 @@
+"""
+Patient Health Monitoring System - Synthetic Vitals
+Generates vitals CSVs in the patient_health_data.csv schema at any size, for
+benchmarks and load testing.
+
+Every patient gets a personal baseline per vital drawn around adult population
+norms, slow drift, a daily heart-rate/temperature rhythm and per-reading noise.
+A small share of readings are replaced by clinically abnormal values (the
+injected anomalies) and some are left blank, as in real exports. Patients are
+generated and written in blocks, so 10M-row files need little memory.
+
+Usage:
+    python monitor_generate.py vitals_1m.csv --patients 1000 --days 42 --per-day 24
+    python monitor_generate.py vitals_10k.csv --rows 10000 --seed 7
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import monitor_engine as engine
+
+# Population mean and between-patient SD of each patient's baseline, and the within-patient reading SD
+BASELINES = {
+    'HeartRate': (75, 8, 6),
+    'BP_Systolic': (120, 7, 7),
+    'BP_Diastolic': (79, 5, 5),
+    'Temp': (98.4, 0.3, 0.35),
+    'Glucose': (105, 12, 15),
+    'O2Sat': (97.5, 0.8, 0.9),
+}
+# Abnormal (low, high) ranges an injected anomaly is drawn from
+ANOMALY_RANGES = {
+    'HeartRate': ((32, 48), (125, 175)),
+    'BP_Systolic': ((70, 95), (165, 210)),
+    'BP_Diastolic': ((40, 50), (98, 125)),
+    'Temp': ((94.0, 95.8), (101.5, 104.5)),
+    'Glucose': ((38, 60), (210, 420)),
+    'O2Sat': ((78.0, 90.0), (78.0, 90.0)),
+}
+DECIMALS = {'Temp': 1, 'O2Sat': 1}
+ANOMALY_RATE = 0.002
+MISSING_RATE = 0.001
+# Patients generated (and written) per block
+BLOCK_PATIENTS = 2000
+
+
+def patient_block(first, count, days, per_day, start, rng, anomaly_rate=ANOMALY_RATE, missing_rate=MISSING_RATE,
+                  id_width=3):
+    """Readings of patients first..first+count-1, ordered by patient then time"""
+    n = days * per_day
+    patient = np.repeat(np.arange(first, first + count), n)
+    step = 86400 // per_day
+    offsets = np.tile(np.arange(n, dtype='int64') * step, count)
+    if per_day > 1:
+        offsets += rng.integers(0, max(step // 4, 1), len(offsets))
+    dates = np.datetime64(pd.Timestamp(start).normalize(), 's') + offsets.astype('timedelta64[s]')
+    hour = (offsets % 86400) / 3600.0
+    progress = np.tile(np.arange(n) / max(n - 1, 1), count)
+    rhythm = np.sin((hour - 10) / 24 * 2 * np.pi) if per_day > 1 else np.zeros(len(offsets))
+    ids = np.char.add('PT', np.char.zfill(patient.astype(str), id_width))
+    out = {'PatientID': ids, 'Name': np.char.add('Patient ', patient.astype(str)),
+           'Date': dates.astype('datetime64[s]')}
+    for metric, (mean, between, within) in BASELINES.items():
+        base = rng.normal(mean, between, count)
+        drift = rng.normal(0, between / 2, count)
+        y = np.repeat(base, n) + np.repeat(drift, n) * progress + rng.normal(0, within, len(offsets))
+        if metric == 'HeartRate':
+            y += 5 * rhythm
+        elif metric == 'Temp':
+            y += 0.4 * rhythm
+        elif metric == 'O2Sat':
+            y = np.minimum(y, 100.0)
+        hit = np.flatnonzero(rng.random(len(y)) < anomaly_rate)
+        if len(hit):
+            (lo_a, lo_b), (hi_a, hi_b) = ANOMALY_RANGES[metric]
+            high = rng.random(len(hit)) < 0.5
+            y[hit] = np.where(high, rng.uniform(hi_a, hi_b, len(hit)), rng.uniform(lo_a, lo_b, len(hit)))
+        y = np.round(y, DECIMALS.get(metric, 0))
+        y[rng.random(len(y)) < missing_rate] = np.nan
+        out[metric] = y
+    return pd.DataFrame(out)
+
+
+def iter_vitals(patients, days, per_day=1, start='2025-01-01', seed=0, anomaly_rate=ANOMALY_RATE,
+                missing_rate=MISSING_RATE, block=BLOCK_PATIENTS):
+    """Blocks of synthetic readings for patients x days x per_day rows in total"""
+    rng = np.random.default_rng(seed)
+    width = max(3, len(str(patients)))
+    for first in range(1, patients + 1, block):
+        yield patient_block(first, min(block, patients + 1 - first), days, per_day, start, rng,
+                            anomaly_rate, missing_rate, width)
+
+
+def generate_vitals(patients, days, per_day=1, **kwargs):
+    """One frame of synthetic readings (see iter_vitals)"""
+    return pd.concat(iter_vitals(patients, days, per_day, **kwargs), ignore_index=True)
+
+
+def shape_for_rows(rows, per_day=24):
+    """(patients, days, per_day) giving about rows readings: a month of history, patients scaled to fit"""
+    per_day = min(per_day, max(1, rows // 30))
+    days = min(30, max(1, rows // per_day))
+    return max(1, round(rows / (days * per_day))), days, per_day
+
+
+def write_csv(path, patients, days, per_day=1, **kwargs):
+    """Write synthetic readings to path block by block; returns the number of rows"""
+    rows = 0
+    date_format = '%Y-%m-%d %H:%M:%S' if per_day > 1 else '%Y-%m-%d'
+    tmp = path + '.tmp'
+    with open(tmp, 'w', newline='') as fh:
+        for i, frame in enumerate(iter_vitals(patients, days, per_day, **kwargs)):
+            frame = frame.astype({m: 'Int64' for m in engine.INT_COLS})
+            frame.to_csv(fh, header=i == 0, index=False, date_format=date_format)
+            rows += len(frame)
+    os.replace(tmp, path)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic vitals CSV in the patient_health_data.csv schema')
+    parser.add_argument('out', help='CSV file to write')
+    parser.add_argument('--rows', type=int, help='approximate total rows (picks patients/days/per-day)')
+    parser.add_argument('--patients', type=int, default=100)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--per-day', type=int, default=1, help='readings per patient per day')
+    parser.add_argument('--start', default='2025-01-01', help='date of the first reading')
+    parser.add_argument('--anomaly-rate', type=float, default=ANOMALY_RATE,
+                        help='share of readings replaced by an abnormal value, per vital')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.rows:
+        args.patients, args.days, args.per_day = shape_for_rows(args.rows)
+    rows = write_csv(args.out, args.patients, args.days, args.per_day, start=args.start, seed=args.seed,
+                     anomaly_rate=args.anomaly_rate)
+    print(f"{rows} rows ({args.patients} patients x {args.days} days x {args.per_day}/day) written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
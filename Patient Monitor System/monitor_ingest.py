@@ -0,0 +1,221 @@
+"""
+Patient Health Monitoring System - Streaming Ingestion
+Reads large vitals exports in fixed-size chunks with explicit dtypes, cleans each
+chunk and folds it into running per-patient aggregates, so peak memory is bounded
+by the chunk size rather than the file size.
+"""
+import io
+import os
+
+import pandas as pd
+
+import monitor_engine as engine
+import monitor_profile as profile
+
+CHUNK_ROWS = 250_000
+READ_DTYPES = {'PatientID': str, 'Name': str, 'Date': str,
+               **{col: 'float64' for col in engine.NUM_COLS}}
+
+
+class RunningStats:
+    """Per-patient count/sum/min/max accumulators updated chunk by chunk"""
+
+    def __init__(self):
+        self._acc = None
+        self.records = 0
+
+    def update(self, chunk):
+        if chunk.empty:
+            return
+        if any(chunk[col].dtype != 'float64' for col in engine.NUM_COLS):
+            # Compacted Int16 columns would overflow when summed
+            chunk = engine.float_vitals(chunk)
+        aggs = {'Name': ('Name', 'first'), 'Records': ('Date', 'size'),
+                'FirstDate': ('Date', 'min'), 'LastDate': ('Date', 'max')}
+        for col in engine.NUM_COLS:
+            aggs[f'{col}_count'] = (col, 'count')
+            aggs[f'{col}_sum'] = (col, 'sum')
+            aggs[f'{col}_min'] = (col, 'min')
+            aggs[f'{col}_max'] = (col, 'max')
+        part = chunk.groupby('PatientID', sort=False, observed=True).agg(**aggs)
+        self.records += len(chunk)
+        if self._acc is None:
+            self._acc = part
+            return
+        merge = {'Name': 'first', 'Records': 'sum', 'FirstDate': 'min', 'LastDate': 'max'}
+        for col in engine.NUM_COLS:
+            merge.update({f'{col}_count': 'sum', f'{col}_sum': 'sum',
+                          f'{col}_min': 'min', f'{col}_max': 'max'})
+        self._acc = pd.concat([self._acc, part]).groupby(level=0, sort=False).agg(merge)
+
+    def summary_lines(self):
+        """File-wide summary computed from the accumulators alone"""
+        if self._acc is None:
+            return ["No data available."]
+        acc = self._acc
+        lines = [f"Patients: {len(acc)}",
+                 f"Date range: {acc['FirstDate'].min().date()} to {acc['LastDate'].max().date()}",
+                 f"Records: {self.records}"]
+        means = {}
+        for col in engine.NUM_COLS:
+            count = acc[f'{col}_count'].sum()
+            means[col] = acc[f'{col}_sum'].sum() / count if count else float('nan')
+        lines.append(f"Avg HR: {means['HeartRate']:.1f}")
+        lines.append(f"Avg BP: {means['BP_Systolic']:.1f}/{means['BP_Diastolic']:.1f}")
+        lines.append(f"Avg Temp: {means['Temp']:.1f} F")
+        lines.append(f"Avg Glucose: {means['Glucose']:.1f} mg/dL")
+        lines.append(f"Avg O2Sat: {means['O2Sat']:.1f}%")
+        return lines
+
+    def stats(self):
+        """Same layout as engine.patient_stats()"""
+        if self._acc is None:
+            return engine.patient_stats(pd.DataFrame(columns=['PatientID', 'Name', 'Date'] + engine.NUM_COLS))
+        acc = self._acc.sort_index()
+        out = acc[['Name', 'Records', 'FirstDate', 'LastDate']].copy()
+        for col in engine.NUM_COLS:
+            out[f'{col}_mean'] = acc[f'{col}_sum'] / acc[f'{col}_count'].where(acc[f'{col}_count'] > 0)
+            out[f'{col}_min'] = acc[f'{col}_min']
+            out[f'{col}_max'] = acc[f'{col}_max']
+        out.index.name = 'PatientID'
+        return out
+
+
+def complete_size(file_path, size=None):
+    """Byte offset just past the last complete line in the first size bytes of file_path
+
+    A load that reads up to this offset and a CsvTailer started at it see every
+    line exactly once, even while the file is being appended to.
+    """
+    pos = os.path.getsize(file_path) if size is None else size
+    with open(file_path, 'rb') as fh:
+        while pos > 0:
+            step = min(pos, 64 * 1024)
+            fh.seek(pos - step)
+            cut = fh.read(step).rfind(b'\n')
+            if cut >= 0:
+                return pos - step + cut + 1
+            pos -= step
+    return 0
+
+
+class _FileHead(io.RawIOBase):
+    """The first stop bytes of an open binary file, read through from its current position"""
+
+    def __init__(self, fh, stop):
+        self.fh = fh
+        self.stop = stop
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.fh.read(max(0, min(len(buffer), self.stop - self.fh.tell())))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def iter_clean_chunks(file_path, chunksize=CHUNK_ROWS, date_format=engine.DATE_FORMAT, progress=None, stop=None):
+    """Yield cleaned chunks of file_path; progress(bytes_read, total_bytes) is called after each
+
+    With stop only the first stop bytes are read (see complete_size()).
+    """
+    total = os.path.getsize(file_path) if stop is None else stop
+    done = [0]
+    try:
+        yield from _read_chunks(file_path, chunksize, date_format, progress, total, READ_DTYPES, done, stop)
+    except ValueError:
+        # A vitals column holds text: continue from the failing chunk with string
+        # columns, letting clean_data() coerce bad values to NaN as before
+        text_dtypes = {col: str for col in READ_DTYPES}
+        yield from _read_chunks(file_path, chunksize, date_format, progress, total, text_dtypes, done, stop)
+
+
+def _read_chunks(file_path, chunksize, date_format, progress, total, dtypes, done, stop=None):
+    skip = range(1, done[0] + 1) if done[0] else None
+    with open(file_path, 'rb') as fh:
+        source = fh if stop is None else io.BufferedReader(_FileHead(fh, stop))
+        reader = pd.read_csv(source, dtype=dtypes, chunksize=chunksize, skiprows=skip)
+        while True:
+            with profile.span('read_csv'):
+                chunk = next(reader, None)
+            if chunk is None:
+                break
+            done[0] += len(chunk)
+            chunk = engine.clean_data(chunk, date_format=date_format)
+            if progress is not None:
+                progress(min(fh.tell(), total), total)
+            yield chunk
+
+
+def stream_csv(file_path, chunksize=CHUNK_ROWS, keep_frame=True, progress=None, stop=None):
+    """Stream file_path once; returns (cleaned frame or None, RunningStats)
+
+    With keep_frame=False only the aggregates are retained, so memory stays
+    bounded by one chunk regardless of the file size. With stop only the first
+    stop bytes are read, so rows appended during the load are left to a
+    CsvTailer started at stop.
+    """
+    running = RunningStats()
+    frames = []
+    for chunk in iter_clean_chunks(file_path, chunksize=chunksize, progress=progress, stop=stop):
+        running.update(chunk)
+        if keep_frame:
+            # Vitals are narrowed per chunk; IDs become categoricals once, after concat
+            frames.append(engine.compact_dtypes(chunk, categoricals=False))
+    if not keep_frame:
+        return None, running
+    if not frames:
+        if stop is not None:
+            return engine.compact_dtypes(engine.clean_data(empty_frame())), running
+        return engine.load_csv(file_path), running
+    return engine.compact_dtypes(pd.concat(frames, ignore_index=True)), running
+
+
+class CsvTailer:
+    """Follows a CSV that is being appended to, parsing only the bytes added since the last poll
+
+    Only complete lines are consumed; a partially written last line is left for
+    the next poll. poll() returns None if the file shrank (rotated or truncated),
+    in which case the caller should reload it.
+    """
+
+    def __init__(self, file_path, offset=None):
+        self.file_path = file_path
+        with open(file_path, 'rb') as fh:
+            self.header = fh.readline()
+        self.offset = os.path.getsize(file_path) if offset is None else offset
+
+    def poll(self):
+        size = os.path.getsize(self.file_path)
+        if size < self.offset:
+            return None
+        if size == self.offset:
+            return empty_frame()
+        with open(self.file_path, 'rb') as fh:
+            fh.seek(self.offset)
+            data = fh.read(size - self.offset)
+        cut = data.rfind(b'\n') + 1
+        if not cut:
+            return empty_frame()
+        self.offset += cut
+        return parse_rows(self.header + data[:cut])
+
+
+def parse_rows(csv_bytes, date_format=engine.DATE_FORMAT, skip_bad_lines=False):
+    """Clean, vitals-compacted frame from CSV text that includes the header line
+
+    With skip_bad_lines, lines with too many fields are dropped and undecodable bytes are
+    replaced instead of failing the whole parse.
+    """
+    options = {'on_bad_lines': 'skip', 'encoding_errors': 'replace'} if skip_bad_lines else {}
+    try:
+        rows = pd.read_csv(io.BytesIO(csv_bytes), dtype=READ_DTYPES, **options)
+    except ValueError:
+        rows = pd.read_csv(io.BytesIO(csv_bytes), dtype={col: str for col in READ_DTYPES}, **options)
+    rows = engine.clean_data(rows, date_format=date_format)
+    return engine.compact_dtypes(rows, categoricals=False)
+
+
+def empty_frame():
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in READ_DTYPES.items()})
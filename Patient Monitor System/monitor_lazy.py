@@ -0,0 +1,56 @@
+"""
+Patient Health Monitoring System - Deferred Imports
+pandas, matplotlib and the TkAgg backend take a second or more to import on a
+slow machine. The apps bind them as LazyModule proxies instead, so the Tk
+window is built and painted first; the real import happens on first use, or
+earlier on a background thread started with warm_up() once the window is up.
+
+Imports are serialized by Python's import lock, so a proxy used on the Tk
+thread while warm_up() is still importing that module simply waits for it.
+"""
+import importlib
+import threading
+import time
+
+# Imported in this order by warm_up(): what loading a file needs first, then plotting
+DATA_MODULES = ('numpy', 'pandas', 'monitor_engine', 'monitor_ingest', 'monitor_cache')
+PLOT_MODULES = ('matplotlib.figure', 'matplotlib.backends.backend_tkagg', 'monitor_charts')
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy(name):
+    return LazyModule(name)
+
+
+def warm_up(names=DATA_MODULES + PLOT_MODULES, on_done=None):
+    """Import names on a daemon thread; on_done(seconds) is called from that thread when finished"""
+    def run():
+        start = time.perf_counter()
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                # Surfaces again, with a proper error, where the module is actually used
+                pass
+        if on_done is not None:
+            on_done(time.perf_counter() - start)
+    thread = threading.Thread(target=run, name='monitor-warm-up', daemon=True)
+    thread.start()
+    return thread
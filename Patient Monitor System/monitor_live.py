@@ -0,0 +1,286 @@
+"""
+Patient Health Monitoring System - Live Device Ingestion
+Bedside devices push readings over a local socket, one CSV line per reading
+in the patient_health_data.csv column order:
+
+    PatientID,Name,Date,HeartRate,BP_Systolic,BP_Diastolic,Temp,Glucose,O2Sat
+
+over TCP (a stream of lines) or UDP (one or more lines per datagram). Header
+lines are ignored, as are lines without a PatientID or a parseable Date, lines
+with too many fields or an unbalanced quote, and undecodable bytes are
+replaced. A batch that still fails to parse is dropped and counted; later
+batches are delivered as usual.
+
+The server runs on asyncio in its own thread. Received bytes are only
+appended to a buffer; every batch_ms the buffer is parsed in one vectorized
+read_csv call and on_batch(rows) is called with the cleaned frame, so the
+per-reading cost is a few microseconds and the caller (the Tk app) only sees
+one frame per batch.
+
+simulate() replays a vitals CSV to the server at a target rate, for testing
+and load tests; with repeat > 1 each pass is shifted past the previous one in
+time, as if the devices kept reporting.
+
+Usage:
+    python monitor_live.py serve --port 8760
+    python monitor_live.py simulate patient_health_data.csv --rate 50000 --repeat 20
+    python monitor_live.py simulate patient_health_data.csv --udp --rate 2000
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import monitor_engine as engine
+import monitor_ingest as ingest
+import monitor_profile as profile
+
+DEFAULT_PORT = 8760
+BATCH_MS = 200
+COLUMNS = ['PatientID', 'Name', 'Date'] + engine.NUM_COLS
+HEADER = (','.join(COLUMNS) + '\n').encode()
+# Largest UDP payload the simulator sends; several lines per datagram
+UDP_PAYLOAD = 8192
+READ_BYTES = 256 * 1024
+
+
+def parse_lines(data):
+    """Cleaned frame of the CSV lines in data (bytes, no header required)"""
+    try:
+        return ingest.parse_rows(HEADER + data, skip_bad_lines=True)
+    except pd.errors.ParserError:
+        # An unbalanced quote makes the parser read to the end of the batch; drop those lines
+        lines = [line for line in data.splitlines(keepends=True) if line.count(b'"') % 2 == 0]
+        return ingest.parse_rows(HEADER + b''.join(lines), skip_bad_lines=True)
+
+
+class _Datagrams(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.receive(data if data.endswith(b'\n') else data + b'\n')
+
+
+class LiveIngestServer:
+    """TCP + UDP listener batching device readings into frames
+
+    on_batch(rows) is called from the server's parser thread, never from the
+    Tk thread; the app hands the frames over through a queue.
+    """
+
+    def __init__(self, on_batch, host='127.0.0.1', port=DEFAULT_PORT, udp=True, batch_ms=BATCH_MS):
+        self.on_batch = on_batch
+        self.host = host
+        self.port = port
+        self.udp = udp
+        self.batch_ms = batch_ms
+        self.received = 0
+        self.rows = 0
+        self.batches = 0
+        self.connections = 0
+        self.failed_batches = 0
+        self._chunks = []
+        self._loop = None
+        self._thread = None
+        self._stopped = None
+        self._parser = ThreadPoolExecutor(max_workers=1, thread_name_prefix='monitor-live-parse')
+
+    def receive(self, data):
+        """Buffer complete lines (called on the event loop)"""
+        self._chunks.append(data)
+        self.received += len(data)
+
+    async def _client(self, reader, writer):
+        self.connections += 1
+        tail = b''
+        try:
+            while True:
+                data = await reader.read(READ_BYTES)
+                if not data:
+                    break
+                cut = data.rfind(b'\n') + 1
+                if not cut:
+                    tail += data
+                    continue
+                self.receive(tail + data[:cut])
+                tail = data[cut:]
+            if tail:
+                self.receive(tail + b'\n')
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    def _parse(self, data):
+        try:
+            with profile.span('live_batch', bytes=len(data)):
+                rows = parse_lines(data)
+        except (ValueError, UnicodeError):
+            # One bad batch must not stop the flush loop and every reading after it
+            self.failed_batches += 1
+            return
+        if not rows.empty:
+            self.rows += len(rows)
+            self.batches += 1
+            self.on_batch(rows)
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.batch_ms / 1000)
+            if self._chunks:
+                data, self._chunks = b''.join(self._chunks), []
+                # Parsed off the loop, so sockets keep draining during a large batch
+                await loop.run_in_executor(self._parser, self._parse, data)
+
+    async def serve(self, ready=None):
+        """Listen until stop(); ready(error or None) is called once bound"""
+        self._stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            server = await asyncio.start_server(self._client, self.host, self.port)
+            self.port = server.sockets[0].getsockname()[1]
+            transport = None
+            if self.udp:
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _Datagrams(self), local_addr=(self.host, self.port))
+        except OSError as e:
+            if ready is not None:
+                ready(e)
+            return
+        if ready is not None:
+            ready(None)
+        flush = asyncio.create_task(self._flush())
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            if transport is not None:
+                transport.close()
+            flush.cancel()
+            if self._chunks:
+                data, self._chunks = b''.join(self._chunks), []
+                await loop.run_in_executor(self._parser, self._parse, data)
+            await server.wait_closed()
+
+    def start(self):
+        """Serve on a daemon thread; returns once listening and raises OSError if the port is taken"""
+        bound = threading.Event()
+        errors = []
+
+        def ready(error):
+            errors.append(error)
+            bound.set()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.serve(ready))
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='monitor-live', daemon=True)
+        self._thread.start()
+        bound.wait()
+        if errors[0] is not None:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """Stop listening; readings still buffered are parsed and delivered first"""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._parser.shutdown(wait=True)
+
+    def status_line(self):
+        failed = f" ({self.failed_batches} unparseable)" if self.failed_batches else ''
+        return (f"{self.rows} readings in {self.batches} batches{failed} | {self.received / 1024**2:.1f} MiB received | "
+                f"{self.connections} TCP connections")
+
+
+def replay_lines(file_path, repeat=1):
+    """Blocks of CSV line bytes of file_path; pass k is shifted k times the file's date span later"""
+    df = pd.read_csv(file_path, dtype=str)
+    dates = pd.to_datetime(df['Date'], format=engine.DATE_FORMAT, errors='coerce')
+    span = (dates.max() - dates.min()).ceil('D') + pd.Timedelta(days=1) if dates.notna().any() else pd.Timedelta(0)
+    date_format = '%Y-%m-%d %H:%M:%S' if (dates.dropna().dt.normalize() != dates.dropna()).any() else '%Y-%m-%d'
+    for k in range(repeat):
+        out = df.copy()
+        out['Date'] = (dates + k * span).dt.strftime(date_format)
+        yield out[COLUMNS].to_csv(header=False, index=False, lineterminator='\n').encode()
+
+
+def simulate(file_path, host='127.0.0.1', port=DEFAULT_PORT, rate=10_000, repeat=1, udp=False, block=500):
+    """Send file_path's readings to a server at about rate lines/s; returns (lines, seconds)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM if udp else socket.SOCK_STREAM)
+    if not udp:
+        sock.connect((host, port))
+    sent = 0
+    start = time.perf_counter()
+    try:
+        for data in replay_lines(file_path, repeat):
+            lines = data.splitlines(keepends=True)
+            for lo in range(0, len(lines), block):
+                part = lines[lo:lo + block]
+                if udp:
+                    payload = b''
+                    for line in part:
+                        if len(payload) + len(line) > UDP_PAYLOAD:
+                            sock.sendto(payload, (host, port))
+                            payload = b''
+                        payload += line
+                    if payload:
+                        sock.sendto(payload, (host, port))
+                else:
+                    sock.sendall(b''.join(part))
+                sent += len(part)
+                # Pace to the target rate
+                ahead = sent / rate - (time.perf_counter() - start)
+                if ahead > 0:
+                    time.sleep(ahead)
+    finally:
+        sock.close()
+    return sent, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Live vitals ingestion over TCP/UDP and a device simulator')
+    sub = parser.add_subparsers(dest='command', required=True)
+    cmd = sub.add_parser('serve', help='receive readings and print throughput once a second')
+    cmd.add_argument('--host', default='127.0.0.1')
+    cmd.add_argument('--port', type=int, default=DEFAULT_PORT)
+    cmd.add_argument('--batch-ms', type=int, default=BATCH_MS)
+    cmd.add_argument('--no-udp', action='store_true')
+    cmd = sub.add_parser('simulate', help='replay a vitals CSV to a running server')
+    cmd.add_argument('file')
+    cmd.add_argument('--host', default='127.0.0.1')
+    cmd.add_argument('--port', type=int, default=DEFAULT_PORT)
+    cmd.add_argument('--rate', type=int, default=10_000, help='readings per second')
+    cmd.add_argument('--repeat', type=int, default=1, help='passes over the file, each later in time')
+    cmd.add_argument('--udp', action='store_true', help='send datagrams instead of a TCP stream')
+    args = parser.parse_args(argv)
+
+    if args.command == 'simulate':
+        sent, seconds = simulate(args.file, args.host, args.port, args.rate, args.repeat, args.udp)
+        print(f"Sent {sent} readings in {seconds:.1f}s ({sent / max(seconds, 1e-9):,.0f}/s)")
+        return
+    server = LiveIngestServer(lambda rows: None, args.host, args.port, not args.no_udp, args.batch_ms).start()
+    print(f"Listening on {args.host}:{server.port} (TCP{'' if args.no_udp else ' + UDP'}), Ctrl+C to stop")
+    last = 0
+    try:
+        while True:
+            time.sleep(1)
+            print(f"{server.rows - last:>8} readings/s | {server.status_line()}")
+            last = server.rows
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Patient Health Monitoring System - Instrumentation
+Timing spans around the hot paths (CSV parsing, coercion, indexing, analysis,
+chart drawing) and memory snapshots of the loaded frame, for finding out where
+time goes when the app feels slow.
+
+Off unless the PATIENT_MONITOR_PROFILE environment variable is set; its value
+is the JSON Lines log file to append records to ('1' logs to
+patient_monitor_profile.jsonl). When off, span() returns one shared no-op
+context manager and timed() returns the function unchanged, so instrumented
+code pays a function call at most.
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENV_VAR = 'PATIENT_MONITOR_PROFILE'
+DEFAULT_LOG = 'patient_monitor_profile.jsonl'
+# Records kept in memory for the diagnostics tab; the log file has all of them
+MAX_RECORDS = 5000
+
+_setting = os.environ.get(ENV_VAR, '').strip()
+ENABLED = _setting not in ('', '0')
+LOG_PATH = (DEFAULT_LOG if _setting == '1' else _setting) if ENABLED else None
+
+_records = deque(maxlen=MAX_RECORDS)
+_lock = threading.Lock()
+_local = threading.local()
+_NOOP = contextlib.nullcontext()
+# One line-buffered handle for the whole run (opening the log per span cost more than
+# most spans); reopened if LOG_PATH is changed, None when it could not be opened
+_log = {'path': None, 'file': None}
+
+
+def _log_file():
+    if _log['path'] != LOG_PATH:
+        _close_log()
+        _log['path'] = LOG_PATH
+        try:
+            _log['file'] = open(LOG_PATH, 'a', buffering=1)
+        except OSError:
+            pass
+    return _log['file']
+
+
+def _close_log():
+    if _log['file'] is not None:
+        try:
+            _log['file'].close()
+        except OSError:
+            pass
+    _log['path'] = _log['file'] = None
+
+
+@atexit.register
+def close():
+    """Close the log file (it is reopened by the next record)"""
+    with _lock:
+        _close_log()
+
+
+def _emit(record):
+    with _lock:
+        _records.append(record)
+        if LOG_PATH:
+            fh = _log_file()
+            if fh is not None:
+                try:
+                    fh.write(json.dumps(record, default=str) + '\n')
+                except OSError:
+                    pass
+
+
+class _Span:
+    __slots__ = ('name', 'fields', 'start', 'parent')
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault('stack', [])
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        _local.stack.pop()
+        _emit({'type': 'span', 'name': self.name, 'parent': self.parent, 'seconds': elapsed,
+               'thread': threading.current_thread().name, 'time': time.time(),
+               'error': exc_type.__name__ if exc_type else None, **self.fields})
+        return False
+
+
+def span(name, **fields):
+    """Context manager timing the enclosed block as one record (extra fields are logged with it)"""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, fields)
+
+
+def timed(name=None):
+    """Decorator: every call of the function is a span (the function itself when profiling is off)"""
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with _Span(label, {}):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def record(name, seconds, **fields):
+    """Record a duration measured elsewhere (e.g. startup) as a span"""
+    if ENABLED:
+        _emit({'type': 'span', 'name': name, 'parent': None, 'seconds': seconds,
+               'thread': threading.current_thread().name, 'time': time.time(), 'error': None, **fields})
+
+
+def memory_snapshot(label, df):
+    """Record the rows and deep memory footprint of a frame"""
+    if not ENABLED or df is None:
+        return
+    _emit({'type': 'memory', 'name': label, 'rows': len(df),
+           'bytes': int(df.memory_usage(deep=True).sum()), 'time': time.time()})
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def clear():
+    with _lock:
+        _records.clear()
+
+
+def stage_totals():
+    """Count, total, mean and max seconds per span name, slowest total first"""
+    import pandas as pd  # not at module level: the apps import this before pandas is needed
+    spans = pd.DataFrame([r for r in records() if r['type'] == 'span'], columns=['name', 'seconds'])
+    if spans.empty:
+        return pd.DataFrame(columns=['count', 'total', 'mean', 'max'])
+    totals = spans.groupby('name')['seconds'].agg(['count', 'sum', 'mean', 'max'])
+    return totals.rename(columns={'sum': 'total'}).sort_values('total', ascending=False)
+
+
+def export(path):
+    """Write the recorded spans, memory snapshots and per-stage totals to one JSON file"""
+    with open(path, 'w') as fh:
+        json.dump({'records': records(), 'stages': stage_totals().reset_index().to_dict('records')},
+                  fh, indent=1, default=str)
+
+
+def diagnostics_lines(recent=25):
+    """Text of the diagnostics tab: memory snapshots and the most recent spans"""
+    items = records()
+    lines = [f"Profiling log: {os.path.abspath(LOG_PATH) if LOG_PATH else 'memory only'}", '-'*50, 'Memory']
+    snaps = [r for r in items if r['type'] == 'memory']
+    lines += [f"  {r['name']}: {r['rows']} rows, {r['bytes'] / 1024**2:.1f} MiB "
+              f"({r['bytes'] / max(r['rows'], 1):.1f} B/row)" for r in snaps[-10:]] or ['  None']
+    lines += ['-'*50, 'Recent spans']
+    for r in [r for r in items if r['type'] == 'span'][-recent:][::-1]:
+        parent = f" (in {r['parent']})" if r['parent'] else ''
+        lines.append(f"  {r['seconds'] * 1000:9.1f} ms  {r['name']}{parent} [{r['thread']}]")
+    return lines
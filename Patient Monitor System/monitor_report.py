@@ -0,0 +1,184 @@
+"""
+Patient Health Monitoring System - Batch Reports
+Renders every patient's 2x2 vitals overview and analysis report to PDF and/or
+PNG files without a display, using the Agg/PDF backends.
+
+Trends and anomalies are computed once for the whole ward in the parent
+process; patients are then split into chunks that worker processes write up
+and render.
+Each worker keeps one chart figure and one text page and swaps in every
+patient's data (VitalsChart.set_data), so the per-patient cost is drawing and
+writing the file, not building figures.
+
+Usage:
+    python monitor_report.py patient_health_data.csv reports/
+    python monitor_report.py patient_health_data.csv reports/ --format pdf png --workers 8
+    python monitor_report.py exports/ reports/ --start 2025-10-01 --end 2025-10-31
+    python monitor_report.py exports/ reports/ --patients PT001 PT007
+"""
+import argparse
+import os
+import re
+import sys
+import textwrap
+import time
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+import monitor_anomaly as anomaly
+import monitor_charts as charts
+import monitor_dataset as dataset
+import monitor_engine as engine
+import monitor_trends as trends
+import monitor_validate as validate
+
+FORMATS = ('pdf', 'png')
+# Patients per worker job: large enough to amortize pickling, small enough to balance the pool
+CHUNK_PATIENTS = 25
+# Fewer patients than this are rendered in-process; starting workers would cost more
+PARALLEL_MIN_PATIENTS = 40
+PNG_DPI = 95
+# Report text is wrapped to fit the landscape text page
+PAGE_COLUMNS = 130
+
+# Per-process figures, reused for every patient the process renders
+_FIGURES = {}
+
+
+def report_name(patient_id):
+    """File name stem for a patient ID (path separators and the like replaced)"""
+    return re.sub(r'[^\w.-]', '_', str(patient_id))
+
+
+def _figures():
+    if not _FIGURES:
+        chart = charts.VitalsChart('overview', blit=False)
+        FigureCanvasAgg(chart.fig)
+        page = Figure(figsize=(11, 8.5), dpi=PNG_DPI)
+        FigureCanvasAgg(page)
+        text = page.text(0.04, 0.96, '', family='monospace', fontsize=7.5, va='top')
+        _FIGURES.update(chart=chart, page=page, text=text)
+    return _FIGURES['chart'], _FIGURES['page'], _FIGURES['text']
+
+
+def render_patient(rows, report, out_dir, formats=FORMATS, span=None):
+    """Write one patient's overview chart and report text; returns the paths written"""
+    chart, page, text = _figures()
+    chart.set_data(rows, span=span)
+    text.set_text('\n'.join(textwrap.fill(line, PAGE_COLUMNS, subsequent_indent='    ') if len(line) > PAGE_COLUMNS
+                             else line for line in report))
+    stem = os.path.join(out_dir, report_name(rows['PatientID'].iloc[0]))
+    paths = []
+    if 'pdf' in formats:
+        with PdfPages(stem + '.pdf') as pdf:
+            pdf.savefig(chart.fig)
+            pdf.savefig(page)
+        paths.append(stem + '.pdf')
+    if 'png' in formats:
+        chart.fig.savefig(stem + '.png', dpi=PNG_DPI)
+        page.savefig(stem + '_report.png', dpi=PNG_DPI)
+        paths += [stem + '.png', stem + '_report.png']
+    return paths
+
+
+def report_lines(rows, trend_rows, flagged):
+    """One patient's analysis report: the summary plus its trends and anomalies sections"""
+    return engine.report_lines(rows, extra=trends.trend_lines(trend_rows) + anomaly.anomaly_lines(flagged))
+
+
+def _render_chunk(items, out_dir, formats, span):
+    """Worker process: write up and render a list of patient_reports() items"""
+    paths = []
+    for rows, trend_rows, flagged in items:
+        paths += render_patient(rows, report_lines(rows, trend_rows, flagged), out_dir, formats, span)
+    return paths
+
+
+def patient_reports(index, start=None, stop=None, trend_frame=None, anomalies=None):
+    """(rows, trend rows, anomalies) of every patient with readings in [start, stop), in PatientID order
+
+    trend_frame (TrendCache.frame) and anomalies (find_anomalies of index.df)
+    are computed here when not given.
+    """
+    if trend_frame is None:
+        trend_frame = trends.TrendCache(index).frame
+    if anomalies is None:
+        anomalies = anomaly.find_anomalies(index.df)
+    if start is not None:
+        anomalies = anomalies[anomalies['Date'] >= start]
+    if stop is not None:
+        anomalies = anomalies[anomalies['Date'] < stop]
+    flagged = dict(tuple(anomalies.groupby('PatientID', observed=True, sort=False)))
+    empty = anomalies.iloc[:0]
+    for pid in index.patient_ids():
+        lo, hi = index.bounds(pid, start, stop)
+        if lo == hi:
+            continue
+        yield index.df.iloc[lo:hi], trend_frame.iloc[lo:hi], flagged.get(pid, empty)
+
+
+def export_reports(index, out_dir, formats=FORMATS, start=None, stop=None, trend_frame=None, anomalies=None,
+                   workers=None, progress=None):
+    """Render every patient's report into out_dir; returns the number of patients written
+
+    progress(done, total, text) is called per finished chunk and may raise to
+    cancel the remaining chunks.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    items = list(patient_reports(index, start, stop, trend_frame, anomalies))
+    span = (start, stop) if start is not None and stop is not None else None
+    jobs = {i: (items[i:i + CHUNK_PATIENTS], out_dir, tuple(formats), span)
+            for i in range(0, len(items), CHUNK_PATIENTS)}
+    dataset.run_parallel(_render_chunk, jobs, workers, progress, 'Rendering reports',
+                          parallel=len(items) >= PARALLEL_MIN_PATIENTS)
+    return len(items)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render every patient\'s vitals charts and analysis report')
+    parser.add_argument('csv', help='patient health CSV file, or a directory of them')
+    parser.add_argument('out_dir', help='directory to write the reports to')
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=['pdf'],
+                        help='pdf: chart and report pages in one file; png: <id>.png and <id>_report.png')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+    parser.add_argument('--start', help='first date to include (YYYY-MM-DD)')
+    parser.add_argument('--end', help='last date to include (YYYY-MM-DD)')
+    parser.add_argument('--patients', nargs='+', metavar='ID', help='only these patients (default: all)')
+    args = parser.parse_args(argv)
+    start = pd.Timestamp(args.start).normalize() if args.start else None
+    stop = pd.Timestamp(args.end).normalize() + pd.Timedelta(days=1) if args.end else None
+    if (start is None) != (stop is None):
+        parser.error('--start and --end must be given together')
+
+    began = time.perf_counter()
+    if os.path.isdir(args.csv):
+        # Only the partitions of the selected patients and dates are read; trends keep their
+        # longest window of context before --start, and baselines cover the readings loaded
+        first = None if start is None else start - max(pd.Timedelta(w) for w in trends.TREND_WINDOWS)
+        last = None if stop is None else stop - pd.Timedelta(microseconds=1)
+        df = dataset.PartitionedDataset(args.csv, workers=args.workers).scan().load(args.patients, first, last)
+    else:
+        df = engine.load_csv(args.csv)
+        if args.patients:
+            df = df[df['PatientID'].isin(args.patients)]
+    checked = validate.validate(df)
+    if len(checked.rejected):
+        print(f"{len(checked.rejected)} rows failing validation left out", file=sys.stderr)
+    index = engine.PatientIndex(checked.clean)
+
+    def progress(done, total, text):
+        print(f"\r{text}: {done}/{total} chunks", end='', file=sys.stderr, flush=True)
+
+    count = export_reports(index, args.out_dir, args.format, start, stop, workers=args.workers,
+                           progress=progress)
+    elapsed = time.perf_counter() - began
+    print(file=sys.stderr)
+    print(f"{count} patient reports written to {args.out_dir} in {elapsed:.1f}s "
+          f"({count / elapsed * 60:.0f}/min)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+Patient Health Monitoring System - Persistent Store
+An optional SQLite file that keeps every imported export across Reset and
+restarts. Readings are indexed on (PatientID, Date), and the patient list,
+summaries, ward overview and alert screening run as SQL aggregates in the
+database. The app then only pulls the rows it displays (one patient's
+readings) into pandas, so the store can hold more than fits in RAM.
+
+Each imported file is recorded with its mtime and size: importing an
+unchanged file again is a no-op, and a changed file replaces its old rows.
+Every call opens its own connection, so a store can be used from the Tk
+thread and the worker thread alike.
+
+Usage:
+    python monitor_store.py import vitals.sqlite patient_health_data.csv exports/
+    python monitor_store.py summary vitals.sqlite
+    python monitor_store.py alerts vitals.sqlite --patient PT001
+"""
+import argparse
+import contextlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+import monitor_engine as engine
+
+DEFAULT_PATH = os.environ.get('PATIENT_MONITOR_STORE') or os.path.join(
+    os.path.expanduser('~'), '.patient_monitor', 'vitals.sqlite')
+# Rows per executemany() batch when importing
+INSERT_BATCH = 100_000
+_US_PER_DAY = 86_400_000_000
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER, size INTEGER, rows INTEGER, imported REAL);
+CREATE TABLE IF NOT EXISTS readings (
+    source INTEGER NOT NULL, PatientID TEXT NOT NULL, Name TEXT, Date INTEGER NOT NULL,
+    {', '.join(f'"{col}" REAL' for col in engine.NUM_COLS)});
+"""
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS readings_patient_date ON readings (PatientID, Date);
+CREATE INDEX IF NOT EXISTS readings_source ON readings (source);
+"""
+
+
+def _to_us(when):
+    """Timestamp -> stored Date (microseconds since the epoch); None stays None"""
+    return None if when is None else int(np.datetime64(pd.Timestamp(when), 'us').astype('int64'))
+
+
+def _to_dates(values):
+    return pd.to_datetime(np.asarray(values, dtype='int64'), unit='us')
+
+
+def _violation(rule):
+    """SQL condition of a reading breaking one alert rule (NULL readings never do)"""
+    parts = []
+    if rule.low is not None:
+        parts.append(f'"{rule.metric}" < {float(rule.low)!r}')
+    if rule.high is not None:
+        parts.append(f'"{rule.metric}" > {float(rule.high)!r}')
+    return '(' + ' OR '.join(parts) + ')'
+
+
+def _where(patient_id=None, start=None, stop=None):
+    """WHERE clause and parameters for a patient and [start, stop) window"""
+    clauses, params = [], []
+    if patient_id is not None:
+        clauses.append('PatientID = ?')
+        params.append(str(patient_id))
+    if start is not None:
+        clauses.append('Date >= ?')
+        params.append(_to_us(start))
+    if stop is not None:
+        clauses.append('Date < ?')
+        params.append(_to_us(stop))
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+class VitalsStore:
+    """A SQLite vitals database file; created on first use"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as con:
+            con.executescript(_SCHEMA + _INDEXES)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('PRAGMA synchronous=NORMAL')
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _frame(self, sql, params=()):
+        with self._connect() as con:
+            return pd.read_sql_query(sql, con, params=params)
+
+    def is_current(self, file_path):
+        """True if file_path was imported and has not changed since"""
+        st = os.stat(file_path)
+        with self._connect() as con:
+            row = con.execute('SELECT mtime_ns, size FROM sources WHERE path = ?',
+                              (os.path.abspath(file_path),)).fetchone()
+        return row is not None and tuple(row) == (st.st_mtime_ns, st.st_size)
+
+    def import_frame(self, df, file_path):
+        """Store the cleaned readings of file_path, replacing an earlier import of it; returns rows added
+
+        Nothing is written if the file is unchanged since its last import. An
+        import larger than the rows already stored drops the indexes and
+        rebuilds them afterwards, which is about twice as fast as maintaining
+        them row by row.
+        """
+        if self.is_current(file_path):
+            return 0
+        st = os.stat(file_path)
+        ordered = df.sort_values(['PatientID', 'Date'], kind='stable') if len(df) else df
+        columns = [ordered['PatientID'].astype(str).to_numpy(), ordered['Name'].astype(str).to_numpy(),
+                   ordered['Date'].to_numpy().astype('datetime64[us]').astype('int64')]
+        for col in engine.NUM_COLS:
+            values = ordered[col].to_numpy(dtype='float64', na_value=np.nan)
+            columns.append(np.where(np.isnan(values), None, values.astype(object)))
+        placeholders = ', '.join('?' * (3 + len(engine.NUM_COLS)))
+        with self._connect() as con:
+            path = os.path.abspath(file_path)
+            old = con.execute('SELECT id FROM sources WHERE path = ?', (path,)).fetchone()
+            if old is not None:
+                con.execute('DELETE FROM readings WHERE source = ?', old)
+                con.execute('DELETE FROM sources WHERE id = ?', old)
+            rebuild = len(ordered) > con.execute('SELECT COUNT(*) FROM readings').fetchone()[0]
+            if rebuild:
+                con.execute('DROP INDEX IF EXISTS readings_patient_date')
+                con.execute('DROP INDEX IF EXISTS readings_source')
+            source = con.execute('INSERT INTO sources (path, mtime_ns, size, rows, imported) VALUES (?, ?, ?, ?, ?)',
+                                 (path, st.st_mtime_ns, st.st_size, len(ordered), time.time())).lastrowid
+            for lo in range(0, len(ordered), INSERT_BATCH):
+                batch = [col[lo:lo + INSERT_BATCH].tolist() for col in columns]
+                con.executemany(f'INSERT INTO readings VALUES (?, {placeholders})',
+                                zip([source] * len(batch[0]), *batch))
+            if rebuild:
+                for statement in filter(str.strip, _INDEXES.split(';')):
+                    con.execute(statement)
+        return len(ordered)
+
+    def known_readings(self, df, file_path=None):
+        """Mask of the rows of df whose (PatientID, Date) is already stored, not counting file_path's own import
+
+        The keys go into a temporary table that is joined on the (PatientID, Date) index.
+        """
+        known = np.zeros(len(df), dtype=bool)
+        if df.empty:
+            return known
+        keys = zip(df['PatientID'].astype(str).to_numpy().tolist(),
+                   df['Date'].to_numpy().astype('datetime64[us]').astype('int64').tolist())
+        path = None if file_path is None else os.path.abspath(file_path)
+        with self._connect() as con:
+            if con.execute('SELECT 1 FROM readings LIMIT 1').fetchone() is None:
+                return known
+            con.execute('CREATE TEMP TABLE new_keys (PatientID TEXT, Date INTEGER)')
+            con.executemany('INSERT INTO new_keys VALUES (?, ?)', keys)
+            rows = con.execute('SELECT k.rowid - 1 FROM new_keys k JOIN readings r '
+                               'ON r.PatientID = k.PatientID AND r.Date = k.Date '
+                               'WHERE r.source NOT IN (SELECT id FROM sources WHERE path IS ?)', (path,)).fetchall()
+        known[[row for row, in rows]] = True
+        return known
+
+    def records(self):
+        with self._connect() as con:
+            return con.execute('SELECT COUNT(*) FROM readings').fetchone()[0]
+
+    def date_span(self):
+        """(first, last) reading Timestamps, or None for an empty store"""
+        with self._connect() as con:
+            first, last = con.execute('SELECT MIN(Date), MAX(Date) FROM readings').fetchone()
+        return None if first is None else tuple(_to_dates([first, last]))
+
+    def patient_labels(self):
+        """'PatientID - Name' labels for the patient dropdown (one indexed GROUP BY)"""
+        with self._connect() as con:
+            rows = con.execute('SELECT PatientID, MIN(Name) FROM readings GROUP BY PatientID ORDER BY PatientID')
+            return [f'{pid} - {name}' for pid, name in rows]
+
+    def rows(self, patient_id, start=None, stop=None):
+        """One patient's readings with start <= Date < stop, date ordered and compacted like a loaded file"""
+        where, params = _where(patient_id, start, stop)
+        df = self._frame(f'SELECT PatientID, Name, Date, {", ".join(engine.NUM_COLS)} FROM readings'
+                         f'{where} ORDER BY Date', params)
+        df['Date'] = _to_dates(df['Date'])
+        return engine.compact_dtypes(df)
+
+    def summary_lines(self, start=None, stop=None):
+        """engine.summary_lines() of everything stored, computed in SQL"""
+        where, params = _where(None, start, stop)
+        with self._connect() as con:
+            row = con.execute('SELECT COUNT(DISTINCT PatientID), MIN(Date), MAX(Date), COUNT(*), '
+                              f'{", ".join(f"AVG({col})" for col in engine.NUM_COLS)} FROM readings{where}',
+                              params).fetchone()
+        patients, first, last, records = row[:4]
+        means = dict(zip(engine.NUM_COLS, (np.nan if v is None else v for v in row[4:])))
+        lines = [f"Patients: {patients}"]
+        if first is None:
+            lines.append("Date range: N/A")
+        else:
+            lines.append(f"Date range: {_to_dates([first])[0].date()} to {_to_dates([last])[0].date()}")
+        lines.append(f"Records: {records}")
+        return lines + self._mean_lines(means, 'Avg BP') + [f"Store: {self.path}"]
+
+    def patient_summary_lines(self, patient_id, start=None, stop=None):
+        """engine.patient_summary_lines() of one patient, computed in SQL"""
+        where, params = _where(patient_id, start, stop)
+        with self._connect() as con:
+            row = con.execute(f'SELECT MIN(Name), COUNT(*), COUNT(DISTINCT Date / {_US_PER_DAY}), '
+                              f'{", ".join(f"AVG({col})" for col in engine.NUM_COLS)} FROM readings{where}',
+                              params).fetchone()
+        name, records, days = row[:3]
+        if not records:
+            return [f"Patient: {patient_id}", "No readings in the selected date range."]
+        means = dict(zip(engine.NUM_COLS, (np.nan if v is None else v for v in row[3:])))
+        return [f"Patient: {patient_id} - {name}", f"Records: {records} | Days: {days}"] + \
+            self._mean_lines(means, 'BP')
+
+    @staticmethod
+    def _mean_lines(means, bp_label):
+        return [f"Avg HR: {means['HeartRate']:.1f}",
+                f"{bp_label}: {means['BP_Systolic']:.1f}/{means['BP_Diastolic']:.1f}",
+                f"Avg Temp: {means['Temp']:.1f} F",
+                f"Avg Glucose: {means['Glucose']:.1f} mg/dL",
+                f"Avg O2Sat: {means['O2Sat']:.1f}%"]
+
+    def ward_overview(self, rules=engine.ALERT_RULES):
+        """engine.ward_overview() of everything stored: stats, latest reading and active alert count per patient"""
+        aggs = ['MIN(Name) AS Name', 'COUNT(*) AS Records', 'MIN(Date) AS FirstDate', 'MAX(Date) AS LastDate']
+        for col in engine.NUM_COLS:
+            aggs += [f'AVG({col}) AS {col}_mean', f'MIN({col}) AS {col}_min', f'MAX({col}) AS {col}_max']
+        stats = self._frame(f'SELECT PatientID, {", ".join(aggs)} FROM readings GROUP BY PatientID ORDER BY PatientID')
+        last = self._frame(f'SELECT r.PatientID, {", ".join(f"r.{col} AS {col}_last" for col in engine.NUM_COLS)} '
+                           'FROM readings r JOIN (SELECT PatientID, MAX(Date) AS Date FROM readings '
+                           'GROUP BY PatientID) l ON r.PatientID = l.PatientID AND r.Date = l.Date')
+        last = last.drop_duplicates('PatientID', keep='last').set_index('PatientID')
+        overview = stats.set_index('PatientID').join(last)
+        for col in ('FirstDate', 'LastDate'):
+            overview[col] = _to_dates(overview[col])
+        overview.insert(4, 'Alerts', engine.active_alerts(overview, rules))
+        return overview
+
+    def alerts(self, patient_id=None, start=None, stop=None, rules=engine.ALERT_RULES):
+        """engine.find_alerts() of the stored readings: every rule violation, filtered in SQL"""
+        where, params = _where(patient_id, start, stop)
+        where = where + ' AND ' if where else ' WHERE '
+        parts, args = [], []
+        for i, rule in enumerate(rules):
+            parts.append(f'SELECT PatientID, Name, Date, ? AS Metric, "{rule.metric}" AS Value, ? AS Low, ? AS High, '
+                         f'? AS Severity, ? AS Message, {i} AS _rule FROM readings{where}{_violation(rule)}')
+            args += [rule.metric, rule.low, rule.high, rule.severity, rule.message] + params
+        if not parts:
+            return pd.DataFrame(columns=engine.ALERT_COLUMNS)
+        out = self._frame(' UNION ALL '.join(parts) + ' ORDER BY PatientID, Date, _rule', args)
+        out['Date'] = _to_dates(out['Date'])
+        return out.drop(columns='_rule')
+
+
+def import_paths(store, paths):
+    """Import CSV files and directories of them into store, minus rows failing validation; returns rows added
+
+    Readings already stored from another file count as duplicates.
+    """
+    import monitor_dataset as dataset
+    import monitor_validate as validate
+    added = 0
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            # The manifest drops files without readings; unchanged files are skipped by is_current()
+            folder = dataset.PartitionedDataset(path).scan()
+            files = [os.path.join(folder.folder, name) for name in folder.partitions()]
+        for file_path in files:
+            if not store.is_current(file_path):
+                df = dataset.read_partition(file_path)
+                checked = validate.validate(df, known=store.known_readings(df, file_path))
+                added += store.import_frame(checked.clean, file_path)
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Persistent SQLite store of patient vitals')
+    sub = parser.add_subparsers(dest='command', required=True)
+    cmd = sub.add_parser('import', help='import CSV files or directories of them')
+    cmd.add_argument('store')
+    cmd.add_argument('paths', nargs='+')
+    cmd = sub.add_parser('summary', help='print the summary of the stored readings')
+    cmd.add_argument('store')
+    cmd = sub.add_parser('alerts', help='print the readings that break an alert rule')
+    cmd.add_argument('store')
+    cmd.add_argument('--patient')
+    args = parser.parse_args(argv)
+    store = VitalsStore(args.store)
+    if args.command == 'import':
+        start = time.perf_counter()
+        added = import_paths(store, args.paths)
+        print(f"{added} rows imported in {time.perf_counter() - start:.1f}s | {store.records()} rows stored")
+    elif args.command == 'summary':
+        print('\n'.join(store.summary_lines()))
+    else:
+        alerts = store.alerts(args.patient)
+        print('\n'.join(engine.ward_alert_lines(alerts) if args.patient is None else engine.alert_lines(alerts)))
+
+
+if __name__ == '__main__':
+    main()
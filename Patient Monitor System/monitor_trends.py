@@ -0,0 +1,197 @@
+"""
+Patient Health Monitoring System - Trends & Early Warning Score
+Rolling mean/std/slope of every vital over trailing time windows, and a NEWS2
+style early-warning score, computed for all patients in one vectorized pass.
+
+The frame must be sorted by PatientID then Date (PatientIndex.df is). Window
+sums come from cumulative sums over the whole frame, with each row's window
+start found by binary search, so the cost does not depend on how many patients
+there are. TrendCache keeps the result and recomputes only the rows affected by
+appended readings.
+"""
+import numpy as np
+import pandas as pd
+
+import monitor_engine as engine
+from monitor_engine import AlertRule
+
+# Trailing windows, as pandas offsets; a row's window is (Date - window, Date]
+TREND_WINDOWS = ('3D', '7D')
+TREND_STATS = ('mean', 'std', 'slope')
+# A slope needs readings whose times spread (std) at least this much, in days
+MIN_SLOPE_SPREAD = 1 / 24
+RISK_LEVELS = ['low', 'low-medium', 'medium', 'high']
+
+# Trend rules read the per-day slopes over the longest window
+_LONG = TREND_WINDOWS[-1]
+TREND_RULES = [
+    AlertRule('NEWS', None, 4, 'warning', 'Early warning score 5+ (urgent review).'),
+    AlertRule('NEWS', None, 6, 'critical', 'Early warning score 7+ (emergency response).'),
+    AlertRule(f'HeartRate_slope_{_LONG}', -5, 3, 'warning', 'Heart rate trending away from baseline.'),
+    AlertRule(f'BP_Systolic_slope_{_LONG}', -3, 3, 'warning', 'Systolic BP trending away from baseline.'),
+    AlertRule(f'Temp_slope_{_LONG}', None, 0.3, 'warning', 'Temperature rising.'),
+    AlertRule(f'O2Sat_slope_{_LONG}', -0.5, None, 'critical', 'O2 saturation falling.'),
+]
+
+
+def trend_column(metric, stat, window):
+    return f'{metric}_{stat}_{window}'
+
+
+def news_components(df):
+    """Per-reading NEWS2 sub-scores for the vitals this data has (HR, systolic BP, temperature, SpO2 scale 1)
+
+    Respiration rate, consciousness and supplemental oxygen are not recorded, so
+    the total understates a full NEWS2. Missing readings score 0.
+    """
+    hr = df['HeartRate'].to_numpy(dtype='float64', na_value=np.nan)
+    sys_bp = df['BP_Systolic'].to_numpy(dtype='float64', na_value=np.nan)
+    temp_c = (df['Temp'].to_numpy(dtype='float64', na_value=np.nan) - 32) * 5 / 9
+    spo2 = df['O2Sat'].to_numpy(dtype='float64', na_value=np.nan)
+    return {
+        'HeartRate': np.select([hr <= 40, hr <= 50, hr <= 90, hr <= 110, hr <= 130, hr > 130],
+                               [3, 1, 0, 1, 2, 3], 0),
+        'BP_Systolic': np.select([sys_bp <= 90, sys_bp <= 100, sys_bp <= 110, sys_bp >= 220], [3, 2, 1, 3], 0),
+        'Temp': np.select([temp_c <= 35, temp_c <= 36, temp_c <= 38, temp_c <= 39, temp_c > 39],
+                          [3, 1, 0, 1, 2], 0),
+        'O2Sat': np.select([spo2 <= 91, spo2 <= 93, spo2 <= 95], [3, 2, 1], 0),
+    }
+
+
+def news_score(df):
+    """(score, risk) arrays: the summed sub-scores and the NEWS2 clinical risk band"""
+    parts = news_components(df)
+    score = sum(parts.values()).astype('int8')
+    red = np.logical_or.reduce([p == 3 for p in parts.values()])
+    risk = np.select([score >= 7, score >= 5, red], [3, 2, 1], 0)
+    return score, pd.Categorical.from_codes(risk, RISK_LEVELS)
+
+
+def _window_sum(cum, lo, hi):
+    return cum[hi] - cum[lo]
+
+
+def rolling_trends(df, windows=TREND_WINDOWS, metrics=engine.NUM_COLS):
+    """PatientID/Name/Date, NEWS, NEWS_Risk and {metric}_{mean,std,slope}_{window} for every row of df
+
+    Slopes are least-squares fits in units per day; std is the sample std. A
+    window with fewer than two readings gives NaN std and slope, and so does one
+    whose readings span less than MIN_SLOPE_SPREAD.
+    """
+    n = len(df)
+    out = {'PatientID': df['PatientID'].array, 'Name': df['Name'].array, 'Date': df['Date'].array}
+    out['NEWS'], out['NEWS_Risk'] = news_score(df)
+    if n == 0:
+        return pd.DataFrame(out, index=df.index)
+    codes = pd.factorize(df['PatientID'])[0].astype('int64')
+    secs = df['Date'].to_numpy().astype('datetime64[s]').astype('int64')
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    first = secs[starts][np.cumsum(np.r_[False, codes[1:] != codes[:-1]])]
+    # Patient code in the high bits makes one sorted key, so searchsorted never crosses patients
+    key = (codes << 40) + (secs - first)
+    days = (secs - first) / 86400.0
+    hi = np.arange(1, n + 1)
+    bounds = {w: (np.searchsorted(key, key - int(pd.Timedelta(w).total_seconds()), side='right'), hi)
+              for w in windows}
+    for metric in metrics:
+        y = df[metric].to_numpy(dtype='float64', na_value=np.nan)
+        valid = ~np.isnan(y)
+        center = y[valid].mean() if valid.any() else 0.0
+        yc = np.where(valid, y - center, 0.0)
+        t = np.where(valid, days, 0.0)
+        cums = [np.r_[0.0, np.cumsum(a)] for a in (valid.astype('float64'), yc, yc * yc, t, t * t, t * yc)]
+        for window, (lo, hi) in bounds.items():
+            cnt, sy, syy, st, stt, sty = (_window_sum(c, lo, hi) for c in cums)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = np.where(cnt > 0, sy / cnt + center, np.nan)
+                var = np.where(cnt > 1, (syy - sy * sy / cnt) / (cnt - 1), np.nan)
+                denom = cnt * stt - st * st
+                spread = denom > (cnt * MIN_SLOPE_SPREAD) ** 2
+                slope = np.where((cnt > 1) & spread, (cnt * sty - st * sy) / denom, np.nan)
+            out[trend_column(metric, 'mean', window)] = mean.astype('float32')
+            out[trend_column(metric, 'std', window)] = np.sqrt(np.clip(var, 0, None)).astype('float32')
+            out[trend_column(metric, 'slope', window)] = slope.astype('float32')
+    return pd.DataFrame(out, index=df.index)
+
+
+class TrendCache:
+    """rolling_trends() of a PatientIndex, kept row-aligned with index.df
+
+    append() carries the existing rows over and recomputes only each touched
+    patient's rows from its earliest new reading on, using the preceding
+    window of readings as context.
+    """
+
+    def __init__(self, index, windows=TREND_WINDOWS):
+        self.windows = windows
+        self.span = max(pd.Timedelta(w) for w in windows)
+        self.frame = rolling_trends(index.df, windows)
+
+    def append(self, index, rows):
+        """Call after index.append(rows)"""
+        if rows.empty:
+            return
+        if self.frame.empty:
+            self.frame = rolling_trends(index.df, self.windows)
+            return
+        context, targets = [], []
+        dates = index.df['Date'].to_numpy()
+        for pid, cutoff in rows.groupby('PatientID', observed=True)['Date'].min().items():
+            start, stop = index.offsets[pid]
+            lo, first = start + np.searchsorted(dates[start:stop], [np.datetime64(cutoff - self.span),
+                                                                    np.datetime64(cutoff)])
+            context.append(np.arange(lo, stop))
+            targets.append(np.arange(first, stop))
+        targets = np.concatenate(targets)
+        fresh = rolling_trends(index.df.iloc[np.concatenate(context)], self.windows).loc[targets]
+        # Every new row sorts after its patient's cutoff, so the placeholder it takes here is overwritten
+        order = np.minimum(index.order, len(self.frame) - 1)
+        out = {col: index.df[col].array for col in ('PatientID', 'Name', 'Date')}
+        for col in self.frame.columns.drop(['PatientID', 'Name', 'Date']):
+            values = self.frame[col].array.take(order)
+            values[targets] = fresh[col].array
+            out[col] = values
+        self.frame = pd.DataFrame(out)
+
+    def rows(self, index, patient_id=None, start=None, stop=None):
+        """Trend rows of one patient (None = all) with start <= Date < stop"""
+        if patient_id is None:
+            return self.frame.iloc[index.positions(start, stop)]
+        lo, hi = index.bounds(patient_id, start, stop)
+        return self.frame.iloc[lo:hi]
+
+
+def latest(trends):
+    """Most recent trend row per patient"""
+    return trends.groupby('PatientID', observed=True, sort=True).tail(1)
+
+
+def trend_lines(trends, windows=TREND_WINDOWS, rules=TREND_RULES, top=10):
+    """Report section: early-warning score and rolling trends (one patient) or ward NEWS ranking (several)"""
+    lines = ['-'*50, 'Trends & Early Warning (NEWS2 subset: HR, SBP, Temp, SpO2)']
+    if trends.empty:
+        return lines + ['No readings.']
+    last = latest(trends)
+    if len(last) == 1:
+        row = last.iloc[0]
+        lines.append(f"Latest NEWS: {row['NEWS']} ({row['NEWS_Risk']} risk) on {pd.Timestamp(row['Date']).date()}")
+        peak = trends.loc[trends['NEWS'].idxmax()]
+        lines.append(f"Peak NEWS: {peak['NEWS']} on {pd.Timestamp(peak['Date']).date()}")
+        for window in windows:
+            parts = []
+            for metric in engine.NUM_COLS:
+                mean, std, slope = (row[trend_column(metric, stat, window)] for stat in TREND_STATS)
+                parts.append(f"{metric} {engine.format_value(round(float(mean), 1))}±{engine.format_value(round(float(std), 1))} "
+                             f"({'+' if slope >= 0 else ''}{engine.format_value(round(float(slope), 2))}/day)")
+            lines.append(f"{window} window: " + ', '.join(parts))
+        messages = engine.alert_messages(engine.find_alerts(last, rules), rules)
+        lines.append('Trend alerts: ' + (', '.join(messages) if messages else 'None'))
+        return lines
+    counts = last['NEWS_Risk'].value_counts()
+    lines.append('Latest risk: ' + ', '.join(f"{level} {counts.get(level, 0)}" for level in reversed(RISK_LEVELS)))
+    lines.append(f"Highest latest NEWS (top {top}):")
+    for row in last.sort_values('NEWS', ascending=False, kind='stable').head(top).itertuples(index=False):
+        lines.append(f"  {row.PatientID} - {row.Name}: NEWS {row.NEWS} ({row.NEWS_Risk}) on {pd.Timestamp(row.Date).date()}")
+    flagged = engine.find_alerts(last, rules)
+    lines.append(f"Patients with trend alerts on their latest reading: {flagged['PatientID'].nunique()}")
+    return lines
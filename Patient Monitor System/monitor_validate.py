@@ -0,0 +1,167 @@
+"""
+Patient Health Monitoring System - Data Quality Validation
+Flags readings that cannot be right before they reach the summaries, alerts
+and charts: physically impossible vitals, duplicate (PatientID, Date) rows,
+diastolic at or above systolic, and temperatures recorded in Celsius.
+
+Every rule is a vectorized comparison over whole columns, evaluated once into
+a (rows x rules) boolean matrix, so millions of rows validate in well under a
+second. Rows breaking any rule are rejected; they are written with the names
+of the rules they broke to a quarantine CSV, and the per-rule counts are
+shown by the apps.
+
+Usage:
+    python monitor_validate.py patient_health_data.csv
+    python monitor_validate.py huge_export.csv --quarantine rejected.csv
+"""
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import monitor_engine as engine
+import monitor_profile as profile
+
+# Readings outside these limits are not physiologically possible (Temp in F)
+PHYSICAL_LIMITS = {
+    'HeartRate': (20, 300),
+    'BP_Systolic': (40, 300),
+    'BP_Diastolic': (10, 200),
+    'Temp': (80.0, 113.0),
+    'Glucose': (10, 2000),
+    'O2Sat': (50.0, 100.0),
+}
+# Temperatures in this band were almost certainly entered in Celsius
+CELSIUS_RANGE = (25.0, 45.0)
+
+ValidationRule = namedtuple('ValidationRule', 'name description')
+RULES = [
+    ValidationRule('duplicate', 'Duplicate PatientID/Date reading (first one kept)'),
+    ValidationRule('bp_inverted', 'Diastolic at or above systolic'),
+    ValidationRule('temp_celsius', f'Temperature in Celsius ({CELSIUS_RANGE[0]:g}-{CELSIUS_RANGE[1]:g})'),
+] + [ValidationRule(f'{col}_range', f'{col} outside {lo:g}-{hi:g} {engine.UNITS[col]}')
+     for col, (lo, hi) in PHYSICAL_LIMITS.items()]
+
+Validation = namedtuple('Validation', 'clean rejected counts')
+
+
+def _values(df, col):
+    return df[col].to_numpy(dtype='float64', na_value=np.nan)
+
+
+@profile.timed('validate')
+def rule_matrix(df, known=None):
+    """(rows x RULES) boolean matrix: True where a row breaks a rule (missing values break none)
+
+    known is an optional mask of the rows whose (PatientID, Date) is already
+    loaded or stored; they are duplicates too.
+    """
+    hits = np.zeros((len(df), len(RULES)), dtype=bool)
+    if df.empty:
+        return hits
+    hits[:, 0] = df.duplicated(['PatientID', 'Date'], keep='first').to_numpy()
+    if known is not None:
+        hits[:, 0] |= known
+    hits[:, 1] = _values(df, 'BP_Diastolic') >= _values(df, 'BP_Systolic')
+    temp = _values(df, 'Temp')
+    celsius = (temp >= CELSIUS_RANGE[0]) & (temp <= CELSIUS_RANGE[1])
+    hits[:, 2] = celsius
+    for j, (col, (lo, hi)) in enumerate(PHYSICAL_LIMITS.items(), start=3):
+        values = _values(df, col)
+        hits[:, j] = (values < lo) | (values > hi)
+        if col == 'Temp':
+            hits[:, j] &= ~celsius
+    return hits
+
+
+def reasons(hits):
+    """'rule;rule' strings of the rules each row of a rule_matrix() broke"""
+    out = np.full(len(hits), '', dtype=object)
+    for j, rule in enumerate(RULES):
+        rows = hits[:, j]
+        out[rows] = out[rows] + (rule.name + ';')
+    return np.array([text[:-1] for text in out], dtype=object)
+
+
+def validate(df, known=None):
+    """Validation(clean, rejected, counts) of a cleaned vitals frame
+
+    clean keeps the passing rows in their order; rejected holds the others with
+    a Reason column; counts is a Series of rows breaking each rule, in RULES
+    order (a row breaking two rules counts for both). For rows arriving on top
+    of loaded data, pass known (see rule_matrix) so repeats of loaded readings
+    are rejected as well.
+    """
+    hits = rule_matrix(df, known)
+    bad = hits.any(axis=1)
+    counts = pd.Series(hits.sum(axis=0), index=[rule.name for rule in RULES], name='rows')
+    if not bad.any():
+        return Validation(df, df.iloc[:0].assign(Reason=pd.Series(dtype=object)), counts)
+    rejected = df[bad].copy()
+    rejected['Reason'] = reasons(hits[bad])
+    return Validation(df[~bad], rejected, counts)
+
+
+def quarantine_path(path):
+    """Hidden sidecar for the rejected rows of a CSV (.<name>.quarantine.csv) or of a folder
+
+    Hidden, so opening the folder as a dataset does not pick it up as a partition.
+    """
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        return os.path.join(path, '.quarantine.csv')
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f'.{name}.quarantine.csv')
+
+
+def write_quarantine(rejected, path, append=False):
+    """Write the rejected rows and reasons; returns the path, or None if there are none or it is not writable
+
+    With append the rows are added to an existing quarantine file (rows rejected while following a file).
+    """
+    append = append and os.path.exists(path)
+    if rejected.empty:
+        if not append and os.path.exists(path):
+            os.remove(path)
+        return path if append else None
+    try:
+        rejected.to_csv(path, index=False, mode='a' if append else 'w', header=not append)
+    except OSError:
+        return None
+    return path
+
+
+def summary_lines(counts, rejected_rows, quarantine=None):
+    """Per-rule counts as shown in the apps"""
+    if not rejected_rows:
+        return ["Data quality: all rows passed validation."]
+    lines = [f"Data quality: {rejected_rows} rows quarantined"]
+    lines += [f"  {rule.description}: {counts[rule.name]}" for rule in RULES if counts[rule.name]]
+    if quarantine is not None:
+        lines.append(f"  Rejected rows: {quarantine}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate a vitals CSV and quarantine impossible readings')
+    parser.add_argument('file', help='vitals CSV')
+    parser.add_argument('--quarantine', help='CSV for the rejected rows (default: a hidden sidecar of the file)')
+    args = parser.parse_args(argv)
+    import monitor_ingest as ingest
+    start = time.perf_counter()
+    df, _ = ingest.stream_csv(args.file)
+    loaded = time.perf_counter()
+    result = validate(df)
+    checked = time.perf_counter()
+    path = write_quarantine(result.rejected, args.quarantine or quarantine_path(args.file))
+    print('\n'.join(summary_lines(result.counts, len(result.rejected), path)))
+    print(f"{len(df)} rows loaded in {loaded - start:.1f}s, validated in {checked - loaded:.2f}s")
+    return 1 if len(result.rejected) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
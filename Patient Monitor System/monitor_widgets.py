@@ -0,0 +1,120 @@
+"""
+Patient Health Monitoring System - Tk Widgets
+VirtualTable shows a DataFrame in a ttk.Treeview without inserting every row:
+only the rows that fit in the visible window are materialized, and scrolling
+replaces them from the frame. Opening a ward of thousands of patients costs the
+same as opening a ward of thirty.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from monitor_lazy import lazy
+
+pd = lazy('pandas')
+
+ROW_HEIGHT = 20
+
+
+def _format(value):
+    if pd.isna(value):
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.1f}'
+    return str(value)
+
+
+class VirtualTable(tk.Frame):
+    """Sortable, virtualized table over a DataFrame (the index is shown as the first column)
+
+    columns is a list of (frame column, heading, width) tuples; formatters maps
+    a frame column to a function producing its cell text. on_open(key) is
+    called with the index value of a double-clicked row.
+    """
+
+    def __init__(self, master, index_heading, columns, formatters=None, on_open=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.formatters = formatters or {}
+        self.on_open = on_open
+        self.frame = None
+        self.first = 0
+        self.visible = 25
+        self.sort_column = None
+        self.ascending = True
+        ids = ['#index'] + [col for col, _, _ in columns]
+        self.tree = ttk.Treeview(self, columns=ids[1:], height=self.visible, selectmode='browse')
+        self.tree.heading('#0', text=index_heading, command=lambda: self.sort_by('#index'))
+        self.tree.column('#0', width=90, stretch=False)
+        for col, heading, width in columns:
+            self.tree.heading(col, text=heading, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=width, anchor='e', stretch=False)
+        self.vbar = ttk.Scrollbar(self, orient='vertical', command=self.on_scrollbar)
+        hbar = ttk.Scrollbar(self, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hbar.set)
+        self.vbar.pack(side='right', fill='y')
+        hbar.pack(side='bottom', fill='x')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_to(self.first - e.delta // 120 * 3))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_to(self.first - 3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_to(self.first + 3))
+        self.tree.bind('<Double-1>', self.on_double_click)
+
+    def set_frame(self, frame):
+        """Show a new frame, keeping the current sort order and scroll position where possible"""
+        self.frame = frame
+        if frame is not None and self.sort_column is not None:
+            self.frame = self._sorted(frame)
+        self.scroll_to(self.first)
+
+    def _sorted(self, frame):
+        if self.sort_column == '#index':
+            return frame.sort_index(ascending=self.ascending, kind='stable')
+        return frame.sort_values(self.sort_column, ascending=self.ascending, kind='stable', na_position='last')
+
+    def sort_by(self, column):
+        """Heading click: sort by column, toggling the direction on repeated clicks"""
+        if self.frame is None:
+            return
+        self.ascending = not self.ascending if column == self.sort_column else column != 'Alerts'
+        self.sort_column = column
+        self.frame = self._sorted(self.frame)
+        self.scroll_to(0)
+
+    def scroll_to(self, first):
+        total = 0 if self.frame is None else len(self.frame)
+        self.first = max(0, min(first, total - self.visible))
+        self._render()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            total = 0 if self.frame is None else len(self.frame)
+            self.scroll_to(int(float(amount) * total))
+        elif action == 'scroll':
+            step = self.visible if unit == 'pages' else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def on_resize(self, event):
+        visible = max(1, event.height // ROW_HEIGHT - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.scroll_to(self.first)
+
+    def on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item and self.on_open is not None:
+            self.on_open(self.tree.item(item, 'text'))
+
+    def _render(self):
+        """Replace the tree's items with the rows of the visible window only"""
+        self.tree.delete(*self.tree.get_children())
+        if self.frame is None or not len(self.frame):
+            self.vbar.set(0, 1)
+            return
+        window = self.frame.iloc[self.first:self.first + self.visible]
+        cells = [[self.formatters.get(col, _format)(value) for value in window[col].tolist()]
+                 for col, _, _ in self.columns]
+        for key, values in zip(window.index, zip(*cells)):
+            self.tree.insert('', 'end', text=str(key), values=values)
+        total = len(self.frame)
+        self.vbar.set(self.first / total, min(1.0, (self.first + self.visible) / total))
@@ -0,0 +1,115 @@
+"""
+Patient Health Monitoring System - Background Tasks
+Runs loading, analysis and figure building on a worker thread so the Tk mainloop
+keeps repainting. Results, errors and progress are queued by the worker and
+delivered on the Tk thread by a root.after() poll, since Tk widgets may only be
+touched from the thread that created them.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 50
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when the user pressed Cancel"""
+
+
+class Task:
+    """Handle passed to the worker function for progress reporting and cancellation"""
+
+    def __init__(self, runner, name):
+        self.runner = runner
+        self.name = name
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise TaskCancelled(self.name)
+
+    def progress(self, done, total, text=None):
+        """Report progress from the worker; also a cancellation point"""
+        self.check_cancelled()
+        self.runner._events.put(('progress', self, (done, total, text)))
+
+
+class TaskRunner:
+    """Single-worker executor whose callbacks run on the Tk thread
+
+    fn(task, *args) runs on the worker; on_done(result), on_error(exc) and
+    on_progress(done, total, text) are called from the Tk event loop. A
+    cancelled task finishes through on_cancel() instead of on_done() or
+    on_error(), even if it ran to completion after the cancel.
+    """
+
+    def __init__(self, root, workers=1):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='monitor-worker')
+        self._events = queue.Queue()
+        self._callbacks = {}
+        self._job = None
+        self.active = None
+
+    @property
+    def busy(self):
+        return self.active is not None
+
+    def submit(self, name, fn, *args, on_done=None, on_error=None, on_progress=None, on_cancel=None):
+        task = Task(self, name)
+        self._callbacks[task] = (on_done, on_error, on_progress, on_cancel)
+        self.active = task
+        self._pool.submit(self._run, task, fn, args)
+        if self._job is None:
+            self._job = self.root.after(POLL_MS, self._drain)
+        return task
+
+    def cancel(self):
+        if self.active is not None:
+            self.active.cancel()
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task, fn, args):
+        try:
+            self._events.put(('done', task, fn(task, *args)))
+        except TaskCancelled:
+            self._events.put(('cancelled', task, None))
+        except Exception as e:
+            self._events.put(('error', task, e))
+
+    def _drain(self):
+        self._job = None
+        while True:
+            try:
+                kind, task, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            on_done, on_error, on_progress, on_cancel = self._callbacks.get(task, (None,)*4)
+            if kind == 'progress':
+                if on_progress is not None and not task.cancelled:
+                    on_progress(*payload)
+                continue
+            self._callbacks.pop(task, None)
+            if task is self.active:
+                self.active = None
+            if task.cancelled:
+                # Cancelled after its last check_cancelled(): the result is stale (e.g. the app was reset)
+                kind = 'cancelled'
+            if kind == 'done' and on_done is not None:
+                on_done(payload)
+            elif kind == 'error' and on_error is not None:
+                on_error(payload)
+            elif kind == 'cancelled' and on_cancel is not None:
+                on_cancel()
+        if self._callbacks:
+            self._job = self.root.after(POLL_MS, self._drain)
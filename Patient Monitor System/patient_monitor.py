@@ -1,15 +1,19 @@
 
 """
 Patient Health Monitoring System
-Built with Tkinter, Pandas, Matplotlib, and Seaborn
+Built with Tkinter, Pandas and Matplotlib
 """
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import seaborn as sns
+from monitor_lazy import lazy, warm_up, DATA_MODULES, PLOT_MODULES
+# Imported on first use (or by the background warm-up) so the window paints first
+pd = lazy('pandas')
+backend_tkagg = lazy('matplotlib.backends.backend_tkagg')
+engine = lazy('monitor_engine')
+ingest = lazy('monitor_ingest')
+cache = lazy('monitor_cache')
+validate = lazy('monitor_validate')
+charts = lazy('monitor_charts')
 
 class PatientHealthMonitor:
     def __init__(self, root):
@@ -20,6 +24,11 @@ class PatientHealthMonitor:
         self.df = None
         self.filtered_df = None
         self.patients = []
+        # The overview chart: built on the first Visualize, then only its data is swapped
+        self.viz_chart = None
+        self.index = None
+        self.selected_pid = None
+        self.quality_lines = []
         self.create_widgets()
 
     def create_widgets(self):
@@ -97,22 +106,31 @@ class PatientHealthMonitor:
         if not file_path:
             return
         try:
-            self.df = pd.read_csv(file_path)
-            # Clean data
-            self.df['Date'] = pd.to_datetime(self.df['Date'], errors='coerce')
-            num_cols = ['HeartRate','BP_Systolic','BP_Diastolic','Temp','Glucose','O2Sat']
-            for col in num_cols:
-                self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
-            self.df.dropna(subset=['PatientID','Date'], inplace=True)
+            key = cache.cache_key(file_path)
+            df = cache.load_cached(file_path, key)
+            cached = df is not None
+            if not cached:
+                df, _ = ingest.stream_csv(file_path, progress=self.show_load_progress)
+            self.index = engine.PatientIndex(df)
+            self.df = self.index.df
+            if not cached:
+                cache.save_cache(file_path, self.df, key)
+            # Impossible readings, duplicates and Celsius temperatures go to a quarantine CSV
+            checked = validate.validate(self.df)
+            if len(checked.rejected):
+                self.index = engine.PatientIndex(checked.clean)
+                self.df = self.index.df
+            quarantine = validate.write_quarantine(checked.rejected, validate.quarantine_path(file_path))
+            self.quality_lines = validate.summary_lines(checked.counts, len(checked.rejected), quarantine)
             self.filtered_df = None
             # Populate patient dropdown
-            self.patients = self.df['PatientID'].astype(str) + ' - ' + self.df['Name']
-            unique_patients = self.patients.drop_duplicates().tolist()
+            unique_patients = engine.patient_labels(self.df)
+            self.patients = unique_patients
             self.patient_dropdown['values'] = unique_patients
             self.patient_dropdown.config(state='readonly')
             if unique_patients:
                 self.patient_var.set(unique_patients[0])
-            self.status_lbl.config(text=f"✅ Loaded: {file_path.split('/')[-1]} | {len(self.df)} records", fg='#168aad')
+            self.status_lbl.config(text=f"✅ Loaded{' (cached)' if cached else ''}: {file_path.split('/')[-1]} | {len(self.df)} records", fg='#168aad')
             self.analyze_btn.config(state='normal')
             self.visualize_btn.config(state='normal')
             self.show_summary()
@@ -120,24 +138,17 @@ class PatientHealthMonitor:
             messagebox.showerror('Error', f'Failed to load file:\n{e}')
             self.status_lbl.config(text="❌ Error loading file.", fg='#e94f37')
 
+    def show_load_progress(self, done, total):
+        pct = done * 100 // max(total, 1)
+        self.status_lbl.config(text=f"⏳ Loading... {pct}%", fg='#1b6ca8')
+        self.root.update_idletasks()
+
     def show_summary(self):
         if self.df is None or self.df.empty:
             self.summary_txt.delete(1.0, tk.END)
             self.summary_txt.insert(1.0, "No data available.")
             return
-        df = self.df.copy()
-        summary = []
-        summary.append(f"Patients: {df['PatientID'].nunique()}")
-        try:
-            date_min = df['Date'].min().date()
-            date_max = df['Date'].max().date()
-            summary.append(f"Date range: {date_min} to {date_max}")
-        except Exception:
-            summary.append("Date range: N/A")
-        summary.append(f"Records: {len(df)}")
-        summary.append(f"Avg HR: {df['HeartRate'].mean():.1f} | BP sys/diast: {df['BP_Systolic'].mean():.1f}/{df['BP_Diastolic'].mean():.1f}")
-        summary.append(f"Avg Temp: {df['Temp'].mean():.1f} F | Avg Glucose: {df['Glucose'].mean():.1f} mg/dL")
-        summary.append(f"Avg O2Sat: {df['O2Sat'].mean():.1f} %")
+        summary = engine.summary_lines(self.df, basic=True) + [''] + self.quality_lines
         self.summary_txt.delete(1.0, tk.END)
         self.summary_txt.insert(1.0,'\n'.join(summary))
 
@@ -149,7 +160,8 @@ class PatientHealthMonitor:
             selpid = sel.split(' - ')[0]
         else:
             selpid = sel
-        self.filtered_df = self.df[self.df['PatientID'] == selpid].copy()
+        self.selected_pid = selpid
+        self.filtered_df = self.index.rows(selpid)
         self.status_lbl.config(text=f"Selected: {self.patient_var.get()}", fg='#337a5b')
         self.show_patient_summary()
 
@@ -159,18 +171,10 @@ class PatientHealthMonitor:
             self.summary_txt.delete(1.0, tk.END)
             self.summary_txt.insert(1.0, "No patient data available.")
             return
-        summary = []
-        summary.append(f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}")
-        try:
-            days = df['Date'].dt.date.nunique()
-        except Exception:
-            days = 'N/A'
-        summary.append(f"Records: {len(df)} | Days: {days}")
-        summary.append(f"Avg HR: {df['HeartRate'].mean():.1f}")
-        summary.append(f"BP sys/diast: {df['BP_Systolic'].mean():.1f}/{df['BP_Diastolic'].mean():.1f}")
-        summary.append(f"Avg Temp: {df['Temp'].mean():.1f} F")
-        summary.append(f"Avg Glucose: {df['Glucose'].mean():.1f} mg/dL")
-        summary.append(f"Avg O2Sat: {df['O2Sat'].mean():.1f}%")
+        if self.filtered_df is not None and self.selected_pid in self.index:
+            summary = self.index.summary_lines(self.selected_pid, basic=True)
+        else:
+            summary = engine.patient_summary_lines(df, basic=True)
         self.summary_txt.delete(1.0, tk.END)
         self.summary_txt.insert(1.0, '\n'.join(summary))
 
@@ -180,52 +184,7 @@ class PatientHealthMonitor:
             messagebox.showinfo('Info', 'No data to analyze.')
             return
         self.analysis_text.delete(1.0, tk.END)
-        # Overall stats
-        results = []
-        results.append('='*75)
-        results.append(f"{'PATIENT HEALTH ANALYSIS REPORT':^75}")
-        results.append('='*75 + '\n')
-        results.append(f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}")
-        results.append(f"Records: {len(df)}")
-        try:
-            results.append(f"Date range: {df['Date'].min().date()} to {df['Date'].max().date()}")
-        except Exception:
-            results.append("Date range: N/A")
-        results.append('-'*50)
-        # Averages
-        metrics = ['HeartRate','BP_Systolic','BP_Diastolic','Temp','Glucose','O2Sat']
-        units = ['bpm','mmHg','mmHg','F','mg/dL','%']
-        means = [f"{df[c].mean():.1f} {u}" for c,u in zip(metrics,units)]
-        results.append(f"Averages: HR {means[0]}, BP {means[1]}/{means[2]}, Temp {means[3]}, Glucose {means[4]}, O2Sat {means[5]}")
-        # Alerts
-        alerts = []
-        try:
-            if df['HeartRate'].max() > 100 or df['HeartRate'].min() < 55:
-                alerts.append('Abnormal heart rate detected.')
-            if df['BP_Systolic'].max() > 135 or df['BP_Systolic'].min() < 105 or df['BP_Diastolic'].max() > 90:
-                alerts.append('Abnormal blood pressure detected.')
-            if df['Temp'].max() > 100.5 or df['Temp'].min() < 96.5:
-                alerts.append('Abnormal temperature readings.')
-            if df['Glucose'].max() > 160 or df['Glucose'].min() < 65:
-                alerts.append('Possible glucose issues detected.')
-            if df['O2Sat'].min() < 94:
-                alerts.append('Low O2 saturation detected.')
-        except Exception:
-            pass
-        results.append('-'*50)
-        results.append('Alerts/Risks: '+ (', '.join(alerts) if alerts else 'None'))
-        # Extremes/latest
-        try:
-            latest = df.sort_values('Date',ascending=False).iloc[0]
-            results.append(f"Latest Data: {latest['Date'].date()} | HR {latest['HeartRate']} | BP {latest['BP_Systolic']}/{latest['BP_Diastolic']} | Temp {latest['Temp']} | Glucose {latest['Glucose']} | O2Sat {latest['O2Sat']}")
-        except Exception:
-            results.append("Latest Data: N/A")
-        try:
-            max_glucose = df['Glucose'].max(); min_oxy = df['O2Sat'].min()
-            results.append(f"Max glucose: {max_glucose} mg/dL | Min O2Sat: {min_oxy}%")
-        except Exception:
-            pass
-        results.append('='*75 + '\n')
+        results = engine.report_lines(df, basic=True)
         self.analysis_text.insert(1.0, '\n'.join(results))
         self.notebook.select(0)
 
@@ -234,74 +193,45 @@ class PatientHealthMonitor:
         if df is None or df.empty:
             messagebox.showinfo('Info', 'No data to visualize.')
             return
-        for widget in self.viz_tab.winfo_children():
-            widget.destroy()
         try:
-            fig, axes = plt.subplots(2,2, figsize=(12,8), dpi=95)
-            plt.subplots_adjust(hspace=0.3, wspace=0.2, top=0.94)
-            sns.set_palette('muted')
-            # Ensure dates are sorted
-            df = df.sort_values('Date')
-            # (1) Heart Rate Trend
-            sns.lineplot(ax=axes[0,0], data=df, x='Date', y='HeartRate', marker='o',label='Heart Rate (bpm)')
-            axes[0,0].set_title('Heart Rate Trend', fontsize=12, fontweight='bold', color='#168aad')
-            axes[0,0].set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-            axes[0,0].grid(True, alpha=0.3, linestyle='--')
-            # (2) BP Trend
-            df = df.copy()
-            df['BPS'] = df['BP_Systolic'].fillna(0).astype(int)
-            df['BPD'] = df['BP_Diastolic'].fillna(0).astype(int)
-            axes[0,1].plot(df['Date'], df['BPS'], marker='o', c='#22577a', label='Systolic')
-            axes[0,1].plot(df['Date'], df['BPD'], marker='s', c='#91c788', label='Diastolic')
-            axes[0,1].set_title('Blood Pressure Trend', fontsize=12, fontweight='bold', color='#168aad')
-            axes[0,1].set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-            axes[0,1].grid(True, alpha=0.3, linestyle='--')
-            axes[0,1].legend()
-            # (3) Temperature & O2 Saturation
-            ax3 = axes[1,0]
-            ax3.plot(df['Date'], df['Temp'],color='#ffa502', linewidth=2, marker='v', label='Temp (F)')
-            ax3_twin = ax3.twinx()
-            ax3_twin.bar(df['Date'], df['O2Sat'], color='#38a3a5', alpha=0.25, width=0.4, label='O2Sat (%)')
-            ax3.set_title('Temperature & Oxygen Saturation', fontsize=11, fontweight='bold', color='#168aad')
-            ax3.set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-            ax3.grid(True, alpha=0.3, linestyle='--')
-            # (4) Glucose Trend
-            sns.lineplot(ax=axes[1,1], x='Date', y='Glucose',data=df, marker='p',color='#ff6f3c')
-            axes[1,1].set_title('Glucose Level Trend', fontsize=12, fontweight='bold', color='#168aad')
-            axes[1,1].set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-            axes[1,1].grid(True, alpha=0.3, linestyle='--')
-
-            # Tighten layout
-            try:
-                title = f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}"
-            except Exception:
-                title = "Patient Data"
-            fig.suptitle(title, fontsize=15,weight='bold',color='#3498db')
-            canvas = FigureCanvasTkAgg(fig, master=self.viz_tab)
-            canvas.draw()
-            toolbar_frame = tk.Frame(self.viz_tab)
-            toolbar_frame.pack(side='top', fill='x')
-            NavigationToolbar2Tk(canvas, toolbar_frame)
-            canvas.get_tk_widget().pack(side='top', fill='both', expand=True, padx=10, pady=10)
+            if self.viz_chart is None:
+                self.viz_chart = charts.VitalsChart('basic_overview')
+                canvas = backend_tkagg.FigureCanvasTkAgg(self.viz_chart.fig, master=self.viz_tab)
+                self.viz_chart.attach()
+                toolbar_frame = tk.Frame(self.viz_tab)
+                toolbar_frame.pack(side='top', fill='x')
+                backend_tkagg.NavigationToolbar2Tk(canvas, toolbar_frame)
+                canvas.get_tk_widget().pack(side='top', fill='both', expand=True, padx=10, pady=10)
+            self.viz_chart.refresh(self.viz_chart.set_data(df))
             self.notebook.select(1)
         except Exception as e:
-            messagebox.showerror('Error', f'Visualization failed:\\n{e}')
+            messagebox.showerror('Error', f'Visualization failed:\n{e}')
+
+    def close_viz_figure(self):
+        """Destroy the chart widgets and drop the chart behind them"""
+        for widget in self.viz_tab.winfo_children():
+            widget.destroy()
+        self.viz_chart = None
 
     def reset_app(self):
         self.df = None
+        self.index = None
+        self.quality_lines = []
+        self.selected_pid = None
         self.filtered_df = None
         self.patient_dropdown.config(state='disabled')
         self.status_lbl.config(text="No file loaded.", fg='#138d75')
         self.summary_txt.delete(1.0,tk.END)
         self.analysis_text.delete(1.0,tk.END)
-        for widget in self.viz_tab.winfo_children():
-            widget.destroy()
+        self.close_viz_figure()
         messagebox.showinfo('Reset', 'Application has been reset!')
         self.notebook.select(0)
 
 def main():
     root = tk.Tk()
     app = PatientHealthMonitor(root)
+    root.update()
+    warm_up(DATA_MODULES + PLOT_MODULES)
     root.mainloop()
 
 if __name__ == '__main__':
@@ -4,13 +4,237 @@ Patient Health Monitoring System - Enhanced Version
 Built with Tkinter, Pandas, Matplotlib, and Seaborn
 Now with individual chart buttons to view each vital sign separately!
 """
+import time
+_STARTED = time.perf_counter()
+import argparse
+import copy
+import os
+import queue
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import seaborn as sns
+import monitor_profile as profile
+from monitor_lazy import lazy, warm_up
+from monitor_widgets import VirtualTable
+from monitor_worker import TaskRunner
+# Imported on first use (or by the background warm-up) so the window paints first
+pd = lazy('pandas')
+backend_tkagg = lazy('matplotlib.backends.backend_tkagg')
+engine = lazy('monitor_engine')
+ingest = lazy('monitor_ingest')
+cache = lazy('monitor_cache')
+dataset = lazy('monitor_dataset')
+charts = lazy('monitor_charts')
+trends = lazy('monitor_trends')
+anomaly = lazy('monitor_anomaly')
+report = lazy('monitor_report')
+store = lazy('monitor_store')
+live = lazy('monitor_live')
+validate = lazy('monitor_validate')
+cohort = lazy('monitor_cohort')
+
+FOLLOW_INTERVAL_MS = 1000
+# How often batches from the device listener are folded into the frame
+LIVE_INTERVAL_MS = 1000
+# Idle time before the neighbouring patients' charts are pre-rendered, and how many on each side
+PRERENDER_DELAY_MS = 400
+PRERENDER_NEIGHBOURS = 2
+# Time from process start to the first painted window that --startup-time checks against
+STARTUP_TARGET_S = 0.5
+
+_SHORT = {'HeartRate': 'HR', 'BP_Systolic': 'Sys', 'BP_Diastolic': 'Dia',
+          'Temp': 'Temp', 'Glucose': 'Glu', 'O2Sat': 'O2'}
+WARD_COLUMNS = [('Name', 'Name', 130), ('Records', 'Records', 70),
+                ('LastDate', 'Last Reading', 130), ('Alerts', 'Alerts', 60)]
+for _col in _SHORT:
+    WARD_COLUMNS += [(f'{_col}_{stat}', f'{_SHORT[_col]} {label}', 62)
+                     for stat, label in (('last', 'now'), ('mean', 'avg'), ('min', 'min'), ('max', 'max'))]
+
+
+@profile.timed('load_file')
+def load_file(task, file_path, store_path=None):
+    """Worker: load through the Feather cache or stream the CSV, then index and screen it
+
+    With a store_path the readings are also saved to that persistent store.
+    """
+    # One stat for the cache key and the end of the load; following resumes from that end
+    st = os.stat(file_path)
+    key = cache.cache_key(file_path, st)
+    size = ingest.complete_size(file_path, st.st_size)
+    df = cache.load_cached(file_path, key)
+    cached = df is not None
+    if cached:
+        running = ingest.RunningStats()
+        running.update(df)
+    else:
+        df, running = ingest.stream_csv(
+            file_path, progress=lambda done, total: task.progress(done, total, 'Loading'), stop=size)
+    task.check_cancelled()
+    result = prepare_frame(task, df, running, cache_to=None if cached else (file_path, key),
+                           quarantine=validate.quarantine_path(file_path))
+    stored = None
+    if store_path is not None:
+        task.progress(0, 1, 'Saving to store')
+        with profile.span('store_import', rows=len(df)):
+            vitals = store.VitalsStore(store_path)
+            df = result['index'].df
+            # Readings the store already holds from other files are not saved twice
+            stored = vitals.import_frame(df[~vitals.known_readings(df, file_path)], file_path)
+    result.update({'file_path': file_path, 'size': size, 'cached': cached, 'dataset': None, 'stored': stored})
+    return result
+
+
+@profile.timed('scan_folder')
+def scan_folder(task, folder):
+    """Worker: open a directory of CSVs through its manifest; no partition is read yet"""
+    data = dataset.PartitionedDataset(folder).scan(progress=task.progress)
+    return {'dataset': data, 'labels': data.patient_labels(), 'span': data.date_span()}
+
+
+@profile.timed('load_folder')
+def load_folder(task, data):
+    """Worker: load every partition of a scanned dataset in parallel (for the ward-wide views)"""
+    df = data.load(progress=task.progress)
+    task.check_cancelled()
+    running = ingest.RunningStats()
+    running.update(df)
+    result = prepare_frame(task, df, running, quarantine=validate.quarantine_path(data.folder))
+    result.update({'file_path': data.folder, 'size': 0, 'cached': False, 'dataset': data, 'stored': None})
+    return result
+
+
+@profile.timed('load_partitions')
+def load_partitions(task, data, patient_id, start=None, stop=None):
+    """Worker: one patient's readings in [start, stop) from only the partitions that can hold them"""
+    end = None if stop is None else stop - pd.Timedelta(microseconds=1)
+    df = data.load(patient_ids=[patient_id], start=start, end=end, progress=task.progress)
+    task.check_cancelled()
+    running = ingest.RunningStats()
+    running.update(df)
+    return prepare_frame(task, df, running)
+
+
+@profile.timed('open_store')
+def open_store(task, store_path):
+    """Worker: patient list, ward overview and date span of a persistent store, all from SQL aggregates"""
+    vitals = store.VitalsStore(store_path)
+    labels = vitals.patient_labels()
+    task.check_cancelled()
+    return {'store': vitals, 'labels': labels, 'span': vitals.date_span(), 'overview': vitals.ward_overview()}
+
+
+def prepare_frame(task, df, running, cache_to=None, quarantine=None):
+    """Worker: validate, index and screen a loaded frame; writes the Feather cache for cache_to
+
+    cache_to is (file_path, cache key taken before the file was read). The
+    cache keeps the unvalidated rows, so a cached load reports the same
+    rejections. Rejected rows are written to the quarantine CSV if one is
+    given. task may be None when called on the Tk thread (small frames only).
+    """
+    index = engine.PatientIndex(df)
+    if cache_to is not None:
+        file_path, key = cache_to
+        cache.save_cache(file_path, index.df, key)
+    checked = validate.validate(index.df)
+    if len(checked.rejected):
+        # The passing rows are still in PatientID/Date order, so re-indexing is cheap
+        index = engine.PatientIndex(checked.clean)
+        running = ingest.RunningStats()
+        running.update(index.df)
+    path = validate.write_quarantine(checked.rejected, quarantine) if quarantine is not None else None
+    if task is not None:
+        task.check_cancelled()
+    alerts = engine.find_alerts(index.df)
+    return {'index': index, 'running': running, 'alerts': alerts,
+            'overview': engine.ward_overview(index.df), 'labels': engine.patient_labels(index.df),
+            'quality': (checked.counts, len(checked.rejected), path)}
+
+
+def load_device_rows(task, rows):
+    """Worker: device readings that arrived with nothing loaded become the working data"""
+    df = engine.compact_dtypes(rows)
+    running = ingest.RunningStats()
+    running.update(df)
+    result = prepare_frame(task, df, running)
+    result.update({'file_path': 'device feed', 'size': 0, 'cached': False, 'dataset': None, 'stored': None})
+    return result
+
+
+def merge_rows(task, index, running, alerts, trend_cache, rows, quarantine, ward):
+    """Worker: validate new rows and merge them into the loaded data off the Tk thread
+
+    index is a snapshot and running/trend_cache shallow copies: they rebind
+    their frames when updated, so the Tk thread keeps using the current ones
+    until it swaps these in. The ward overview is only built if ward is set.
+    """
+    checked = validate.validate(rows, known=index.has_readings(rows))
+    rows = checked.clean
+    if len(checked.rejected) and quarantine is not None:
+        quarantine = validate.write_quarantine(checked.rejected, quarantine, append=True)
+    running.update(rows)
+    index.append(rows)
+    alerts = pd.concat([alerts, engine.find_alerts(rows)], ignore_index=True)
+    if trend_cache is not None:
+        trend_cache.append(index, rows)
+    return {'index': index, 'running': running, 'alerts': alerts, 'trend_cache': trend_cache,
+            'rows': rows, 'checked': checked, 'quarantine': quarantine,
+            'overview': engine.ward_overview(index.df) if ward else None}
+
+
+@profile.timed('analyze')
+def analyze_lines(task, df, index, trend_rows, anomalies, patient_id, date_range=(None, None)):
+    """Worker: analysis report plus rolling trends and anomalies
+
+    Builds the trend cache and the all-patient anomaly table if they are not
+    cached yet; both are returned so the Tk thread can keep them. Trends and
+    baselines use the full history; only the readings in date_range are reported.
+    """
+    trend_cache = None
+    if trend_rows is None:
+        with profile.span('trends', rows=len(index.df)):
+            trend_cache = trends.TrendCache(index)
+        task.check_cancelled()
+        trend_rows = trend_cache.rows(index, patient_id, *date_range)
+    if anomalies is None:
+        with profile.span('anomalies', rows=len(index.df)):
+            anomalies = anomaly.find_anomalies(index.df)
+        task.check_cancelled()
+    flagged = anomalies[anomalies['PatientID'] == patient_id] if patient_id is not None else anomalies
+    start, stop = date_range
+    if start is not None:
+        flagged = flagged[(flagged['Date'] >= start) & (flagged['Date'] < stop)]
+    with profile.span('report', rows=len(df)):
+        extra = trends.trend_lines(trend_rows) + anomaly.anomaly_lines(flagged)
+        lines = engine.report_lines(df, extra=extra)
+    return lines, trend_cache, anomalies
+
+
+def export_reports(task, index, out_dir, date_range, trend_frame, anomalies):
+    """Worker: every patient's chart and report as PDF files in out_dir"""
+    count = report.export_reports(index, out_dir, ('pdf',), *date_range, trend_frame=trend_frame,
+                                  anomalies=anomalies, progress=task.progress)
+    return count, out_dir
+
+
+def cohort_bands(task, df):
+    """Worker: per-day percentile bands of every vital across all patients"""
+    return cohort.daily_bands(df)
+
+
+def screen_ward_lines(task, patients, alerts):
+    """Worker: ward screening report text"""
+    results = ['='*75, f"{'WARD ALERT SCREENING':^75}", '='*75+'\n']
+    results.append(f"Patients: {patients} | Flagged: {alerts['PatientID'].nunique()} | Alert readings: {len(alerts)}")
+    results.append('-'*50)
+    results.extend(engine.ward_alert_lines(alerts))
+    return results
+
+
+def screen_store_lines(task, vitals):
+    """Worker: ward screening report of a persistent store, screened in SQL"""
+    alerts = vitals.alerts()
+    task.check_cancelled()
+    return screen_ward_lines(task, len(vitals.patient_labels()), alerts)
+
 
 class PatientHealthMonitor:
     def __init__(self, root):
@@ -21,7 +245,52 @@ class PatientHealthMonitor:
         self.df = None
         self.filtered_df = None
         self.patients = []
+        self.index = None
+        self.selected_pid = None
         self.chart_btn_frame = None
+        self.file_path = None
+        self.loaded_size = 0
+        self.running = None
+        self.alerts = None
+        self.tailer = None
+        self.follow_job = None
+        self.data_version = 0
+        self.runner = TaskRunner(root)
+        # Followed and device rows are merged on their own worker, so a long task never holds them
+        # up; batches that arrive during a merge wait in pending_rows and are merged together next
+        self.merger = TaskRunner(root)
+        self.pending_rows = []
+        self.charts = {}
+        self.visible_chart = None
+        self.date_span = None
+        self.date_range = None
+        self.ward_version = None
+        self.dataset = None
+        # Readings of a dataset held in memory while browsing it: (patient ID or None, date range) of the
+        # partitions loaded, or None once every partition is loaded
+        self.dataset_scope = None
+        self.trend_cache = None
+        self.anomalies = None
+        self.anomaly_version = None
+        # Persistent store: uploads are saved to store_path when store_var is set; self.store is
+        # the store being browsed (only the selected patient's readings are then in self.df)
+        self.store = None
+        self.store_path = None
+        # Device listener: its thread puts parsed batches on live_queue, poll_live() folds them in
+        self.live_server = None
+        self.live_queue = queue.Queue()
+        self.live_job = None
+        # Rendered chart bitmaps (created with the first chart) and the idle pre-rendering of neighbours
+        self.chart_images = None
+        self.offscreen_charts = {}
+        self.prerender_todo = []
+        self.prerender_job = None
+        # Validation of the loaded data: (per-rule counts, rejected rows, quarantine CSV or None)
+        self.quality = None
+        # Cohort chart: percentile bands of data version cohort_version, and the patients pinned over them
+        self.cohort_bands = None
+        self.cohort_version = None
+        self.overlay_pids = []
         self.create_widgets()
 
     def create_widgets(self):
@@ -44,10 +313,25 @@ class PatientHealthMonitor:
         left_panel.pack_propagate(False)
 
         # File Upload Button
-        upload_btn = tk.Button(
+        self.upload_btn = tk.Button(
             left_panel, text='📂 Upload CSV', command=self.upload_file, bg='#1b6ca8', fg='white',
             font=('Arial Rounded MT Bold', 12, 'bold'), pady=14, width=22)
-        upload_btn.pack(pady=(35, 10))
+        self.upload_btn.pack(pady=(35, 6))
+
+        self.folder_btn = tk.Button(
+            left_panel, text='📁 Open Folder', command=self.open_folder, bg='#1b6ca8', fg='white',
+            font=('Arial Rounded MT Bold', 11, 'bold'), pady=6, width=24)
+        self.folder_btn.pack(pady=(0, 6))
+
+        self.store_btn = tk.Button(
+            left_panel, text='🗄️ Open Store', command=self.open_store, bg='#1b6ca8', fg='white',
+            font=('Arial Rounded MT Bold', 11, 'bold'), pady=6, width=24)
+        self.store_btn.pack(pady=(0, 4))
+
+        self.store_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            left_panel, text='💾 Save uploads to local store', variable=self.store_var, bg='#f4f9fb',
+            font=('Arial', 10), activebackground='#f4f9fb').pack(pady=(0, 6))
 
         # Patient Selection Dropdown
         self.patient_var = tk.StringVar()
@@ -73,6 +357,49 @@ class PatientHealthMonitor:
             font=('Bahnschrift', 11,'bold'), width=11, relief='ridge')
         self.visualize_btn.grid(row=0, column=1, padx=8, pady=8)
 
+        self.screen_btn = tk.Button(
+            left_panel, text='🚨 Screen Ward', command=self.screen_ward,
+            state='disabled', bg='#ff8c42', fg='black',
+            font=('Bahnschrift', 11,'bold'), width=24, relief='ridge')
+        self.screen_btn.pack(pady=(4,4))
+
+        self.export_btn = tk.Button(
+            left_panel, text='🖨️ Export Reports', command=self.export_reports,
+            state='disabled', bg='#c7ceea', fg='black',
+            font=('Bahnschrift', 11,'bold'), width=24, relief='ridge')
+        self.export_btn.pack(pady=(4,4))
+
+        # Date range: From/To dates (inclusive); charts, summary and analysis show only this window
+        range_frame = tk.Frame(left_panel, bg='#f4f9fb')
+        range_frame.pack(pady=(6, 2))
+        self.from_var = tk.StringVar()
+        self.to_var = tk.StringVar()
+        tk.Label(range_frame, text='From', bg='#f4f9fb', font=('Arial', 9)).grid(row=0, column=0)
+        ttk.Entry(range_frame, textvariable=self.from_var, width=11).grid(row=0, column=1, padx=2)
+        tk.Label(range_frame, text='To', bg='#f4f9fb', font=('Arial', 9)).grid(row=0, column=2)
+        ttk.Entry(range_frame, textvariable=self.to_var, width=11).grid(row=0, column=3, padx=2)
+        self.range_btn = tk.Button(
+            range_frame, text='📅 Apply', command=self.apply_date_range, state='disabled',
+            bg='#f4f9fb', font=('Arial', 9), relief='ridge')
+        self.range_btn.grid(row=1, column=1, pady=(3, 0))
+        self.all_dates_btn = tk.Button(
+            range_frame, text='All dates', command=self.clear_date_range, state='disabled',
+            bg='#f4f9fb', font=('Arial', 9), relief='ridge')
+        self.all_dates_btn.grid(row=1, column=3, pady=(3, 0))
+
+        self.follow_var = tk.BooleanVar(value=False)
+        self.follow_chk = tk.Checkbutton(
+            left_panel, text='📡 Follow file (live append)', variable=self.follow_var,
+            command=self.toggle_follow, state='disabled', bg='#f4f9fb',
+            font=('Arial', 10), activebackground='#f4f9fb')
+        self.follow_chk.pack(pady=(2,2))
+
+        self.listen_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            left_panel, text='🛰️ Listen for devices (TCP/UDP)', variable=self.listen_var,
+            command=self.toggle_listen, bg='#f4f9fb', font=('Arial', 10),
+            activebackground='#f4f9fb').pack(pady=(2,2))
+
         self.reset_btn = tk.Button(
             left_panel, text='🔄 Reset', command=self.reset_app,
             bg='#e94f37', fg='white', font=('Bahnschrift',11,'bold'),
@@ -85,6 +412,16 @@ class PatientHealthMonitor:
             font=('Arial',10), wraplength=280)
         self.status_lbl.pack(pady=8)
 
+        # Background task progress + cancel
+        task_frame = tk.Frame(left_panel, bg='#f4f9fb')
+        task_frame.pack(fill='x', padx=15)
+        self.progress_bar = ttk.Progressbar(task_frame, mode='determinate', maximum=100)
+        self.progress_bar.pack(side='left', fill='x', expand=True, padx=(0, 6))
+        self.cancel_btn = tk.Button(
+            task_frame, text='✖ Cancel', command=self.runner.cancel, state='disabled',
+            bg='#f4f9fb', font=('Arial', 9), relief='ridge')
+        self.cancel_btn.pack(side='right')
+
         # Summary Text Box
         self.summary_txt = tk.Text(
             left_panel, height=20, font=('Consolas',10), wrap='word',
@@ -134,256 +471,912 @@ class PatientHealthMonitor:
             font=('Arial Rounded MT Bold', 11), command=self.show_glucose_chart,
             padx=10, pady=8).pack(side='left', padx=8)
 
+        tk.Button(
+            self.chart_btn_frame, text="👥 Cohort", bg='#6a4c93', fg='white',
+            font=('Arial Rounded MT Bold', 11), command=self.show_cohort_chart,
+            padx=10, pady=8).pack(side='left', padx=8)
+
+        tk.Button(
+            self.chart_btn_frame, text="➕ Overlay", command=self.pin_overlay_patient,
+            font=('Arial', 10), relief='ridge').pack(side='left', padx=4)
+
+        tk.Button(
+            self.chart_btn_frame, text="✖ Clear Overlay", command=self.clear_overlay,
+            font=('Arial', 10), relief='ridge').pack(side='left', padx=4)
+
+        # Ward Overview Tab
+        self.ward_tab = tk.Frame(self.notebook, bg='white')
+        self.notebook.add(self.ward_tab, text="🏥 Ward Overview")
+        self.ward_table = VirtualTable(
+            self.ward_tab, 'Patient', WARD_COLUMNS, on_open=self.open_ward_patient,
+            formatters={'LastDate': lambda d: d.strftime('%Y-%m-%d %H:%M')}, bg='white')
+        self.ward_table.pack(fill='both', expand=True, padx=10, pady=10)
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self.on_tab_changed())
+
+        # Diagnostics Tab (only with PATIENT_MONITOR_PROFILE set)
+        self.diag_tab = None
+        if profile.ENABLED:
+            self.diag_tab = tk.Frame(self.notebook, bg='white')
+            self.notebook.add(self.diag_tab, text="⏱️ Diagnostics")
+            diag_btns = tk.Frame(self.diag_tab, bg='white')
+            diag_btns.pack(side='top', fill='x', padx=10, pady=(10, 0))
+            tk.Button(diag_btns, text='🔄 Refresh', command=self.refresh_diagnostics,
+                      font=('Arial', 10), relief='ridge').pack(side='left', padx=4)
+            tk.Button(diag_btns, text='💾 Export JSON', command=self.export_diagnostics,
+                      font=('Arial', 10), relief='ridge').pack(side='left', padx=4)
+            ms = lambda s: f'{s * 1000:.1f}'
+            self.diag_table = VirtualTable(
+                self.diag_tab, 'Stage', [('count', 'Calls', 60), ('total', 'Total ms', 90),
+                                         ('mean', 'Mean ms', 90), ('max', 'Max ms', 90)],
+                formatters={'total': ms, 'mean': ms, 'max': ms}, bg='white')
+            self.diag_table.pack(fill='both', expand=True, padx=10, pady=10)
+            self.diag_text = tk.Text(self.diag_tab, height=14, font=('Consolas', 10), bg='#f6fff9', fg='#222')
+            self.diag_text.pack(fill='x', padx=10, pady=(0, 10))
+
     def upload_file(self):
         file_path = filedialog.askopenfilename(
             title="Select Patient Health CSV", filetypes=[("CSV files", "*.csv")])
         if not file_path:
             return
-        try:
-            self.df = pd.read_csv(file_path)
-            # Clean data
-            self.df['Date'] = pd.to_datetime(self.df['Date'], errors='coerce')
-            num_cols = ['HeartRate','BP_Systolic','BP_Diastolic','Temp','Glucose','O2Sat']
-            for col in num_cols:
-                if col in self.df.columns:
-                    self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
-            self.df.dropna(subset=['PatientID','Date'], inplace=True)
-            self.filtered_df = None
-
-            # Populate patient dropdown
-            self.patients = self.df['PatientID'].astype(str) + ' - ' + self.df['Name']
-            unique_patients = self.patients.drop_duplicates().tolist()
-            self.patient_dropdown['values'] = unique_patients
-            self.patient_dropdown.config(state='readonly')
-            self.patient_var.set(unique_patients[0])
-
-            self.status_lbl.config(
-                text=f"✅ Loaded: {file_path.split('/')[-1]} | {len(self.df)} records", 
-                fg='#168aad')
-            self.analyze_btn.config(state='normal')
-            self.visualize_btn.config(state='normal')
-            self.show_summary()
-        except Exception as e:
-            messagebox.showerror('Error', f'Failed to load file:\n{e}')
-            self.status_lbl.config(text="❌ Error loading file.", fg='#e94f37')
+        self.stop_follow()
+        store_path = (self.store_path or store.DEFAULT_PATH) if self.store_var.get() else None
+        self.run_task('Loading', load_file, file_path, store_path,
+                      on_done=self.on_file_loaded, error_title='Failed to load file')
+
+    def open_folder(self):
+        folder = filedialog.askdirectory(title="Select a folder of Patient Health CSVs")
+        if not folder:
+            return
+        self.stop_follow()
+        self.run_task('Opening folder', scan_folder, folder,
+                      on_done=self.on_folder_opened, error_title='Failed to open folder')
+
+    def open_store(self):
+        path = self.store_path or store.DEFAULT_PATH
+        store_path = filedialog.askopenfilename(
+            title="Select a Patient Monitor store", initialdir=os.path.dirname(path),
+            initialfile=os.path.basename(path), filetypes=[("SQLite stores", "*.sqlite"), ("All files", "*.*")])
+        if not store_path:
+            return
+        self.stop_follow()
+        self.run_task('Opening store', open_store, store_path,
+                      on_done=self.on_store_opened, error_title='Failed to open store')
+
+    def on_store_opened(self, result):
+        """Browse a persistent store: patients and the ward come from SQL, readings are fetched per patient"""
+        if not result['labels']:
+            messagebox.showinfo('Empty store', 'The store has no readings yet - upload a CSV with '
+                                '"Save uploads to local store" ticked first.')
+            self.status_lbl.config(text="No file loaded.", fg='#138d75')
+            return
+        self.store = result['store']
+        self.store_path = self.store.path
+        self.file_path = self.store.path
+        self.dataset = None
+        self.running = None
+        self.quality = None
+        self.loaded_size = 0
+        self.date_span = result['span']
+        self.date_range = None
+        self.set_range_entries()
+        self.df = None
+        self.index = None
+        self.alerts = None
+        self.trend_cache = None
+        self.selected_pid = None
+        self.filtered_df = None
+        self.clear_viz_tab()
+        self.ward_table.set_frame(result['overview'])
+        self.patients = result['labels']
+        self.patient_dropdown['values'] = self.patients
+        self.patient_dropdown.config(state='readonly')
+        self.patient_var.set('')
+        # Analysis and charts wait for a patient; reports and following need every reading in memory
+        for btn in (self.screen_btn, self.range_btn, self.all_dates_btn):
+            btn.config(state='normal')
+        for btn in (self.analyze_btn, self.visualize_btn, self.export_btn):
+            btn.config(state='disabled')
+        self.follow_chk.config(state='disabled')
+        self.status_lbl.config(
+            text=f"🗄️ Store: {os.path.basename(self.store.path)} | {len(self.patients)} patients - select one",
+            fg='#168aad')
+        self.show_summary()
+
+    def on_folder_opened(self, result):
+        """Browse a partitioned dataset: patients and dates come from its manifest, and partitions
+        are read per selected patient until a ward-wide view needs all of them"""
+        if not result['labels']:
+            messagebox.showinfo('Empty folder', 'The folder has no vitals CSVs with readings.')
+            self.status_lbl.config(text="No file loaded.", fg='#138d75')
+            return
+        data = result['dataset']
+        self.store = None
+        self.dataset = data
+        self.dataset_scope = (None, None)
+        self.file_path = data.folder
+        self.running = None
+        self.quality = None
+        self.loaded_size = 0
+        self.date_span = result['span']
+        self.date_range = None
+        self.set_range_entries()
+        self.df = None
+        self.index = None
+        self.alerts = None
+        self.trend_cache = None
+        self.selected_pid = None
+        self.filtered_df = None
+        self.overlay_pids = []
+        self.clear_viz_tab()
+        self.ward_table.set_frame(None)
+        self.ward_version = None
+        self.patients = result['labels']
+        self.patient_dropdown['values'] = self.patients
+        self.patient_dropdown.config(state='readonly')
+        self.patient_var.set('')
+        # Ward screening and reports load every partition on demand; analysis and charts wait for a patient
+        for btn in (self.screen_btn, self.export_btn, self.range_btn, self.all_dates_btn):
+            btn.config(state='normal')
+        for btn in (self.analyze_btn, self.visualize_btn):
+            btn.config(state='disabled')
+        self.follow_chk.config(state='disabled')
+        self.status_lbl.config(
+            text=f"📁 Dataset: {os.path.basename(data.folder)} ({len(data.manifest)} files) | "
+                 f"{len(self.patients)} patients - select one", fg='#168aad')
+        self.show_summary()
+
+    def browsing_dataset(self):
+        """True while only some partitions of the open dataset are in memory"""
+        return self.dataset is not None and self.dataset_scope is not None
+
+    def load_whole_dataset(self, then):
+        """Ward-wide views need every partition: load them all once, keep the selection, then call then()"""
+        patient_id, date_range = self.selected_pid, self.date_range
+
+        def loaded(result):
+            self.on_file_loaded(result)
+            if date_range is not None:
+                self.date_range = date_range
+                self.set_range_entries()
+            label = next((p for p in self.patients if p.split(' - ')[0] == patient_id), None)
+            if label is not None:
+                self.patient_var.set(label)
+                self.load_patient()
+            else:
+                self.show_summary()
+            then()
+
+        self.run_task('Loading all partitions', load_folder, self.dataset,
+                      on_done=loaded, error_title='Failed to load the dataset')
+
+    def on_file_loaded(self, result):
+        self.store = None
+        self.dataset_scope = None
+        self.index = result['index']
+        self.dataset = result['dataset']
+        self.df = self.index.df
+        self.file_path = result['file_path']
+        self.loaded_size = result['size']
+        self.running = result['running']
+        self.alerts = result['alerts']
+        self.quality = result['quality']
+        self.data_version += 1
+        profile.memory_snapshot('df (loaded)', self.df)
+        self.date_span = (self.df['Date'].min(), self.df['Date'].max())
+        self.date_range = None
+        self.set_range_entries()
+        self.trend_cache = None
+        self.filtered_df = None
+        self.selected_pid = None
+        self.overlay_pids = []
+        self.clear_viz_tab()
+        self.ward_table.set_frame(result['overview'])
+        self.ward_version = self.data_version
+
+        # Populate patient dropdown
+        unique_patients = result['labels']
+        self.patients = unique_patients
+        self.patient_dropdown['values'] = unique_patients
+        self.patient_dropdown.config(state='readonly')
+        self.patient_var.set(unique_patients[0] if unique_patients else '')
+
+        parts = f" ({len(self.dataset.manifest)} files)" if self.dataset is not None else ''
+        if result['stored'] is not None:
+            parts += f" | {result['stored']} rows saved to store" if result['stored'] else ' | already in store'
+        if self.quality[1]:
+            parts += f" | ⚠️ {self.quality[1]} rows quarantined"
+        self.status_lbl.config(
+            text=f"✅ Loaded{' (cached)' if result['cached'] else ''}: {os.path.basename(self.file_path)}{parts} | {len(self.df)} records",
+            fg='#168aad')
+        self.analyze_btn.config(state='normal')
+        self.visualize_btn.config(state='normal')
+        self.screen_btn.config(state='normal')
+        self.export_btn.config(state='normal')
+        self.range_btn.config(state='normal')
+        self.all_dates_btn.config(state='normal')
+        # Following tails a single growing file
+        self.follow_chk.config(state='normal' if self.dataset is None else 'disabled')
+        self.show_summary()
+
+    def run_task(self, name, fn, *args, on_done, error_title='Error'):
+        """Run fn(task, *args) on the worker thread; on_done(result) runs back on the Tk thread"""
+        if self.runner.busy:
+            messagebox.showinfo('Busy', 'Another task is still running - wait for it or press Cancel.')
+            return
+
+        def done(result):
+            self.end_task()
+            on_done(result)
+
+        def failed(e):
+            self.end_task()
+            messagebox.showerror('Error', f'{error_title}:\n{e}')
+            self.status_lbl.config(text=f"❌ {error_title}.", fg='#e94f37')
+
+        def cancelled():
+            self.end_task()
+            self.status_lbl.config(text=f"✖ {name} cancelled.", fg='#e94f37')
+
+        self.status_lbl.config(text=f"⏳ {name}...", fg='#1b6ca8')
+        self.progress_bar.config(mode='indeterminate')
+        self.progress_bar.start(15)
+        self.cancel_btn.config(state='normal')
+        self.upload_btn.config(state='disabled')
+        self.folder_btn.config(state='disabled')
+        self.store_btn.config(state='disabled')
+        self.runner.submit(name, fn, *args, on_done=done, on_error=failed,
+                           on_progress=self.show_task_progress, on_cancel=cancelled)
+
+    def end_task(self):
+        self.progress_bar.stop()
+        self.progress_bar.config(mode='determinate', value=0)
+        self.cancel_btn.config(state='disabled')
+        self.upload_btn.config(state='normal')
+        self.folder_btn.config(state='normal')
+        self.store_btn.config(state='normal')
+
+    def show_task_progress(self, done, total, text=None):
+        pct = done * 100 // max(total, 1)
+        self.progress_bar.stop()
+        self.progress_bar.config(mode='determinate', value=pct)
+        self.status_lbl.config(text=f"⏳ {text or 'Working'}... {pct}%", fg='#1b6ca8')
 
     def show_summary(self):
-        df = self.df.copy()
-        summary = []
-        summary.append(f"Patients: {df['PatientID'].nunique()}")
-        summary.append(f"Date range: {df['Date'].min().date()} to {df['Date'].max().date()}")
-        summary.append(f"Records: {len(df)}")
-        summary.append(f"Avg HR: {df['HeartRate'].mean():.1f}")
-        summary.append(f"Avg BP: {df['BP_Systolic'].mean():.1f}/{df['BP_Diastolic'].mean():.1f}")
-        summary.append(f"Avg Temp: {df['Temp'].mean():.1f} F")
-        summary.append(f"Avg Glucose: {df['Glucose'].mean():.1f} mg/dL")
-        summary.append(f"Avg O2Sat: {df['O2Sat'].mean():.1f}%")
+        if self.date_range is not None:
+            self.show_patient_summary()
+            return
+        if self.store is not None or self.browsing_dataset():
+            self.show_patient_summary()
+            return
+        summary = self.running.summary_lines() + [engine.memory_line(self.df)]
+        if self.dataset is not None:
+            summary += [''] + self.dataset.summary_lines()
+        if self.quality is not None:
+            summary += [''] + validate.summary_lines(*self.quality)
         self.summary_txt.delete(1.0, tk.END)
         self.summary_txt.insert(1.0,'\n'.join(summary))
 
     def load_patient(self):
-        if self.df is None:
+        if self.df is None and self.store is None and self.dataset is None:
             return
         selpid = self.patient_var.get().split(' - ')[0]
-        self.filtered_df = self.df[self.df['PatientID'] == selpid].copy()
-        self.status_lbl.config(text=f"Selected: {self.patient_var.get()}", fg='#337a5b')
-        self.show_patient_summary()
+        if self.browsing_dataset():
+            self.load_dataset_patient(selpid)
+            return
+        if self.store is not None:
+            self.load_store_patient(selpid)
+        self.show_patient(selpid)
+
+    def show_patient(self, selpid):
+        with profile.span('load_patient', patient=selpid):
+            self.selected_pid = selpid
+            self.filtered_df = self.index.rows(selpid)
+            self.status_lbl.config(text=f"Selected: {self.patient_var.get()}", fg='#337a5b')
+            self.show_patient_summary()
+        if self.visible_chart is not None:
+            self.render_chart(self.visible_chart.kind)
+
+    def load_store_patient(self, patient_id):
+        """Pull one patient's readings from the store (an indexed range scan) as the working frame"""
+        self.index = engine.PatientIndex(self.store.rows(patient_id))
+        self.df = self.index.df
+        self.alerts = engine.find_alerts(self.df)
+        self.trend_cache = None
+        self.data_version += 1
+        profile.memory_snapshot('df (store patient)', self.df)
+        self.analyze_btn.config(state='normal')
+        self.visualize_btn.config(state='normal')
+
+    def load_dataset_patient(self, patient_id):
+        """Read the partitions that can hold the patient's readings in the selected range (on the worker)"""
+        scope = (patient_id, self.date_range)
+        self.run_task('Loading partitions', load_partitions, self.dataset, patient_id, *self.range_bounds(),
+                      on_done=lambda result: self.on_dataset_patient(scope, result),
+                      error_title='Failed to load the patient')
+
+    def on_dataset_patient(self, scope, result):
+        self.index = result['index']
+        self.df = self.index.df
+        self.running = result['running']
+        self.alerts = result['alerts']
+        self.quality = result['quality']
+        self.dataset_scope = scope
+        self.trend_cache = None
+        self.data_version += 1
+        profile.memory_snapshot('df (dataset patient)', self.df)
+        self.analyze_btn.config(state='normal')
+        self.visualize_btn.config(state='normal')
+        self.show_patient(scope[0])
 
     def show_patient_summary(self):
-        df = self.filtered_df if self.filtered_df is not None else self.df
-        summary = []
-        summary.append(f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}")
-        summary.append(f"Records: {len(df)} | Days: {df['Date'].dt.date.nunique()}")
-        summary.append(f"Avg HR: {df['HeartRate'].mean():.1f}")
-        summary.append(f"BP: {df['BP_Systolic'].mean():.1f}/{df['BP_Diastolic'].mean():.1f}")
-        summary.append(f"Avg Temp: {df['Temp'].mean():.1f} F")
-        summary.append(f"Avg Glucose: {df['Glucose'].mean():.1f} mg/dL")
-        summary.append(f"Avg O2Sat: {df['O2Sat'].mean():.1f}%")
+        if self.store is not None:
+            # Both computed in SQL; the patient's rows in memory are only for the charts and analysis
+            if self.filtered_df is not None:
+                summary = self.store.patient_summary_lines(self.selected_pid, *self.range_bounds())
+            else:
+                summary = self.store.summary_lines(*self.range_bounds())
+        elif self.filtered_df is not None and self.selected_pid in self.index:
+            summary = self.index.summary_lines(self.selected_pid, *self.range_bounds())
+        elif self.browsing_dataset():
+            summary = self.dataset.summary_lines()
+        else:
+            df = self.current_frame()
+            summary = engine.summary_lines(df) if len(df) else ['No readings in the selected date range.']
+        if self.date_range is not None:
+            start, stop = self.date_range
+            summary = [f"Selected range: {start.date()} to {(stop - pd.Timedelta(days=1)).date()}"] + summary
         self.summary_txt.delete(1.0, tk.END)
         self.summary_txt.insert(1.0, '\n'.join(summary))
 
     def analyze_data(self):
-        df = self.filtered_df if self.filtered_df is not None else self.df
-        self.analysis_text.delete(1.0, tk.END)
+        df = self.current_frame()
+        if df.empty:
+            messagebox.showinfo('No readings', 'There are no readings in the selected date range.')
+            return
+        pid = self.selected_pid if self.filtered_df is not None else None
+        version = self.data_version
+        trend_rows = None
+        if self.trend_cache is not None:
+            trend_rows = self.trend_cache.rows(self.index, pid, *self.range_bounds())
+        # Baselines move with every appended row, so anomalies are recomputed per data version
+        anomalies = self.anomalies if self.anomaly_version == version else None
+        # The worker gets a snapshot: rows appended meanwhile rebuild the live index
+        self.run_task('Analyzing', analyze_lines, df, self.index.snapshot(), trend_rows, anomalies, pid, self.range_bounds(),
+                      on_done=lambda result: self.on_analyzed(result, version), error_title='Analysis failed')
 
-        results = []
-        results.append('='*75)
-        results.append(f"{'PATIENT HEALTH ANALYSIS REPORT':^75}")
-        results.append('='*75+'\n')
-        results.append(f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}")
-        results.append(f"Records: {len(df)}")
-        results.append(f"Date range: {df['Date'].min().date()} to {df['Date'].max().date()}")
-        results.append('-'*50)
-
-        # Averages
-        metrics = ['HeartRate','BP_Systolic','BP_Diastolic','Temp','Glucose','O2Sat']
-        units = ['bpm','mmHg','mmHg','F','mg/dL','%']
-        means = [f"{df[c].mean():.1f} {u}" for c,u in zip(metrics,units)]
-        results.append(f"Averages: HR {means[0]}, BP {means[1]}/{means[2]}, Temp {means[3]}, Glucose {means[4]}, O2 {means[5]}")
-
-        # Alerts
-        alerts = []
-        if df['HeartRate'].max() > 100 or df['HeartRate'].min() < 55:
-            alerts.append('Abnormal heart rate detected.')
-        if df['BP_Systolic'].max() > 135 or df['BP_Diastolic'].max() > 90:
-            alerts.append('Abnormal blood pressure detected.')
-        if df['Temp'].max() > 100.5 or df['Temp'].min() < 96.5:
-            alerts.append('Abnormal temperature readings.')
-        if df['Glucose'].max() > 160 or df['Glucose'].min() < 65:
-            alerts.append('Possible glucose issues detected.')
-        if df['O2Sat'].min() < 94:
-            alerts.append('Low O2 saturation detected.')
-
-        results.append('-'*50)
-        results.append('Alerts/Risks: '+ (', '.join(alerts) if alerts else 'None'))
-
-        # Latest reading
-        latest = df.sort_values('Date',ascending=False).iloc[0]
-        results.append(f"Latest: {latest['Date'].date()} | HR {latest['HeartRate']} | BP {latest['BP_Systolic']}/{latest['BP_Diastolic']} | Temp {latest['Temp']} | Glucose {latest['Glucose']} | O2 {latest['O2Sat']}")
-        results.append('='*75+'\n')
+    def on_analyzed(self, result, version):
+        results, trend_cache, anomalies = result
+        # Rows appended while the worker ran are not in freshly built caches
+        if version == self.data_version:
+            if trend_cache is not None:
+                self.trend_cache = trend_cache
+            self.anomalies = anomalies
+            self.anomaly_version = version
+        self.show_analysis(results)
 
+    def show_analysis(self, results):
+        self.analysis_text.delete(1.0, tk.END)
         self.analysis_text.insert(1.0, '\n'.join(results))
+        self.status_lbl.config(text=f"Selected: {self.patient_var.get()}", fg='#337a5b')
         self.notebook.select(0)
 
-    def visualize_data(self):
-        """Show all 4 charts in a 2x2 grid"""
-        df = self.filtered_df if self.filtered_df is not None else self.df
-        self.clear_viz_tab()
+    def range_bounds(self):
+        """(start, stop) of the selected date range, (None, None) for all dates"""
+        return self.date_range if self.date_range is not None else (None, None)
+
+    def current_frame(self):
+        """Readings of the selected patient (or all patients) within the selected date range"""
+        if self.filtered_df is not None and self.selected_pid in self.index:
+            return self.index.rows(self.selected_pid, *self.range_bounds())
+        return self.index.window(*self.range_bounds())
+
+    def set_range_entries(self):
+        start, stop = self.date_range if self.date_range is not None else self.date_span
+        if self.date_range is not None:
+            stop = stop - pd.Timedelta(days=1)
+        self.from_var.set(start.strftime('%Y-%m-%d'))
+        self.to_var.set(stop.strftime('%Y-%m-%d'))
+
+    def apply_date_range(self):
+        """Restrict the summary, analysis and charts to the From/To dates (both inclusive)"""
+        if self.df is None and self.store is None and self.dataset is None:
+            return
+        try:
+            start = pd.Timestamp(self.from_var.get().strip()).normalize()
+            stop = pd.Timestamp(self.to_var.get().strip()).normalize() + pd.Timedelta(days=1)
+        except ValueError:
+            start = stop = pd.NaT
+        if pd.isna(start) or pd.isna(stop):
+            messagebox.showerror('Invalid date', 'Enter the From and To dates as YYYY-MM-DD.')
+            return
+        if start >= stop:
+            messagebox.showerror('Invalid date range', 'The From date must not be after the To date.')
+            return
+        self.date_range = (start, stop)
+        self.refresh_window()
 
+    def clear_date_range(self):
+        if self.df is None and self.store is None and self.dataset is None:
+            return
+        self.date_range = None
+        self.set_range_entries()
+        self.refresh_window()
+
+    def refresh_window(self):
+        if self.browsing_dataset() and self.selected_pid is not None \
+                and self.dataset_scope != (self.selected_pid, self.date_range):
+            # Only the partitions of the previous range are in memory
+            self.load_dataset_patient(self.selected_pid)
+            return
+        if self.filtered_df is not None:
+            self.show_patient_summary()
+        else:
+            self.show_summary()
+        if self.visible_chart is not None:
+            self.render_chart(self.visible_chart.kind)
+
+    def toggle_follow(self):
+        if self.follow_var.get():
+            self.tailer = ingest.CsvTailer(self.file_path, offset=self.loaded_size)
+            self.status_lbl.config(text=f"📡 Following: {os.path.basename(self.file_path)}", fg='#1b6ca8')
+            self.follow_job = self.root.after(FOLLOW_INTERVAL_MS, self.poll_follow)
+        else:
+            self.stop_follow()
+
+    def stop_follow(self):
+        if self.follow_job is not None:
+            self.root.after_cancel(self.follow_job)
+            self.follow_job = None
+        self.tailer = None
+        self.follow_var.set(False)
+
+    def poll_follow(self):
+        """Parse only the rows appended since the last poll and fold them in"""
+        self.follow_job = None
         try:
-            fig, axes = plt.subplots(2,2, figsize=(12,8), dpi=95)
-            plt.subplots_adjust(hspace=0.3, wspace=0.25, top=0.94)
-
-            # (1) Heart Rate
-            sns.lineplot(ax=axes[0,0], data=df, x='Date', y='HeartRate', marker='o',color='#168aad')
-            axes[0,0].set_title('Heart Rate Trend', fontsize=12, fontweight='bold')
-            axes[0,0].set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-            axes[0,0].grid(True, alpha=0.3, linestyle='--')
-
-            # (2) BP
-            axes[0,1].plot(df['Date'], df['BP_Systolic'], marker='o', c='#22577a', label='Systolic')
-            axes[0,1].plot(df['Date'], df['BP_Diastolic'], marker='s', c='#91c788', label='Diastolic')
-            axes[0,1].set_title('Blood Pressure Trend', fontsize=12, fontweight='bold')
-            axes[0,1].set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-            axes[0,1].grid(True, alpha=0.3, linestyle='--')
-            axes[0,1].legend()
-
-            # (3) Temp & O2
-            axes[1,0].plot(df['Date'], df['Temp'],color='#ffa502', linewidth=2, marker='v')
-            axes[1,0].set_title('Temperature & O2 Saturation', fontsize=11, fontweight='bold')
-            axes[1,0].set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-            axes[1,0].grid(True, alpha=0.3, linestyle='--')
-
-            # (4) Glucose
-            sns.lineplot(ax=axes[1,1], x='Date', y='Glucose',data=df, marker='p',color='#ff6f3c')
-            axes[1,1].set_title('Glucose Level Trend', fontsize=12, fontweight='bold')
-            axes[1,1].set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-            axes[1,1].grid(True, alpha=0.3, linestyle='--')
-
-            fig.suptitle(f"Patient: {df['PatientID'].iloc[0]} - {df['Name'].iloc[0]}", 
-                        fontsize=15,weight='bold',color='#168aad')
-
-            canvas = FigureCanvasTkAgg(fig, master=self.viz_tab)
-            canvas.draw()
-            canvas.get_tk_widget().pack(side='top', fill='both', expand=True, padx=10, pady=10)
-            self.notebook.select(1)
+            rows = self.tailer.poll()
         except Exception as e:
-            messagebox.showerror('Error', f'Visualization failed:\n{e}')
+            self.stop_follow()
+            self.status_lbl.config(text=f"❌ Follow stopped: {e}", fg='#e94f37')
+            return
+        if rows is None:
+            self.stop_follow()
+            self.status_lbl.config(text="⚠️ File was truncated or replaced - please reload it.", fg='#e94f37')
+            return
+        if not rows.empty:
+            self.append_rows(rows)
+        self.follow_job = self.root.after(FOLLOW_INTERVAL_MS, self.poll_follow)
+
+    def toggle_listen(self):
+        if self.listen_var.get():
+            try:
+                self.live_server = live.LiveIngestServer(self.live_queue.put).start()
+            except OSError as e:
+                self.live_server = None
+                self.listen_var.set(False)
+                messagebox.showerror('Error', f'Cannot listen on port {live.DEFAULT_PORT}:\n{e}')
+                return
+            self.status_lbl.config(text=f"🛰️ Listening for devices on TCP/UDP port {self.live_server.port}",
+                                   fg='#1b6ca8')
+            self.live_job = self.root.after(LIVE_INTERVAL_MS, self.poll_live)
+        else:
+            self.stop_listen()
+
+    def stop_listen(self):
+        if self.live_job is not None:
+            self.root.after_cancel(self.live_job)
+            self.live_job = None
+        if self.live_server is not None:
+            self.live_server.stop()
+            self.live_server = None
+        self.listen_var.set(False)
+
+    def poll_live(self):
+        """Fold every batch the device listener parsed since the last poll in as one append"""
+        self.live_job = None
+        frames = []
+        while True:
+            try:
+                frames.append(self.live_queue.get_nowait())
+            except queue.Empty:
+                break
+        if frames:
+            self.append_rows(pd.concat(frames, ignore_index=True))
+        self.live_job = self.root.after(LIVE_INTERVAL_MS, self.poll_live)
+
+    def append_rows(self, rows):
+        """Queue new rows for the merge worker; the Tk thread only swaps the merged data in"""
+        self.loaded_size = self.tailer.offset if self.tailer is not None else self.loaded_size
+        self.pending_rows.append(rows)
+        if not self.merger.busy:
+            self.merge_pending()
+
+    def merge_pending(self):
+        rows = pd.concat(self.pending_rows, ignore_index=True)
+        self.pending_rows = []
+        if self.index is None or self.store is not None or self.browsing_dataset():
+            # Nothing loaded (or browsing a store or dataset): the device readings become the working data
+            self.merger.submit('Loading device readings', load_device_rows, rows,
+                               on_done=self.on_device_rows_loaded, on_error=self.on_merge_failed)
+            return
+        path = self.quality[2]
+        if path is None and self.tailer is not None:
+            path = validate.quarantine_path(self.file_path)
+        base = self.index
+        ward = self.notebook.select() == str(self.ward_tab)
+        self.merger.submit('Merging rows', merge_rows, base.snapshot(), copy.copy(self.running), self.alerts,
+                           copy.copy(self.trend_cache), rows, path, ward,
+                           on_done=lambda result: self.on_rows_merged(base, result), on_error=self.on_merge_failed)
+
+    def on_device_rows_loaded(self, result):
+        self.on_file_loaded(result)
+        self.follow_chk.config(state='disabled')
+        self.status_lbl.config(text=f"🛰️ {len(self.df)} device readings", fg='#1b6ca8')
+        if self.pending_rows:
+            self.merge_pending()
+
+    def on_merge_failed(self, e):
+        self.pending_rows = []
+        self.status_lbl.config(text=f"❌ Merging new rows failed: {e}", fg='#e94f37')
+
+    def on_rows_merged(self, base, result):
+        """Swap in the index, aggregates and alerts the merge worker built"""
+        if self.index is not base:
+            # Other data was loaded (or the app reset) while the rows were merged
+            return
+        rows, checked = result['rows'], result['checked']
+        if len(checked.rejected):
+            counts, rejected, _ = self.quality
+            self.quality = (counts + checked.counts, rejected + len(checked.rejected), result['quarantine'])
+        self.index = result['index']
+        self.df = self.index.df
+        self.running = result['running']
+        self.alerts = result['alerts']
+        self.trend_cache = result['trend_cache']
+        self.data_version += 1
+        profile.memory_snapshot('df (appended)', self.df)
+        if len(rows):
+            self.date_span = (min(self.date_span[0], rows['Date'].min()), max(self.date_span[1], rows['Date'].max()))
+        if len(self.index.offsets) != len(self.patients):
+            self.patients = engine.patient_labels(self.df)
+            self.patient_dropdown['values'] = self.patients
+        if self.filtered_df is not None and self.selected_pid in self.index:
+            self.filtered_df = self.index.rows(self.selected_pid)
+            self.show_patient_summary()
+        else:
+            self.show_summary()
+        if self.visible_chart is not None:
+            self.render_chart(self.visible_chart.kind)
+        if result['overview'] is not None:
+            self.ward_table.set_frame(result['overview'])
+            self.ward_version = self.data_version
+        self.refresh_ward()
+        source = '📡 Following' if self.tailer is not None else '🛰️ Device readings'
+        self.status_lbl.config(text=f"{source}: +{len(rows)} rows | {len(self.df)} records", fg='#1b6ca8')
+        if self.pending_rows:
+            self.merge_pending()
+
+    def screen_ward(self):
+        """Screen every patient against the alert rules in one pass"""
+        if self.browsing_dataset():
+            self.load_whole_dataset(self.screen_ward)
+            return
+        if self.store is not None:
+            self.run_task('Screening ward', screen_store_lines, self.store,
+                          on_done=self.show_analysis, error_title='Ward screening failed')
+            return
+        self.run_task('Screening ward', screen_ward_lines, self.df['PatientID'].nunique(), self.alerts,
+                      on_done=self.show_analysis, error_title='Ward screening failed')
+
+    def export_reports(self):
+        """Write a PDF (overview charts + analysis report) per patient for the selected date range"""
+        if self.browsing_dataset():
+            self.load_whole_dataset(self.export_reports)
+            return
+        out_dir = filedialog.askdirectory(title="Select a folder for the patient reports")
+        if not out_dir:
+            return
+        trend_frame = self.trend_cache.frame if self.trend_cache is not None else None
+        anomalies = self.anomalies if self.anomaly_version == self.data_version else None
+        self.run_task('Exporting reports', export_reports, self.index.snapshot(), out_dir, self.range_bounds(),
+                      trend_frame, anomalies, on_done=self.on_reports_exported, error_title='Report export failed')
+
+    def on_reports_exported(self, result):
+        count, out_dir = result
+        self.status_lbl.config(text=f"🖨️ {count} patient reports written to {out_dir}", fg='#168aad')
+
+    def on_tab_changed(self):
+        self.refresh_ward()
+        if self.diag_tab is not None and self.notebook.select() == str(self.diag_tab):
+            self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        self.diag_table.set_frame(profile.stage_totals())
+        self.diag_text.delete(1.0, tk.END)
+        lines = profile.diagnostics_lines()
+        if self.chart_images is not None:
+            lines = [self.chart_images.stats_line()] + lines
+        self.diag_text.insert(1.0, '\n'.join(lines))
+
+    def export_diagnostics(self):
+        path = filedialog.asksaveasfilename(
+            title="Export timing data", defaultextension='.json', filetypes=[("JSON files", "*.json")])
+        if not path:
+            return
+        try:
+            profile.export(path)
+        except OSError as e:
+            messagebox.showerror('Error', f'Failed to export timing data:\n{e}')
+            return
+        self.status_lbl.config(text=f"💾 Timing data written to {os.path.basename(path)}", fg='#168aad')
+
+    def refresh_ward(self):
+        """Recompute the ward overview if the data changed, but only while its tab is showing"""
+        if self.notebook.select() != str(self.ward_tab):
+            return
+        if self.browsing_dataset() and not self.runner.busy:
+            self.load_whole_dataset(self.refresh_ward)
+            return
+        if self.index is None or self.ward_version == self.data_version or self.store is not None:
+            return
+        self.ward_table.set_frame(engine.ward_overview(self.df))
+        self.ward_version = self.data_version
+
+    def open_ward_patient(self, patient_id):
+        """Double-click in the ward table: select that patient"""
+        label = next((p for p in self.patients if p.split(' - ')[0] == patient_id), None)
+        if label is not None:
+            self.patient_var.set(label)
+            self.load_patient()
+
+    def visualize_data(self):
+        """Show all 4 charts in a 2x2 grid"""
+        self.render_chart('overview')
+
+    def render_chart(self, kind):
+        """Show a chart kind, reusing its figure/canvas and swapping in the patient's data
+
+        A chart already rendered for this patient, range and data version is
+        copied from the image cache instead of being drawn again.
+        """
+        if self.df is None:
+            return
+        if kind == 'cohort':
+            self.render_cohort()
+            return
+        df = self.current_frame()
+        if df.empty:
+            messagebox.showinfo('No readings', 'There are no readings in the selected date range.')
+            return
+        self.cancel_prerender()
+        chart = self.show_chart(kind, lambda: charts.VitalsChart(kind))
+        if self.chart_images is None:
+            self.chart_images = charts.ImageCache()
+        pid = self.selected_pid if self.filtered_df is not None else None
+        with profile.span('chart_set_data', kind=kind, rows=len(df)):
+            full = chart.set_data(df, span=self.date_range or self.date_span)
+        key = self.chart_key(chart, pid)
+        image = self.chart_images.get(key)
+        if image is not None and chart.show_image(image, full):
+            profile.record('chart_cache_hit', 0.0, kind=kind)
+        else:
+            with profile.span('chart_draw', kind=kind, full=full):
+                chart.refresh(full)
+            self.chart_images.put(key, chart.snapshot())
+        self.notebook.select(1)
+        if pid is not None:
+            self.schedule_prerender(kind, pid)
+
+    def show_chart(self, kind, make):
+        """The chart of a kind (created with make() on first use), packed as the visible chart"""
+        chart = self.charts.get(kind)
+        if chart is None:
+            chart = make()
+            backend_tkagg.FigureCanvasTkAgg(chart.fig, master=self.viz_tab)
+            chart.attach()
+            self.charts[kind] = chart
+        if self.visible_chart is not chart:
+            if self.visible_chart is not None:
+                self.visible_chart.fig.canvas.get_tk_widget().pack_forget()
+            chart.fig.canvas.get_tk_widget().pack(side='top', fill='both', expand=True, padx=10, pady=10)
+            self.visible_chart = chart
+        return chart
+
+    def render_cohort(self, refresh_bands=False):
+        """Show the cohort bands with the overlaid patients' readings in the selected date range
+
+        Bands are computed on the worker once per data version; with
+        refresh_bands False (appended rows) the last bands stay up until the
+        Cohort button is pressed again. Only patients not yet on the chart
+        have their lines added.
+        """
+        if self.browsing_dataset():
+            self.load_whole_dataset(lambda: self.render_cohort(refresh_bands=True))
+            return
+        if self.df is None:
+            return
+        if self.store is not None:
+            messagebox.showinfo('Cohort', 'Cohort bands need every reading in memory - '
+                                          'upload the CSV instead of browsing the store.')
+            return
+        if self.cohort_bands is None or (refresh_bands and self.cohort_version != self.data_version):
+            version = self.data_version
+            self.run_task('Computing cohort bands', cohort_bands, self.df,
+                          on_done=lambda bands: self.on_cohort_bands(bands, version),
+                          error_title='Cohort bands failed')
+            if self.cohort_bands is None:
+                return
+        self.cancel_prerender()
+        chart = self.show_chart('cohort', charts.CohortChart)
+        full = False
+        if chart.bands is not self.cohort_bands:
+            chart.set_bands(self.cohort_bands, len(self.index.offsets))
+            full = True
+        full = chart.set_span(self.date_range or self.date_span) or full
+        # Lines are of one data version and date range; anything else redraws them all
+        lines_key = (self.data_version, self.date_range)
+        if full or chart.lines_key != lines_key:
+            chart.clear_patients()
+            chart.lines_key = lines_key
+        wanted = self.overlay_ids()
+        for pid in list(chart.patients):
+            if pid not in wanted:
+                chart.remove_patient(pid)
+        for pid in wanted:
+            if pid in chart.patients:
+                continue
+            with profile.span('cohort_overlay', patient=pid):
+                label = next((p for p in self.patients if p.split(' - ')[0] == pid), pid)
+                full = chart.add_patient(pid, self.index.rows(pid, *self.range_bounds()), label) or full
+        with profile.span('chart_draw', kind='cohort', full=full):
+            chart.refresh(full)
+        self.notebook.select(1)
+
+    def on_cohort_bands(self, bands, version):
+        self.cohort_bands = bands
+        self.cohort_version = version
+        self.status_lbl.config(text=f"👥 Cohort bands: {len(bands)} days", fg='#168aad')
+        self.render_cohort()
+
+    def overlay_ids(self):
+        """Pinned patients plus the selected one, at most charts.MAX_OVERLAY"""
+        ids = [pid for pid in self.overlay_pids if pid in self.index]
+        if self.filtered_df is not None and self.selected_pid in self.index and self.selected_pid not in ids:
+            ids.append(self.selected_pid)
+        return ids[:charts.MAX_OVERLAY]
+
+    def pin_overlay_patient(self):
+        """Keep the selected patient on the cohort chart when another one is selected"""
+        if self.filtered_df is None or self.selected_pid is None:
+            messagebox.showinfo('Overlay', 'Select a patient to add to the cohort overlay.')
+            return
+        if self.selected_pid not in self.overlay_pids:
+            if len(self.overlay_pids) >= charts.MAX_OVERLAY:
+                messagebox.showinfo('Overlay', f'The overlay holds at most {charts.MAX_OVERLAY} patients.')
+                return
+            self.overlay_pids.append(self.selected_pid)
+        self.render_cohort()
+
+    def clear_overlay(self):
+        self.overlay_pids = []
+        if self.visible_chart is not None and self.visible_chart.kind == 'cohort':
+            self.render_cohort()
+
+    def chart_key(self, chart, patient_id):
+        """Image cache key: what the chart shows, its axes limits and the pixel size it was drawn at"""
+        # A store's readings do not change while it is browsed (data_version moves per patient there)
+        version = ('store', self.store.path) if self.store is not None else self.data_version
+        size = tuple(int(v) for v in chart.fig.bbox.size)
+        return patient_id, chart.kind, self.date_range, version, size, chart.limits()
+
+    def schedule_prerender(self, kind, patient_id):
+        """Once the app is idle, render this chart for the patients next to patient_id in the dropdown"""
+        ids = [label.split(' - ')[0] for label in self.patients]
+        if patient_id not in ids:
+            return
+        pos = ids.index(patient_id)
+        order = []
+        for step in range(1, PRERENDER_NEIGHBOURS + 1):
+            order += [pos + step, pos - step]
+        self.prerender_todo = [(kind, ids[i]) for i in order if 0 <= i < len(ids)]
+        self.prerender_job = self.root.after(PRERENDER_DELAY_MS, self.prerender_next)
+
+    def cancel_prerender(self):
+        if self.prerender_job is not None:
+            self.root.after_cancel(self.prerender_job)
+            self.prerender_job = None
+        self.prerender_todo = []
+
+    def prerender_next(self):
+        """Render one queued neighbour off screen into the image cache, then yield to the event loop"""
+        self.prerender_job = None
+        while self.prerender_todo:
+            kind, pid = self.prerender_todo.pop(0)
+            chart = self.charts.get(kind)
+            if chart is None or self.df is None:
+                return
+            if self.store is not None:
+                df = self.store.rows(pid, *self.range_bounds())
+            elif pid in self.index:
+                df = self.index.rows(pid, *self.range_bounds())
+            else:
+                continue
+            if df.empty:
+                continue
+            offscreen = self.offscreen_charts.get(kind)
+            if offscreen is None or tuple(offscreen.fig.bbox.size) != tuple(chart.fig.bbox.size):
+                offscreen = self.offscreen_charts[kind] = charts.offscreen_chart(kind, like=chart)
+            # Limits widen from the visible chart's, as they would if this patient were shown next
+            offscreen.copy_limits(chart)
+            offscreen.set_data(df, span=self.date_range or self.date_span)
+            key = self.chart_key(offscreen, pid)
+            if key in self.chart_images:
+                continue
+            with profile.span('chart_prerender', kind=kind, rows=len(df)):
+                offscreen.fig.canvas.draw()
+            self.chart_images.put(key, offscreen.snapshot(), prerendered=True)
+            break
+        if self.prerender_todo:
+            self.prerender_job = self.root.after(1, self.prerender_next)
 
     def clear_viz_tab(self):
-        """Clear visualization tab except button frame"""
+        """Clear visualization tab except button frame, releasing the cached figures and images"""
+        self.cancel_prerender()
+        self.charts = {}
+        self.offscreen_charts = {}
+        self.visible_chart = None
+        if self.chart_images is not None:
+            self.chart_images.clear()
         for widget in self.viz_tab.winfo_children():
             if widget is self.chart_btn_frame:
                 continue
             widget.destroy()
 
     def show_heart_rate_chart(self):
-        self.clear_viz_tab()
-        df = self.filtered_df if self.filtered_df is not None else self.df
-        if df is None or df.empty:
-            return
-
-        fig, ax = plt.subplots(figsize=(11,5), dpi=95)
-        sns.lineplot(ax=ax, data=df, x='Date', y='HeartRate', marker='o', color='#168aad', linewidth=2.5)
-        ax.set_title('❤️ Heart Rate Trend', fontsize=14, fontweight='bold', color='#168aad')
-        ax.set_xlabel('Date', fontweight='bold')
-        ax.set_ylabel('Heart Rate (bpm)', fontweight='bold')
-        ax.set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-        ax.grid(True, alpha=0.3, linestyle='--')
-
-        canvas = FigureCanvasTkAgg(fig, master=self.viz_tab)
-        canvas.draw()
-        canvas.get_tk_widget().pack(side='top', fill='both', expand=True, padx=10, pady=10)
-        self.notebook.select(1)
+        self.render_chart('heart_rate')
 
     def show_bp_chart(self):
-        self.clear_viz_tab()
-        df = self.filtered_df if self.filtered_df is not None else self.df
-        if df is None or df.empty:
-            return
-
-        fig, ax = plt.subplots(figsize=(11,5), dpi=95)
-        ax.plot(df['Date'], df['BP_Systolic'], marker='o', c='#22577a', label='Systolic', linewidth=2.5)
-        ax.plot(df['Date'], df['BP_Diastolic'], marker='s', c='#91c788', label='Diastolic', linewidth=2.5)
-        ax.set_title('💉 Blood Pressure Trend', fontsize=14, fontweight='bold', color='#168aad')
-        ax.set_xlabel('Date', fontweight='bold')
-        ax.set_ylabel('BP (mmHg)', fontweight='bold')
-        ax.set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-        ax.grid(True, alpha=0.3, linestyle='--')
-        ax.legend(fontsize=11)
-
-        canvas = FigureCanvasTkAgg(fig, master=self.viz_tab)
-        canvas.draw()
-        canvas.get_tk_widget().pack(side='top', fill='both', expand=True, padx=10, pady=10)
-        self.notebook.select(1)
+        self.render_chart('bp')
 
     def show_temp_o2_chart(self):
-        self.clear_viz_tab()
-        df = self.filtered_df if self.filtered_df is not None else self.df
-        if df is None or df.empty:
-            return
-
-        fig, ax1 = plt.subplots(figsize=(11,5), dpi=95)
-        ax1.plot(df['Date'], df['Temp'], color='#ffa502', linewidth=2.5, marker='v', label='Temperature (F)')
-        ax1.set_ylabel('Temperature (F)', color='#ffa502', fontweight='bold')
-        ax1.set_xlabel('Date', fontweight='bold')
-        ax1.set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-        ax1.set_title('🌡️ Temperature & Oxygen Saturation', fontsize=14, fontweight='bold', color='#168aad')
-        ax1.grid(True, alpha=0.3, linestyle='--')
-        ax1.tick_params(axis='y', labelcolor='#ffa502')
-
-        ax2 = ax1.twinx()
-        ax2.bar(df['Date'], df['O2Sat'], color='#38a3a5', alpha=0.3, width=0.5, label='O2 Sat (%)')
-        ax2.set_ylabel('Oxygen Saturation (%)', color='#38a3a5', fontweight='bold')
-        ax2.tick_params(axis='y', labelcolor='#38a3a5')
-
-        canvas = FigureCanvasTkAgg(fig, master=self.viz_tab)
-        canvas.draw()
-        canvas.get_tk_widget().pack(side='top', fill='both', expand=True, padx=10, pady=10)
-        self.notebook.select(1)
+        self.render_chart('temp_o2')
 
     def show_glucose_chart(self):
-        self.clear_viz_tab()
-        df = self.filtered_df if self.filtered_df is not None else self.df
-        if df is None or df.empty:
-            return
+        self.render_chart('glucose')
 
-        fig, ax = plt.subplots(figsize=(11,5), dpi=95)
-        sns.lineplot(ax=ax, x='Date', y='Glucose', data=df, marker='p', color='#ff6f3c', linewidth=2.5)
-        ax.set_title('🍬 Glucose Level Trend', fontsize=14, fontweight='bold', color='#168aad')
-        ax.set_xlabel('Date', fontweight='bold')
-        ax.set_ylabel('Glucose (mg/dL)', fontweight='bold')
-        ax.set_xticklabels(df['Date'].dt.strftime('%b %d'),rotation=25)
-        ax.grid(True, alpha=0.3, linestyle='--')
-
-        canvas = FigureCanvasTkAgg(fig, master=self.viz_tab)
-        canvas.draw()
-        canvas.get_tk_widget().pack(side='top', fill='both', expand=True, padx=10, pady=10)
-        self.notebook.select(1)
+    def show_cohort_chart(self):
+        self.render_cohort(refresh_bands=True)
 
     def reset_app(self):
+        self.runner.cancel()
+        self.merger.cancel()
+        self.pending_rows = []
+        self.stop_follow()
+        self.stop_listen()
+        self.live_queue = queue.Queue()
+        self.follow_chk.config(state='disabled')
+        self.running = None
+        self.alerts = None
+        self.quality = None
+        self.trend_cache = None
+        self.anomalies = None
+        self.anomaly_version = None
+        self.dataset = None
+        self.dataset_scope = None
+        self.cohort_bands = None
+        self.cohort_version = None
+        self.overlay_pids = []
+        # The store file itself is kept; only the app stops browsing it
+        self.store = None
         self.df = None
+        self.index = None
+        self.selected_pid = None
         self.filtered_df = None
+        self.date_range = None
+        self.from_var.set('')
+        self.to_var.set('')
+        self.range_btn.config(state='disabled')
+        self.all_dates_btn.config(state='disabled')
         self.patient_dropdown.set('')
         self.patient_dropdown['values'] = []
         self.patient_dropdown.config(state='disabled')
@@ -391,15 +1384,35 @@ class PatientHealthMonitor:
         self.summary_txt.delete(1.0,tk.END)
         self.analysis_text.delete(1.0,tk.END)
         self.clear_viz_tab()
+        self.ward_table.set_frame(None)
+        self.ward_version = None
         self.analyze_btn.config(state='disabled')
         self.visualize_btn.config(state='disabled')
+        self.screen_btn.config(state='disabled')
+        self.export_btn.config(state='disabled')
         messagebox.showinfo('Reset', 'Application has been reset!')
         self.notebook.select(0)
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Patient Health Monitoring System')
+    parser.add_argument('--startup-time', action='store_true',
+                        help=f'print the time to the first painted window (target {STARTUP_TARGET_S}s) and exit')
+    args = parser.parse_args(argv)
     root = tk.Tk()
     app = PatientHealthMonitor(root)
+    root.update()
+    painted = time.perf_counter() - _STARTED
+    profile.record('startup_paint', painted)
+    if args.startup_time:
+        print(f"First paint after {painted:.3f}s (target {STARTUP_TARGET_S}s): "
+              f"{'OK' if painted <= STARTUP_TARGET_S else 'SLOW'}")
+        root.destroy()
+        return
+    # Import the data and plotting stacks while the user picks a file
+    warm_up(on_done=lambda seconds: profile.record('warm_up', seconds))
     root.mainloop()
+    app.runner.shutdown()
+    app.merger.shutdown()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
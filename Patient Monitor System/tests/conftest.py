@@ -0,0 +1,27 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import monitor_engine as engine  # noqa: E402
+import monitor_validate as validate  # noqa: E402
+
+SAMPLE_CSV = os.path.join(ROOT, 'patient_health_data.csv')
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    """Copy of the bundled sample, so caches and quarantine files are written to tmp_path"""
+    path = tmp_path / 'vitals.csv'
+    shutil.copy(SAMPLE_CSV, path)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def vitals():
+    """The bundled sample as the apps hold it: cleaned, compacted and validated"""
+    return validate.validate(engine.load_csv(SAMPLE_CSV)).clean
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+import monitor_api as api
+
+
+@pytest.fixture
+def server(sample_csv):
+    server = api.ApiServer(api.VitalsService(sample_csv))
+    yield server
+    server.worker.shutdown()
+
+
+def get(server, target):
+    status, body = asyncio.run(server.respond(target))
+    return status, json.loads(body)
+
+
+def test_routes():
+    assert api.route('/patients/PT001/alerts/') == ('patient_alerts', ['PT001'])
+    assert api.route('/patients/PT%20001') == ('patient', ['PT 001'])
+    with pytest.raises(api.ApiError):
+        api.route('/patients/PT001/unknown')
+
+
+def test_endpoints(server):
+    status, health = get(server, '/health')
+    assert status == 200 and health['patients'] == 30 and health['quarantined'] == 71
+    status, body = get(server, '/patients/PT001/readings?points=10')
+    assert status == 200 and body['returned'] <= body['records']
+    status, body = get(server, '/patients/PT001/analysis')
+    assert status == 200 and body['lines'][0] == '=' * 75
+    status, body = get(server, '/alerts?severity=critical')
+    assert status == 200 and {a['Severity'] for a in body['alerts']} <= {'critical'}
+    assert get(server, '/alerts?severity=Critical') == (status, body)
+
+
+@pytest.mark.parametrize('target, status', [
+    ('/nowhere', 404),
+    ('/patients/NOBODY', 404),
+    ('/summary?start=yesterday', 400),
+    ('/summary?start=2025-10-20&end=2025-10-10', 400),
+    ('/patients/PT001/readings?points=many', 400),
+    ('/alerts?severity=urgent', 400),
+    ('/patients/PT001/analysis?start=2030-01-01&end=2030-01-02', 404),
+])
+def test_errors(server, target, status):
+    code, body = get(server, target)
+    assert code == status and 'error' in body
+
+
+def test_responses_are_cached_per_version(server):
+    get(server, '/summary')
+    get(server, '/summary')
+    assert server.hits == 1
+
+
+def test_follow_resumes_where_the_load_stopped(sample_csv):
+    """A half-written last line is not loaded; following picks it up once it is complete"""
+    with open(sample_csv, 'ab') as fh:
+        fh.write(b'PT001,Patient 1,2030-01-01,8')
+    server = api.ApiServer(api.VitalsService(sample_csv), follow=True)
+    try:
+        with open(sample_csv, 'ab') as fh:
+            fh.write(b'0,120,80,98.6,100,97\n')
+        rows = server.tailer.poll()
+        assert rows['HeartRate'].tolist() == [80]
+        assert server.service.append(rows)
+        status, body = get(server, '/patients/PT001/readings?start=2030-01-01')
+        assert status == 200 and body['records'] == 1
+    finally:
+        server.worker.shutdown()
+
+
+def test_patient_stats_are_rounded(server):
+    status, body = get(server, '/patients/PT001')
+    assert status == 200
+    for stats in body['stats'].values():
+        for value in stats.values():
+            assert value is None or value == round(value, 4)
+
+
+@pytest.mark.parametrize('points', [1, 2, 5, 13])
+def test_points_caps_the_readings_returned(server, points):
+    status, body = get(server, f'/patients/PT001/readings?points={points}')
+    assert status == 200 and body['records'] > points
+    dates = [r['Date'] for r in body['readings']]
+    assert body['returned'] == len(dates) <= points and dates == sorted(dates)
@@ -0,0 +1,25 @@
+import pytest
+
+import monitor_cache as cache
+import monitor_ingest as ingest
+
+pytestmark = pytest.mark.skipif(not cache.available(), reason='pyarrow is not installed')
+
+
+def test_cache_round_trip(sample_csv):
+    key = cache.cache_key(sample_csv)
+    df, _ = ingest.stream_csv(sample_csv)
+    assert cache.save_cache(sample_csv, df, key)
+    assert cache.is_cached(sample_csv)
+    assert len(cache.load_cached(sample_csv)) == len(df)
+
+
+def test_rows_appended_during_the_read_make_the_cache_stale(sample_csv):
+    """The key is the file version that was read, not the one on disk when the cache is saved"""
+    key = cache.cache_key(sample_csv)
+    df, _ = ingest.stream_csv(sample_csv)
+    with open(sample_csv, 'a') as fh:
+        fh.write('PT001,Patient 1,2030-01-01,80,120,80,98.6,100,97\n')
+    cache.save_cache(sample_csv, df, key)
+    assert not cache.is_cached(sample_csv)
+    assert cache.load_cached(sample_csv) is None
@@ -0,0 +1,114 @@
+import pandas as pd
+import pytest
+
+import monitor_engine as engine
+
+START, STOP = pd.Timestamp('2025-10-15'), pd.Timestamp('2025-10-25')
+
+
+def legacy_alerts(df):
+    """The per-patient min/max checks analyze_data() ran before the alert rules existed"""
+    alerts = []
+    if df['HeartRate'].max() > 100 or df['HeartRate'].min() < 55:
+        alerts.append('Abnormal heart rate detected.')
+    if df['BP_Systolic'].max() > 135 or df['BP_Systolic'].min() < 105 or df['BP_Diastolic'].max() > 90:
+        alerts.append('Abnormal blood pressure detected.')
+    if df['Temp'].max() > 100.5 or df['Temp'].min() < 96.5:
+        alerts.append('Abnormal temperature readings.')
+    if df['Glucose'].max() > 160 or df['Glucose'].min() < 65:
+        alerts.append('Possible glucose issues detected.')
+    if df['O2Sat'].min() < 94:
+        alerts.append('Low O2 saturation detected.')
+    return alerts
+
+
+def test_bounds_match_a_mask_scan(vitals):
+    index = engine.PatientIndex(vitals)
+    for pid in index.patient_ids():
+        lo, hi = index.bounds(pid, START, STOP)
+        mask = (vitals['PatientID'] == pid) & (vitals['Date'] >= START) & (vitals['Date'] < STOP)
+        assert sorted(index.df['Date'].iloc[lo:hi]) == sorted(vitals.loc[mask, 'Date'])
+    assert index.bounds('nobody') == (0, 0)
+
+
+def test_window_is_every_patient_in_range(vitals):
+    index = engine.PatientIndex(vitals)
+    window = index.window(START, STOP)
+    assert len(window) == ((vitals['Date'] >= START) & (vitals['Date'] < STOP)).sum()
+    assert window['Date'].between(START, STOP, inclusive='left').all()
+    ordered = window.sort_values(['PatientID', 'Date'], kind='stable')
+    assert (ordered.index == window.index).all()
+    assert index.window() is index.df
+
+
+def test_append_matches_a_full_rebuild(vitals):
+    shuffled = vitals.sample(frac=1, random_state=0)
+    first, rest = shuffled.iloc[:500], shuffled.iloc[500:].astype({'PatientID': object, 'Name': object})
+    rest.loc[rest.index[:5], 'PatientID'] = 'PT999'
+    index = engine.PatientIndex(first)
+    # order refers to the indexed rows followed by the batch
+    expected = engine.PatientIndex(engine.concat_rows(index.df, rest))
+    index.append(rest)
+    pd.testing.assert_frame_equal(index.df, expected.df)
+    assert index.offsets == expected.offsets
+    assert (index.order == expected.order).all()
+
+
+def test_append_drops_only_the_touched_summaries(vitals):
+    index = engine.PatientIndex(vitals)
+    before = index.summary_lines('PT001')
+    other = index.summary_lines('PT002')
+    rows = index.rows('PT001').tail(1).assign(Date=lambda df: df['Date'] + pd.Timedelta(days=30))
+    index.append(rows)
+    assert index.summary_lines('PT001') != before
+    assert index.summary_lines('PT002') is other
+
+
+def test_has_readings(vitals):
+    index = engine.PatientIndex(vitals)
+    rows = index.df.iloc[[0, 10, 20]].astype({'PatientID': object})
+    rows.loc[rows.index[1], 'Date'] += pd.Timedelta(minutes=1)
+    rows.loc[rows.index[2], 'PatientID'] = 'PT999'
+    assert index.has_readings(rows).tolist() == [True, False, False]
+
+
+def test_find_alerts_matches_the_per_patient_checks(vitals):
+    index = engine.PatientIndex(vitals)
+    alerts = engine.find_alerts(index.df)
+    for pid in index.patient_ids():
+        rows = index.rows(pid)
+        assert engine.patient_alerts(rows) == legacy_alerts(rows)
+        assert engine.alert_messages(alerts[alerts['PatientID'] == pid]) == legacy_alerts(rows)
+
+
+def test_find_alerts_rows(vitals):
+    alerts = engine.find_alerts(vitals)
+    low_o2 = alerts[alerts['Metric'] == 'O2Sat']
+    assert len(low_o2) == (vitals['O2Sat'] < 94).sum()
+    assert (low_o2['Severity'] == 'critical').all()
+    assert list(engine.find_alerts(None).columns) == engine.ALERT_COLUMNS
+
+
+@pytest.mark.parametrize('basic, latest, o2, extremes', [(False, 'Latest: ', ' O2 ', False),
+                                                         (True, 'Latest Data: ', ' O2Sat ', True)])
+def test_report_labels(vitals, basic, latest, o2, extremes):
+    lines = engine.report_lines(engine.PatientIndex(vitals).rows('PT001'), basic=basic)
+    assert any(line.startswith(latest) and o2 in line for line in lines)
+    assert any(line.startswith('Averages:') and o2 in line for line in lines)
+    assert any(line.startswith('Max glucose:') for line in lines) == extremes
+
+
+def test_summary_labels(vitals):
+    assert 'Avg BP: ' in '\n'.join(engine.summary_lines(vitals))
+    assert 'BP sys/diast: ' in '\n'.join(engine.summary_lines(vitals, basic=True))
+    rows = engine.PatientIndex(vitals).rows('PT001')
+    assert engine.patient_summary_lines(rows)[3].startswith('BP: ')
+    assert engine.patient_summary_lines(rows, basic=True)[3].startswith('BP sys/diast: ')
+
+
+def test_ward_alerts_count_the_latest_reading(vitals):
+    index = engine.PatientIndex(vitals)
+    overview = engine.ward_overview(index.df)
+    for pid in index.patient_ids():
+        latest = index.rows(pid).tail(1)
+        assert overview.loc[pid, 'Alerts'] == len(engine.find_alerts(latest))
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+import monitor_engine as engine
+import monitor_ingest as ingest
+
+
+def test_iter_clean_chunks_falls_back_to_text_columns(tmp_path):
+    """A vitals column holding text in a later chunk must not lose the rows before or after it"""
+    path = tmp_path / 'vitals.csv'
+    lines = ['PatientID,Name,Date,HeartRate,BP_Systolic,BP_Diastolic,Temp,Glucose,O2Sat']
+    for i in range(10):
+        rate = 'n/a' if i == 7 else str(70 + i)
+        lines.append(f'PT00{i % 3},Patient {i % 3},2025-10-{i + 1:02d},{rate},120,80,98.6,100,97')
+    path.write_text('\n'.join(lines) + '\n')
+    chunks = list(ingest.iter_clean_chunks(str(path), chunksize=3))
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df) == 10
+    assert np.isnan(df['HeartRate'].iloc[7])
+    assert df['HeartRate'].drop(index=7).tolist() == [70 + i for i in range(10) if i != 7]
+
+
+def test_stream_csv_matches_running_stats(sample_csv):
+    df, running = ingest.stream_csv(sample_csv, chunksize=100)
+    assert running.records == len(df)
+    assert running.stats()['Records'].sum() == len(df)
+
+
+def test_load_up_to_complete_size_then_tail_sees_each_line_once(sample_csv):
+    """A half-written last line is left to the tailer, which starts where the load stopped"""
+    with open(sample_csv, 'ab') as fh:
+        fh.write(b'PT001,Patient 1,2030-01-01,8')
+    stop = ingest.complete_size(sample_csv)
+    df, _ = ingest.stream_csv(sample_csv, chunksize=100, stop=stop)
+    assert len(df) == 750 and df['Date'].max().year < 2030
+    with open(sample_csv, 'ab') as fh:
+        fh.write(b'0,120,80,98.6,100,97\nPT002,Patient 2,2030-01-02,81,120,80,98.6,100,97\n')
+    rows = ingest.CsvTailer(sample_csv, offset=stop).poll()
+    assert rows['HeartRate'].tolist() == [80, 81]
+
+
+def test_every_reader_parses_dates_the_same_way(tmp_path):
+    """A date the GUI and API drop must not be kept by the CLIs' load_csv, and vice versa"""
+    path = tmp_path / 'vitals.csv'
+    header = 'PatientID,Name,Date,HeartRate,BP_Systolic,BP_Diastolic,Temp,Glucose,O2Sat\n'
+    lines = ['PT001,Patient 1,2025-10-01,80,120,80,98.6,100,97',
+             'PT001,Patient 1,10/02/2025,80,120,80,98.6,100,97',
+             'PT001,Patient 1,2025-10-03 08:30:00,80,120,80,98.6,100,97']
+    path.write_text(header + '\n'.join(lines) + '\n')
+    streamed, _ = ingest.stream_csv(str(path))
+    parsed = ingest.parse_rows((header + '\n'.join(lines) + '\n').encode())
+    loaded = engine.load_csv(str(path))
+    assert streamed['Date'].tolist() == parsed['Date'].tolist() == loaded['Date'].tolist()
+    assert len(loaded) == 2
@@ -0,0 +1,36 @@
+import queue
+import socket
+import time
+
+import pytest
+
+import monitor_live as live
+
+GOOD = b'PT001,Patient 1,2025-10-01,80,120,80,98.6,100,97\n'
+BAD_LINES = [
+    b'PT002,"Patient 2,2025-10-02,80,120,80,98.6,100,97\n',
+    b'PT003,\xff\xfe,2025-10-03,80,120,80,98.6,100,97\n',
+]
+
+
+@pytest.mark.parametrize('bad', BAD_LINES)
+def test_parse_lines_drops_or_repairs_bad_lines(bad):
+    rows = live.parse_lines(GOOD + bad + GOOD)
+    assert (rows['PatientID'] == 'PT001').sum() == 2
+
+
+def test_server_keeps_delivering_after_a_bad_line():
+    batches = queue.Queue()
+    server = live.LiveIngestServer(batches.put, port=0, udp=False, batch_ms=20).start()
+    try:
+        with socket.create_connection(('127.0.0.1', server.port)) as sock:
+            sock.sendall(b''.join(BAD_LINES))
+            time.sleep(0.2)  # flushed as a batch of their own before the good reading
+            sock.sendall(GOOD)
+            while True:
+                rows = batches.get(timeout=5)
+                if (rows['PatientID'] == 'PT001').any():
+                    break
+    finally:
+        server.stop()
+    assert server.rows >= 1 and not server._chunks
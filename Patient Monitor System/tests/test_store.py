@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import monitor_engine as engine
+import monitor_store as store
+
+
+@pytest.fixture
+def vitals_store(tmp_path, sample_csv, vitals):
+    vitals_store = store.VitalsStore(str(tmp_path / 'vitals.sqlite'))
+    vitals_store.import_frame(vitals, sample_csv)
+    return vitals_store
+
+
+def test_summary_matches_engine(vitals_store, vitals):
+    # The last line is the store's path, or the memory use of a frame held in RAM
+    assert vitals_store.summary_lines()[:-1] == engine.summary_lines(vitals)[:-1]
+    assert vitals_store.patient_summary_lines('PT001') == engine.patient_summary_lines(
+        engine.PatientIndex(vitals).rows('PT001'))
+
+
+def test_rows_match_index(vitals_store, vitals):
+    index = engine.PatientIndex(vitals)
+    start, stop = pd.Timestamp('2025-10-15'), pd.Timestamp('2025-10-25')
+    rows = vitals_store.rows('PT003', start, stop)
+    expected = index.rows('PT003', start, stop)
+    assert rows['Date'].tolist() == expected['Date'].tolist()
+    np.testing.assert_allclose(rows[engine.NUM_COLS].to_numpy(dtype='float64'),
+                               expected[engine.NUM_COLS].to_numpy(dtype='float64'))
+
+
+def test_ward_overview_matches_engine(vitals_store, vitals):
+    index = engine.PatientIndex(vitals)
+    ours = vitals_store.ward_overview()
+    theirs = engine.ward_overview(index.df)
+    assert ours.index.tolist() == theirs.index.astype(str).tolist()
+    cols = ['Records', 'Alerts'] + [f'{col}_{stat}' for col in engine.NUM_COLS for stat in ('mean', 'min', 'max', 'last')]
+    np.testing.assert_allclose(ours[cols].to_numpy(dtype='float64'), theirs[cols].to_numpy(dtype='float64'))
+
+
+def test_alerts_match_engine(vitals_store, vitals):
+    index = engine.PatientIndex(vitals)
+    alerts = vitals_store.alerts('PT001')
+    expected = engine.find_alerts(index.rows('PT001'))
+    assert alerts[['Metric', 'Severity']].values.tolist() == expected[['Metric', 'Severity']].values.tolist()
+
+
+def test_import_is_idempotent_and_known_readings(vitals_store, vitals, sample_csv, tmp_path):
+    assert vitals_store.import_frame(vitals, sample_csv) == 0
+    assert not vitals_store.known_readings(vitals, sample_csv).any()
+    assert vitals_store.known_readings(vitals, str(tmp_path / 'other.csv')).all()
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+import monitor_validate as validate
+
+NAMES = [rule.name for rule in validate.RULES]
+
+
+def frame(*rows):
+    base = {'PatientID': 'PT001', 'Name': 'Patient 1', 'HeartRate': 70.0, 'BP_Systolic': 120.0,
+            'BP_Diastolic': 80.0, 'Temp': 98.6, 'Glucose': 100.0, 'O2Sat': 97.0}
+    return pd.DataFrame([{**base, 'Date': pd.Timestamp('2025-10-01') + pd.Timedelta(days=i), **row}
+                         for i, row in enumerate(rows)])
+
+
+def broken(hits, row):
+    return [name for name, hit in zip(NAMES, hits[row]) if hit]
+
+
+def test_rule_matrix_flags_each_rule():
+    df = frame({}, {'BP_Diastolic': 130.0}, {'Temp': 37.0}, {'Temp': 120.0}, {'O2Sat': 101.2},
+               {'HeartRate': np.nan}, {})
+    df.loc[6, 'Date'] = df.loc[0, 'Date']
+    hits = validate.rule_matrix(df)
+    assert hits.shape == (7, len(validate.RULES))
+    assert broken(hits, 0) == []
+    assert broken(hits, 1) == ['bp_inverted']
+    assert broken(hits, 2) == ['temp_celsius']
+    assert broken(hits, 3) == ['Temp_range']
+    assert broken(hits, 4) == ['O2Sat_range']
+    assert broken(hits, 5) == []
+    assert broken(hits, 6) == ['duplicate']
+
+
+def test_known_rows_are_duplicates():
+    df = frame({}, {})
+    hits = validate.rule_matrix(df, known=np.array([False, True]))
+    assert hits[:, 0].tolist() == [False, True]
+
+
+def test_validate_splits_and_counts():
+    df = frame({}, {'O2Sat': 101.2}, {'O2Sat': 101.2, 'BP_Diastolic': 130.0})
+    checked = validate.validate(df)
+    assert len(checked.clean) == 1 and len(checked.rejected) == 2
+    assert checked.counts['O2Sat_range'] == 2 and checked.counts['bp_inverted'] == 1
+    assert checked.rejected['Reason'].tolist() == ['O2Sat_range', 'bp_inverted;O2Sat_range']
+    assert validate.rule_matrix(df.iloc[:0]).shape == (0, len(validate.RULES))